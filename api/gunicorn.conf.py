@@ -0,0 +1,82 @@
+"""
+Gunicorn configuration for the Hate Speech Detection API
+
+Usage (from api/, or from /app in the Docker image):
+    gunicorn -c gunicorn.conf.py
+
+The model is loaded once in the master (preload_app) and shared with the
+forked workers. Every worker warms up before it accepts connections.
+"""
+
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_src = os.path.join(_here, 'src')
+
+# app.py lives in src/ in the repo and next to this file in the Docker image
+pythonpath = _src if os.path.isdir(_src) else _here
+wsgi_app = 'app:create_app()'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Read by app.py to size per-worker resources such as the inference pool
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Threaded workers: a worker keeps answering while one of its threads
+# serves a long /stream_predict body, and only the main loop has to check
+# in with the arbiter, so a stream is not killed after GUNICORN_TIMEOUT.
+# Admission control (off by default) only counts the requests a worker is
+# running, at most one per thread; when_ready() warns when it is enabled
+# with a single thread, where it can never shed anything
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+preload_app = True
+
+# Each worker keeps its own metrics; they are summed at scrape time through
+# snapshot files in this directory, so /metrics reports the whole server
+# whichever worker answers it
+if workers > 1:
+    os.environ.setdefault('METRICS_MULTIPROC_DIR', tempfile.mkdtemp(prefix='tweetguard-metrics-'))
+
+def on_starting(server):
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            os.remove(path)
+
+def when_ready(server):
+    import app
+    if app.admission.enabled and threads == 1:
+        server.log.warning(
+            "Admission control is enabled with GUNICORN_THREADS=1: a worker "
+            "only sees the request it is admitting, so none is ever shed"
+        )
+
+def pre_fork(server, worker):
+    # Move everything loaded so far (the model included) out of the
+    # collector's reach, so collections in the workers do not write to
+    # those pages and un-share them
+    gc.freeze()
+
+def post_worker_init(worker):
+    import app
+    from gunicorn.workers.sync import SyncWorker
+    # e.g. -k sync --threads 1 on the command line
+    app.sync_worker = isinstance(worker, SyncWorker)
+    app.init_worker()
+
+def worker_exit(server, worker):
+    import app
+    app.metrics.flush()
+
+def child_exit(server, worker):
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        from metrics import mark_process_dead
+        mark_process_dead(directory, worker.pid)
@@ -0,0 +1,192 @@
+"""
+Admission Control
+Load shedding in front of the scoring endpoints
+
+Work in flight is counted in texts (a /predict call is 1, a batch its
+number of texts). A request is rejected up front, to be retried later,
+when admitting it would exceed the in-flight limit or when the texts
+ahead of it could not be scored within the latency budget at the
+throughput measured while busy. Rejections cost microseconds, so an
+overloaded process keeps answering instead of queueing without bound.
+"""
+
+import math
+import threading
+import time
+
+# Busy seconds of scoring per throughput sample, and the weight of the
+# newest sample in the moving average
+RATE_WINDOW = 0.5
+RATE_SMOOTHING = 0.3
+
+MAX_RETRY_AFTER = 60
+
+class AdmissionController:
+    """
+    Weighted in-flight limiter with a latency budget
+
+    try_acquire() admits a request of a given weight or refuses it;
+    admitted requests must call release() when done. An idle controller
+    always admits, so a batch heavier than the limit is not starved.
+    A limit or budget of 0 disables that check.
+    """
+
+    def __init__(self, max_inflight=0, latency_budget_ms=0, clock=time.monotonic):
+        self.max_inflight = int(max_inflight)
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.clock = clock
+        self.inflight = 0
+        self.requests = 0
+        self.admitted = 0
+        self.rejected = {'inflight': 0, 'latency': 0}
+        # Texts scored per busy second, None until measured
+        self.drain_rate = None
+        self._busy = 0.0
+        self._completed = 0
+        self._mark = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_inflight > 0 or self.latency_budget > 0
+
+    def _account_busy(self, now):
+        """Add the time since the last change to the busy time if work was in flight"""
+        if self.requests > 0:
+            self._busy += now - self._mark
+        self._mark = now
+
+    def estimated_delay(self, weight=0):
+        """Seconds to drain the work in flight plus weight more texts, None if unknown"""
+        if not self.drain_rate:
+            return None
+        return (self.inflight + weight) / self.drain_rate
+
+    def try_acquire(self, weight=1):
+        """
+        Admit a request of weight texts
+
+        Returns:
+            bool: True if admitted (release() must follow), False if rejected
+        """
+        with self._lock:
+            if self.requests > 0 and self.enabled:
+                if self.max_inflight and self.inflight + weight > self.max_inflight:
+                    self.rejected['inflight'] += 1
+                    return False
+                delay = self.estimated_delay(weight)
+                if self.latency_budget and delay is not None and delay > self.latency_budget:
+                    self.rejected['latency'] += 1
+                    return False
+
+            self._account_busy(self.clock())
+            self.inflight += weight
+            self.requests += 1
+            self.admitted += 1
+            return True
+
+    def release(self, weight=1):
+        """Finish an admitted request and update the measured throughput"""
+        with self._lock:
+            self._account_busy(self.clock())
+            self.inflight -= weight
+            self.requests -= 1
+            self._completed += weight
+
+            if self._busy >= RATE_WINDOW:
+                rate = self._completed / self._busy
+                if self.drain_rate is None:
+                    self.drain_rate = rate
+                else:
+                    self.drain_rate += RATE_SMOOTHING * (rate - self.drain_rate)
+                self._busy = 0.0
+                self._completed = 0
+
+    def retry_after(self):
+        """Whole seconds a rejected client should wait, from the time to drain the work in flight"""
+        delay = self.estimated_delay()
+        if delay is None:
+            return 1
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(delay)))
+
+    def configure(self, max_inflight=None, latency_budget_ms=None):
+        """Update the in-flight limit and/or latency budget"""
+        if max_inflight is not None:
+            if max_inflight < 0:
+                raise ValueError("max_inflight must be >= 0")
+            self.max_inflight = int(max_inflight)
+
+        if latency_budget_ms is not None:
+            if latency_budget_ms < 0:
+                raise ValueError("latency_budget_ms must be >= 0")
+            self.latency_budget = latency_budget_ms / 1000.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'max_inflight': self.max_inflight,
+                'latency_budget_ms': self.latency_budget * 1000.0,
+                'inflight_texts': self.inflight,
+                'inflight_requests': self.requests,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'drain_rate': self.drain_rate
+            }
+
+def parse_request_start(value):
+    """
+    Parse an X-Request-Start header set by a proxy (nginx "t=${msec}",
+    or epoch milliseconds/microseconds)
+
+    Returns:
+        float: Epoch seconds, None if missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        start = float(value)
+    except ValueError:
+        return None
+    if start > 1e14:
+        return start / 1e6
+    if start > 1e11:
+        return start / 1e3
+    return start
+
+def request_deadline(timeout_ms=None, request_start=None, default_timeout_ms=0, now=None):
+    """
+    Absolute deadline of a request
+
+    Args:
+        timeout_ms: X-Request-Timeout-Ms header value, the client's budget
+        request_start: X-Request-Start header value; when present the
+            budget counts from the time the proxy received the request, so
+            time spent queued in front of the worker counts against it
+        default_timeout_ms: Budget of requests that do not send one (0: none)
+        now: Current epoch seconds
+
+    Returns:
+        float: Epoch seconds after which the result is useless, None for no deadline
+    """
+    now = time.time() if now is None else now
+    budget = default_timeout_ms
+    if timeout_ms:
+        try:
+            budget = float(timeout_ms)
+        except ValueError:
+            pass
+    if not budget or budget <= 0:
+        return None
+
+    start = parse_request_start(request_start)
+    if start is None or start > now:
+        start = now
+    return start + budget / 1000.0
+
+def deadline_expired(deadline, now=None):
+    """Whether a deadline from request_deadline() has passed"""
+    return deadline is not None and (time.time() if now is None else now) >= deadline
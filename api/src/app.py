@@ -3,47 +3,441 @@ Hate Speech Detection API
 Flask API for detecting hate speech and offensive language in text
 """
 
+import hashlib
+import json
 import pickle
 import logging
 import os
-from flask import Flask, request, jsonify, send_from_directory
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
 import numpy as np
+from compiled_model import CompiledLinearModel
+from cascade import CascadeScorer
+from prediction_cache import PredictionCache
+from coalescer import RequestCoalescer
+import model_artifact
+from model_artifact import artifact_dir_for, is_artifact, load_artifact, HEADER_FILE
+from metrics import MetricsRegistry, BATCH_SIZE_BUCKETS
+from model_reloader import ModelReloader
+from inference_pool import InferencePool
+from ndjson_stream import LineSplitter
+from static_assets import StaticAssets
+from shadow import ShadowScorer
+from admission import AdmissionController, request_deadline, deadline_expired
+from profiler import RequestProfiler, FORMATS as PROFILE_FORMATS, render as render_profile
+import response_format
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+# Frontend files are served from the in-memory index below, not by Flask's
+# built-in static route
+app = Flask(__name__, static_folder=None)
 CORS(app, origins="*")  # Enable CORS for all origins
 
 # Global variables for model
 model_data = None
 
-def load_model():
-    """Load the trained model and vectorizer"""
+# Texts scored by every newly loaded model before it is swapped in
+WARMUP_TEXTS = ["have a nice day", "you are a disgusting pig"]
+
+# Set once this process has warmed up the request path (see init_worker)
+worker_ready = threading.Event()
+
+# Set by gunicorn.conf.py when this process is a sync gunicorn worker, which
+# is killed once a request outlives GUNICORN_TIMEOUT, as any long stream does
+sync_worker = False
+
+# Token for /admin endpoints (admin endpoints are disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Input limits
+MAX_TEXT_LENGTH = 1000
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 100))
+
+# /stream_predict scores lines in micro-batches of this size
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 256))
+MAX_STREAM_LINE_BYTES = 16 * 1024
+STREAM_READ_BYTES = 64 * 1024
+
+# Repeated texts in a batch are scored once: "exact" merges identical
+# strings, "retweet" also ignores leading "RT @user:" prefixes (the body
+# is scored without them), "off" scores every copy
+BATCH_DEDUP = os.environ.get("BATCH_DEDUP", "exact")
+RETWEET_PREFIX = re.compile(r'^(?:\s*RT\s+@\w+:?)+\s*')
+
+# Use the compiled scoring engine instead of the sklearn sparse path
+COMPILED_INFERENCE = os.environ.get("COMPILED_INFERENCE", "1") == "1"
+
+# Storage precision of the compiled weights (float64, float32 or int8);
+# unset keeps the precision the model was saved with
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION")
+
+# Niceness of the child process converting a pickle during a hot reload
+RELOAD_NICE = int(os.environ.get("MODEL_RELOAD_NICE", 10))
+
+# Pre-screen texts with the bounded stage-one score of the compiled engine
+# and only run the full scorer when the decision is not proven (cascade.py)
+CASCADE_ENABLED = os.environ.get("CASCADE_ENABLED", "0") == "1"
+
+# "inline" scores in the serving process, "process" on a pool of worker processes
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "inline")
+# Every gunicorn worker (WEB_CONCURRENCY, exported by gunicorn.conf.py) gets
+# its own pool, so by default they split the cores between them
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY") or 1))
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0)) or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+inference_pool = InferencePool(
+    workers=INFERENCE_WORKERS,
+    shard_size=int(os.environ.get("INFERENCE_SHARD_SIZE", 64))
+) if INFERENCE_BACKEND == "process" else None
+if inference_pool is not None and INFERENCE_WORKERS * WEB_CONCURRENCY > (os.cpu_count() or 1):
+    logger.warning(f"{WEB_CONCURRENCY} server processes x {INFERENCE_WORKERS} inference workers "
+                   f"oversubscribe {os.cpu_count()} CPUs")
+
+# Load shedding for /predict and /batch_predict: texts in flight per process
+# and the latency budget of the work ahead of a new request (0 disables each,
+# the default; see the README for sizing them from the load test knee)
+admission = AdmissionController(
+    max_inflight=int(os.environ.get("ADMISSION_MAX_INFLIGHT", 0)),
+    latency_budget_ms=float(os.environ.get("ADMISSION_LATENCY_BUDGET_MS", 0))
+)
+
+# Deadline of requests without an X-Request-Timeout-Ms header (0: none)
+REQUEST_TIMEOUT_MS = float(os.environ.get("REQUEST_TIMEOUT_MS", 0))
+
+# Opt-in cProfile sampling of /predict and /batch_predict: a share of the
+# requests, plus every request whose X-Profile-Token header matches
+# PROFILE_TOKEN; the PROFILE_KEEP slowest profiles are kept for /admin/profiles
+profiler = RequestProfiler(
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0)),
+    token=os.environ.get("PROFILE_TOKEN"),
+    keep=int(os.environ.get("PROFILE_KEEP", 20))
+)
+PROFILED_ENDPOINTS = ('predict', 'batch_predict')
+
+# Candidate models scored next to the active one on a sampled share of the
+# traffic, e.g. SHADOW_MODELS="candidate=/models/candidate.pkl" (see shadow.py)
+SHADOW_MODELS = os.environ.get("SHADOW_MODELS", "")
+
+# Built React frontend, indexed and precompressed once at startup
+static_assets = StaticAssets(os.environ.get("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')))
+
+# Prediction cache keyed on the normalized text (0 disables it)
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 0)) or None
+)
+
+# Prometheus metrics served at /metrics, summed over the gunicorn workers
+# through METRICS_MULTIPROC_DIR when it is set (gunicorn.conf.py sets it)
+metrics = MetricsRegistry(
+    enabled=os.environ.get("METRICS_ENABLED", "1") == "1",
+    shared_dir=os.environ.get("METRICS_MULTIPROC_DIR") or None,
+    flush_interval=float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+)
+REQUEST_COUNT = metrics.counter('tweetguard_requests_total', 'HTTP requests by endpoint and status',
+                                ('endpoint', 'status'))
+REQUEST_SECONDS = metrics.histogram('tweetguard_request_seconds', 'Request latency by endpoint', 'endpoint')
+STAGE_SECONDS = metrics.histogram('tweetguard_stage_seconds', 'Time spent in each request stage', 'stage')
+BATCH_SIZE = metrics.histogram('tweetguard_batch_size', 'Texts per scoring call', buckets=BATCH_SIZE_BUCKETS)
+ERROR_COUNT = metrics.counter('tweetguard_errors_total', 'Errors by type', 'type')
+DEDUPLICATED = metrics.counter('tweetguard_batch_deduplicated_total',
+                               'Batch texts answered from a duplicate in the same batch')
+MODEL_LOAD_SECONDS = metrics.gauge('tweetguard_model_load_seconds', 'Duration of the last model load')
+metrics.counter('tweetguard_model_reloads_total', 'Hot model reloads by result', 'result',
+                callback=lambda: {'success': model_reloader.reloads, 'failure': model_reloader.failures})
+metrics.counter('tweetguard_cache_events_total', 'Prediction cache hits, misses, evictions and expirations',
+                'event', callback=lambda: {
+                    event: prediction_cache.stats()[event]
+                    for event in ('hits', 'misses', 'evictions', 'expirations')
+                })
+metrics.counter('tweetguard_cascade_texts_total', 'Texts decided by the cascade pre-screen or the full scorer',
+                'stage', callback=lambda: cascade_stats(model_data))
+metrics.counter('tweetguard_admission_rejected_total', 'Requests shed by admission control', 'reason',
+                callback=lambda: admission.stats()['rejected'])
+DEADLINE_EXCEEDED = metrics.counter('tweetguard_deadline_exceeded_total',
+                                    'Requests dropped before scoring because their deadline had passed')
+metrics.gauge('tweetguard_admission_inflight_texts', 'Texts admitted and not yet answered',
+              callback=lambda: admission.stats()['inflight_texts'])
+metrics.counter('tweetguard_shadow_texts_total', 'Texts scored by shadow models, by agreement with the active model',
+                ('model', 'result'), callback=lambda: {
+                    key: value
+                    for name, compared in shadow.stats()['models'].items()
+                    for key, value in (((name, 'agree'), compared['agreements']),
+                                       ((name, 'disagree'), compared['compared'] - compared['agreements']))
+                })
+metrics.counter('tweetguard_shadow_sampled_total', 'Scored batches sampled for the shadow models',
+                callback=lambda: {None: shadow.sampled})
+metrics.counter('tweetguard_shadow_dropped_total', 'Sampled batches dropped because the shadow queue was full',
+                callback=lambda: {None: shadow.dropped})
+metrics.gauge('tweetguard_cache_size', 'Entries in the prediction cache',
+              callback=lambda: prediction_cache.stats()['size'])
+
+def compile_model(data):
+    """Build the compiled scoring engine for a loaded model, if supported"""
+    if not COMPILED_INFERENCE:
+        return None
+    try:
+        return CompiledLinearModel.from_sklearn(data['vectorizer'], data['model'])
+    except Exception as e:
+        logger.warning(f"Compiled inference unavailable, using sklearn path: {str(e)}")
+        return None
+
+def build_cascade(data):
+    """Wrap the compiled scoring engine in a confidence cascade, if enabled"""
+    if not CASCADE_ENABLED or data.get('compiled') is None:
+        return None
+    try:
+        return CascadeScorer(data['compiled'], data['threshold'])
+    except Exception as e:
+        logger.warning(f"Cascade unavailable, using the full scorer: {str(e)}")
+        return None
+
+def cascade_stats(data):
+    """Texts decided by each cascade stage for the given model"""
+    cascade = data.get('cascade') if data else None
+    if cascade is None:
+        return {}
+    stats = cascade.stats()
+    return {'early': stats['early_exits'], 'full': stats['full_scores']}
+
+def compiled_scorer(data):
+    """The cascade if enabled, else the compiled engine (None for the sklearn path)"""
+    return data.get('cascade') or data.get('compiled')
+
+def apply_precision(data):
+    """Convert the compiled weights to MODEL_PRECISION, if set"""
+    compiled = data.get('compiled')
+    if MODEL_PRECISION and compiled is not None and compiled.precision != MODEL_PRECISION:
+        data['compiled'] = compiled.astype(MODEL_PRECISION)
+    return data
+
+def read_model(model_path, isolated=False):
+    """
+    Read a model from a pickle file, preferring its memory-mappable artifact
+
+    The artifact directory next to the pickle (hate_speech_model/) is used
+    when present, unless the pickle has been modified after it was written.
+
+    Args:
+        isolated: Unpickle in a child process (see read_pickle_isolated),
+            for reloads next to live traffic
+
+    Returns:
+        tuple: (model data dict, path it was loaded from)
+    """
+    artifact_dir = model_path if is_artifact(model_path) else artifact_dir_for(model_path)
+    if is_artifact(artifact_dir):
+        header_path = os.path.join(artifact_dir, HEADER_FILE)
+        if os.path.isfile(model_path) and os.path.getmtime(model_path) > os.path.getmtime(header_path):
+            logger.warning(f"{model_path} is newer than {artifact_dir}, loading the pickle instead")
+        else:
+            return apply_precision(load_artifact(artifact_dir)), artifact_dir
+
+    if isolated and COMPILED_INFERENCE:
+        data = read_pickle_isolated(model_path)
+        if data is not None:
+            return apply_precision(data), model_path
+
+    with open(model_path, 'rb') as f:
+        data = pickle.load(f)
+
+    # Pruned n-grams are only kept for introspection, free them in every worker
+    if getattr(data.get('vectorizer'), 'stop_words_', None) is not None:
+        data['vectorizer'].stop_words_ = None
+
+    data['compiled'] = compile_model(data)
+    return apply_precision(data), model_path
+
+def read_pickle_isolated(model_path):
+    """
+    Unpickle and compile a model in a child process and map the result
+
+    pickle.load holds the GIL for the whole load (tens of ms for the default
+    model), stalling every request thread of a serving process. The child
+    runs at a lower CPU priority (MODEL_RELOAD_NICE) and writes the
+    compiled model as a temporary artifact instead, which is memory-mapped
+    here in a few ms. The artifact has no sklearn objects, so models the
+    compiled engine does not support (e.g. trained with --streaming) are
+    left to the caller to unpickle in process.
+
+    Returns:
+        dict: Model data as returned by load_artifact, or None if the model
+        cannot be compiled and has to be unpickled in this process
+
+    Raises:
+        RuntimeError: If the conversion fails
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='tweetguard-reload-')
+    out_dir = os.path.join(tmp_dir, 'model')
+    try:
+        process = subprocess.Popen(
+            [sys.executable, model_artifact.__file__, model_path, '--output', out_dir],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        # Lower its CPU priority right away, before the interpreter starts
+        # up, so request threads mostly win the CPU on a busy host
+        try:
+            os.setpriority(os.PRIO_PROCESS, process.pid, RELOAD_NICE)
+        except (AttributeError, OSError):
+            pass
+        output = process.communicate()[0]
+        if process.returncode == model_artifact.UNSUPPORTED_EXIT:
+            logger.info(f"{model_path} cannot be compiled, unpickling it in process: {conversion_error(output)}")
+            return None
+        if process.returncode != 0:
+            raise RuntimeError(f"Model conversion failed: {conversion_error(output)}")
+        # The mapped pages outlive the files
+        return load_artifact(out_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def conversion_error(output):
+    """The line of the converter's output that says what went wrong"""
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith('❌'):
+            return line.lstrip('❌ ')
+    # An uncaught exception: its message ends the traceback
+    return lines[-1] if lines else "no output"
+
+def model_version(source):
+    """
+    Content hash identifying a model
+
+    Args:
+        source (str): Pickle file or artifact directory the model was read from
+
+    Returns:
+        str: First 12 hex digits of the SHA-256 of the model files
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+    else:
+        paths = [source]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+def validate_model(data):
+    """
+    Check that a freshly loaded model can serve, warming it up on the way
+
+    Raises:
+        ValueError: If the model is unusable
+    """
+    threshold = data.get('threshold')
+    if threshold is None or not 0 <= float(threshold) <= 1:
+        raise ValueError(f"Invalid threshold: {threshold!r}")
+
+    if data.get('compiled') is None and not ('vectorizer' in data and 'model' in data):
+        raise ValueError("Model data has neither a compiled scorer nor a vectorizer and model")
+
+    probabilities = np.asarray(score_texts(data, WARMUP_TEXTS), dtype=np.float64)
+    if probabilities.shape != (len(WARMUP_TEXTS),) or not np.all((probabilities >= 0) & (probabilities <= 1)):
+        raise ValueError(f"Warm-up inference returned invalid probabilities: {probabilities}")
+
+def find_model_path(model_path=None):
+    """Return the first existing model location, or None"""
+    # Model is saved in the organized structure
+    # Try multiple possible paths
+    possible_paths = [model_path] if model_path else [
+        'hate_speech_model.pkl',  # Model copied to root of /app
+        'models/saved/hate_speech_model.pkl',  # From root directory
+        '../models/saved/hate_speech_model.pkl',  # From api directory
+        '../../models/saved/hate_speech_model.pkl'  # From api/src directory
+    ]
+
+    for path in possible_paths:
+        if os.path.exists(path) or is_artifact(artifact_dir_for(path)):
+            return path
+    return None
+
+def prepare_model(model_path, isolated=False):
+    """
+    Read, version and validate a model without making it active
+
+    Args:
+        isolated: Unpickle in a child process, see read_model
+
+    Returns:
+        dict: Model data ready to be passed to swap_model
+    """
+    start = time.perf_counter()
+    data, source = read_model(model_path, isolated)
+    data['model_path'] = model_path
+    data['model_source'] = source
+    data['model_version'] = model_version(source)
+    data['cascade'] = build_cascade(data)
+    validate_model(data)
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+    return data
+
+def swap_model(data):
+    """
+    Make a prepared model the active one
+
+    Requests read model_data once and keep using that model, so in-flight
+    requests finish on the old model. The cache is cleared after the swap;
+    predict_hate_speech_batch reads the cache generation before model_data,
+    so results from the old model can never be stored under the new one.
+    """
     global model_data
+    model_data = data
+    prediction_cache.clear()
+
+def reload_model():
+    """
+    Load the active model path again and swap it in
+
+    Raises:
+        Exception: If the new model fails to load or validate; the current
+        model stays active
+    """
+    current = model_data
+    model_path = current['model_path'] if current else find_model_path()
+    if model_path is None:
+        raise FileNotFoundError("Model not found in any expected location")
+
+    # Requests keep being served while the new model loads, so keep the
+    # unpickling off this process's GIL
+    data = prepare_model(model_path, isolated=True)
+    if inference_pool is not None and inference_pool.started:
+        # Workers load the new model before any request is routed to them
+        inference_pool.start(model_path)
+    swap_model(data)
+    old_version = current.get('model_version') if current else None
+    logger.info(f"Model reloaded from {data['model_source']}: {old_version} -> {data['model_version']}")
+
+# Hot reload on model file changes (an interval of 0 disables the watcher)
+model_reloader = ModelReloader(
+    reload_model,
+    lambda: model_data['model_path'] if model_data else find_model_path(),
+    interval=float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+)
+
+def load_model(model_path=None):
+    """Load the trained model and vectorizer"""
     try:
-        # Model is saved in the organized structure
-        # Try multiple possible paths
-        possible_paths = [
-            'hate_speech_model.pkl',  # Model copied to root of /app
-            'models/saved/hate_speech_model.pkl',  # From root directory
-            '../models/saved/hate_speech_model.pkl',  # From api directory
-            '../../models/saved/hate_speech_model.pkl'  # From api/src directory
-        ]
-        
-        model_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                model_path = path
-                break
-        
+        model_path = find_model_path(model_path)
         if model_path is None:
             raise FileNotFoundError("Model not found in any expected location")
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
-        logger.info(f"Model loaded successfully from {model_path}")
+
+        swap_model(prepare_model(model_path))
+        logger.info(f"Model loaded successfully from {model_data['model_source']}")
+        logger.info(f"Version: {model_data['model_version']}")
         logger.info(f"Model: {model_data.get('model_name', 'Unknown')}")
         logger.info(f"Performance: F1={model_data.get('performance', {}).get('f1', 'Unknown'):.4f}")
         return True
@@ -53,6 +447,275 @@ def load_model():
         logger.error("Expected model path: ../models/saved/hate_speech_model.pkl")
         return False
 
+def validate_text(text):
+    """
+    Validate a single input text
+
+    Args:
+        text: Candidate input text
+
+    Returns:
+        str: Error message, or None if the text is valid
+    """
+    if not isinstance(text, str):
+        return "Text must be a string"
+
+    if len(text.strip()) == 0:
+        return "Text cannot be empty"
+
+    if len(text) > MAX_TEXT_LENGTH:
+        return f"Text too long (max {MAX_TEXT_LENGTH} characters)"
+
+    return None
+
+def build_prediction(text, probability, threshold, version=None):
+    """Build the response dict for a single scored text"""
+    prediction = 1 if probability >= threshold else 0
+
+    return {
+        'text': text,
+        'prediction': int(prediction),
+        'probability': float(probability),
+        'label': 'Foul' if prediction == 1 else 'Proper',
+        'confidence': float(probability if prediction == 1 else 1 - probability),
+        'threshold': float(threshold),
+        'model_version': version
+    }
+
+def normalize_texts(data, texts):
+    """
+    Apply the vectorizer normalization to texts
+
+    Two texts with the same normalized form produce the same features, so
+    the result is used as the prediction cache key.
+
+    Returns:
+        list: One hashable key per text
+    """
+    compiled = data.get('compiled')
+    if compiled is not None:
+        start = metrics.start()
+        keys = [tuple(compiled.analyze(text)) for text in texts]
+        metrics.stop(STAGE_SECONDS, start, 'tokenize')
+        return keys
+
+    analyzer = data['vectorizer'].build_analyzer()
+    return [tuple(analyzer(text)) for text in texts]
+
+def score_texts(data, texts):
+    """
+    Compute Foul probabilities for texts with the given model
+
+    Args:
+        data (dict): Loaded model data
+        texts (list): Input texts
+
+    Returns:
+        np.ndarray: Probability of the Foul class for every text
+    """
+    start = metrics.start()
+    scorer = compiled_scorer(data)
+    if scorer is not None:
+        # Score token counts directly with the folded weights
+        probabilities = scorer.predict_proba(texts)
+        metrics.stop(STAGE_SECONDS, start, 'score')
+        return probabilities
+
+    # Transform all texts into a single sparse matrix
+    texts_vectorized = data['vectorizer'].transform(texts)
+    metrics.stop(STAGE_SECONDS, start, 'transform')
+
+    # Get probabilities for the whole batch
+    start = metrics.start()
+    probabilities = data['model'].predict_proba(texts_vectorized)[:, 1]
+    metrics.stop(STAGE_SECONDS, start, 'predict_proba')
+    return probabilities
+
+def score_texts_cached(data, texts, generation):
+    """
+    Compute Foul probabilities, answering repeated texts from the prediction cache
+
+    generation must be read from the cache before data was read from
+    model_data (see swap_model).
+    """
+    if not prediction_cache.enabled:
+        return score_texts(data, texts)
+
+    keys = normalize_texts(data, texts)
+    probabilities = [prediction_cache.get(key) for key in keys]
+
+    # Texts that normalize to the same key are scored once
+    missing = {}
+    for i, probability in enumerate(probabilities):
+        if probability is None:
+            missing.setdefault(keys[i], []).append(i)
+    if missing:
+        first = [indices[0] for indices in missing.values()]
+        scorer = compiled_scorer(data)
+        if scorer is not None:
+            # Cache keys are the analyzed tokens, so reuse them for scoring
+            start = metrics.start()
+            scored = scorer.predict_proba_tokens(list(missing))
+            metrics.stop(STAGE_SECONDS, start, 'score')
+        else:
+            scored = score_texts(data, [texts[i] for i in first])
+
+        for (key, indices), probability in zip(missing.items(), scored):
+            probability = float(probability)
+            for i in indices:
+                probabilities[i] = probability
+            prediction_cache.put(key, probability, generation)
+
+    return probabilities
+
+def dedupe_texts(texts, mode=None):
+    """
+    Collapse repeated texts of a batch
+
+    Args:
+        texts (list): Input texts
+        mode (str): "exact", "retweet" or "off" (default: BATCH_DEDUP)
+
+    Returns:
+        tuple: (unique texts to score, index into them for every input text)
+    """
+    mode = mode or BATCH_DEDUP
+    if mode == 'off':
+        return texts, list(range(len(texts)))
+
+    unique = {}
+    positions = []
+    for text in texts:
+        if mode == 'retweet':
+            text = RETWEET_PREFIX.sub('', text) or text
+        positions.append(unique.setdefault(text, len(unique)))
+    return list(unique), positions
+
+def predict_batch_with_stats(texts):
+    """
+    Predict hate speech for a list of texts, scoring repeated texts once
+
+    Args:
+        texts (list): Input texts to classify
+
+    Returns:
+        tuple: (prediction results in the same order as texts,
+        {'unique': texts scored, 'deduplicated': texts answered from a copy})
+    """
+    # Snapshot the model once so a concurrent hot reload cannot mix models
+    generation = prediction_cache.generation
+    data = model_data
+    if data is None:
+        return [{"error": "Model not loaded"} for _ in texts], {'unique': 0, 'deduplicated': 0}
+
+    if metrics.enabled:
+        BATCH_SIZE.observe(len(texts))
+
+    unique, positions = dedupe_texts(texts)
+    stats = {'unique': len(unique), 'deduplicated': len(texts) - len(unique)}
+    if stats['deduplicated']:
+        DEDUPLICATED.inc(amount=stats['deduplicated'])
+
+    try:
+        if inference_pool is not None and inference_pool.started:
+            start = metrics.start()
+            shards = inference_pool.score(unique)
+            metrics.stop(STAGE_SECONDS, start, 'pool')
+
+            scored = [
+                (probability, threshold, version)
+                for probabilities, threshold, version in shards
+                for probability in probabilities
+            ]
+        else:
+            threshold = data['threshold']
+            version = data.get('model_version')
+            scored = [
+                (probability, threshold, version)
+                for probability in score_texts_cached(data, unique, generation)
+            ]
+
+        if shadow.enabled:
+            shadow.submit(unique, [probability for probability, _, _ in scored], scored[0][1])
+
+        return [
+            build_prediction(text, *scored[position])
+            for text, position in zip(texts, positions)
+        ], stats
+    except Exception as e:
+        logger.error(f"Error in prediction: {str(e)}")
+        ERROR_COUNT.inc(f"prediction_{type(e).__name__}")
+        return [{"error": f"Prediction failed: {str(e)}"} for _ in texts], stats
+
+def predict_hate_speech_batch(texts):
+    """
+    Predict hate speech for a list of texts in one vectorized call
+
+    Args:
+        texts (list): Input texts to classify
+
+    Returns:
+        list: Prediction results, in the same order as texts
+    """
+    return predict_batch_with_stats(texts)[0]
+
+# Micro-batching of concurrent /predict calls (a window of 0 disables it)
+coalescer = RequestCoalescer(
+    predict_hate_speech_batch,
+    window_ms=float(os.environ.get("COALESCE_WINDOW_MS", 0)),
+    max_batch_size=int(os.environ.get("COALESCE_MAX_BATCH", 32)),
+    max_wait_ms=float(os.environ.get("COALESCE_MAX_WAIT_MS", 1000))
+)
+
+def score_shadow(data, texts):
+    """Score texts with a shadow model, outside the request stage metrics"""
+    scorer = compiled_scorer(data)
+    if scorer is not None:
+        return scorer.predict_proba(texts)
+    return data['model'].predict_proba(data['vectorizer'].transform(texts))[:, 1]
+
+# Shadow models, scored on a background thread next to the requests
+shadow = ShadowScorer(
+    score_shadow,
+    sample_rate=float(os.environ.get("SHADOW_SAMPLE_RATE", 0.01)),
+    max_queue=int(os.environ.get("SHADOW_MAX_QUEUE", 64))
+)
+
+def load_shadow_models(spec=None):
+    """
+    Load the shadow models of a "name=path,name=path" spec (default: SHADOW_MODELS)
+
+    A model that fails to load is logged and skipped; the API serves
+    without it.
+
+    Returns:
+        int: Number of shadow models registered
+    """
+    spec = SHADOW_MODELS if spec is None else spec
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, path = entry.rpartition('=')
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        try:
+            load_shadow_model(name, path)
+        except Exception as e:
+            logger.error(f"Error loading shadow model {name} from {path}: {str(e)}")
+    return len(shadow.models)
+
+def load_shadow_model(name, path):
+    """
+    Load, validate and register one shadow model
+
+    Raises:
+        FileNotFoundError: If there is no model at path
+    """
+    model_path = find_model_path(path)
+    if model_path is None:
+        raise FileNotFoundError(f"Model not found: {path}")
+    data = prepare_model(model_path)
+    shadow.add(name, data)
+    logger.info(f"Shadow model {name} loaded from {data['model_source']} (version {data['model_version']})")
+    return data
+
 def predict_hate_speech(text):
     """
     Predict if text contains hate speech or offensive language
@@ -63,38 +726,329 @@ def predict_hate_speech(text):
     Returns:
         dict: Prediction results
     """
-    if model_data is None:
-        return {"error": "Model not loaded"}
-    
+    return predict_hate_speech_batch([text])[0]
+
+def timed_jsonify(payload):
+    """jsonify a response, recording the serialization stage"""
+    start = metrics.start()
+    response = jsonify(payload)
+    metrics.stop(STAGE_SECONDS, start, 'serialize')
+    return response
+
+# Transport-independent handlers shared by the Flask routes and asgi.py.
+# Each takes the parsed JSON body and returns (response dict, HTTP status).
+
+def parse_json_body(raw):
+    """
+    Parse a request body the same way for every transport
+
+    The body is parsed as JSON whatever its Content-Type; an empty body
+    gives None, which the handlers answer with "No JSON data provided".
+
+    Returns:
+        tuple: (parsed body, None), or (None, (error dict, 400)) if the body is not valid JSON
+    """
+    if not raw:
+        return None, None
     try:
-        # Transform text
-        text_vectorized = model_data['vectorizer'].transform([text])
-        
-        # Get probability
-        probability = model_data['model'].predict_proba(text_vectorized)[0, 1]
-        
-        # Apply threshold
-        prediction = 1 if probability >= model_data['threshold'] else 0
-        
-        return {
-            'text': text,
-            'prediction': int(prediction),
-            'probability': float(probability),
-            'label': 'Foul' if prediction == 1 else 'Proper',
-            'confidence': float(probability if prediction == 1 else 1 - probability),
-            'threshold': float(model_data['threshold'])
-        }
-    except Exception as e:
-        logger.error(f"Error in prediction: {str(e)}")
-        return {"error": f"Prediction failed: {str(e)}"}
+        return json.loads(raw), None
+    except ValueError:
+        return None, ({"error": "Invalid JSON"}, 400)
+
+def handle_health():
+    """Health check response"""
+    return {
+        'status': 'healthy',
+        'model_loaded': model_data is not None
+    }, 200
+
+def handle_model_info():
+    """Model information and performance metrics"""
+    data = model_data
+    if data is None:
+        return {"error": "Model not loaded"}, 500
+
+    return {
+        'model_type': 'Logistic Regression',
+        'vectorizer_type': 'TF-IDF with bigrams',
+        'threshold': float(data['threshold']),
+        'performance': data['performance'],
+        'model_version': data.get('model_version'),
+        'model_source': data.get('model_source'),
+        'precision': data['compiled'].precision if data.get('compiled') else 'float64',
+        'cascade': data['cascade'].stats() if data.get('cascade') else None,
+        'shadow': shadow.stats()['models'] if shadow.models else None,
+        'reload': model_reloader.stats()
+    }, 200
+
+def handle_predict(data, deadline=None):
+    """
+    Validate and score a /predict request body
+
+    Args:
+        data: Parsed JSON body, None if there was none
+        deadline: Epoch seconds after which the text is not scored
+
+    Returns:
+        tuple: (response dict, HTTP status)
+    """
+    if not data:
+        return {"error": "No JSON data provided"}, 400
+
+    if 'text' not in data:
+        return {"error": "Missing 'text' field"}, 400
+
+    text = data['text']
+
+    error = validate_text(text)
+    if error:
+        return {"error": error}, 400
+
+    if deadline_expired(deadline):
+        return deadline_exceeded()
+
+    # Make prediction, sharing a micro-batch with concurrent requests if enabled
+    if coalescer.enabled:
+        result = coalescer.submit(text, deadline=deadline)
+    else:
+        result = predict_hate_speech(text)
+
+    if 'error' in result:
+        return result, 500
+
+    return result, 200
+
+def handle_batch_predict(data, deadline=None):
+    """
+    Validate and score a /batch_predict request body
+
+    Args:
+        data: Parsed JSON body, None if there was none
+        deadline: Epoch seconds after which the texts are not scored
+
+    Returns:
+        tuple: (response dict, HTTP status)
+    """
+    if not data:
+        return {"error": "No JSON data provided"}, 400
+
+    if 'texts' not in data:
+        return {"error": "Missing 'texts' field"}, 400
+
+    texts = data['texts']
+
+    if not isinstance(texts, list):
+        return {"error": "Texts must be a list"}, 400
+
+    if len(texts) == 0:
+        return {"error": "Texts list cannot be empty"}, 400
+
+    if len(texts) > MAX_BATCH_SIZE:
+        return {"error": f"Too many texts (max {MAX_BATCH_SIZE})"}, 400
+
+    # Validate everything up front, then score the valid texts in one call
+    results = [None] * len(texts)
+    valid_indices = []
+    for i, text in enumerate(texts):
+        error = validate_text(text)
+        if error:
+            results[i] = {"error": error}
+            ERROR_COUNT.inc("invalid_item")
+        else:
+            valid_indices.append(i)
+
+    if deadline_expired(deadline):
+        return deadline_exceeded()
+
+    stats = {'unique': 0, 'deduplicated': 0}
+    if valid_indices:
+        predictions, stats = predict_batch_with_stats([texts[i] for i in valid_indices])
+        for i, result in zip(valid_indices, predictions):
+            results[i] = result
+
+    return {"results": results, "stats": dict(stats, total=len(texts), invalid=len(texts) - len(valid_indices))}, 200
+
+def deadline_exceeded():
+    DEADLINE_EXCEEDED.inc()
+    return {"error": "Deadline exceeded before scoring"}, 504
+
+def request_weight(data):
+    """Texts a request body asks to score, its weight for admission control"""
+    if isinstance(data, dict) and isinstance(data.get('texts'), list):
+        return max(1, min(len(data['texts']), MAX_BATCH_SIZE))
+    return 1
+
+def handle_admitted(handler, data, deadline=None):
+    """
+    Run a scoring handler under admission control
+
+    Requests whose deadline has already passed are dropped, and requests
+    that would overload the process get a 503 with the number of seconds
+    to wait in "retry_after" (sent as the Retry-After header).
+
+    Returns:
+        tuple: (response dict, HTTP status)
+    """
+    if deadline_expired(deadline):
+        return deadline_exceeded()
+
+    weight = request_weight(data)
+    if not admission.try_acquire(weight):
+        return {"error": "Server overloaded, retry later", "retry_after": admission.retry_after()}, 503
+
+    try:
+        return handler(data, deadline)
+    finally:
+        admission.release(weight)
+
+def parse_stream_line(line):
+    """
+    Extract the text and optional id from one NDJSON input line
+
+    A line is either a JSON string or an object with a "text" field.
+
+    Returns:
+        tuple: (text, id, error message or None)
+    """
+    if line is None:
+        return None, None, f"Line too long (max {MAX_STREAM_LINE_BYTES} bytes)"
+
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return None, None, "Invalid JSON"
+
+    if isinstance(item, str):
+        return item, None, validate_text(item)
+
+    if not isinstance(item, dict):
+        return None, None, "Each line must be a JSON object or string"
+
+    if 'text' not in item:
+        return None, item.get('id'), "Missing 'text' field"
+
+    return item['text'], item.get('id'), validate_text(item['text'])
+
+def score_stream_batch(lines):
+    """
+    Score a micro-batch of NDJSON input lines
+
+    Args:
+        lines (list): (line number, line bytes) pairs from LineSplitter;
+            blank lines are skipped
+
+    Returns:
+        bytes: One NDJSON result per non-blank line, in input order. Each
+        result carries the input line number and the id, if one was sent
+    """
+    results = []
+    valid = []
+    for number, line in lines:
+        if line is not None and not line.strip():
+            continue
+
+        text, item_id, error = parse_stream_line(line)
+        result = {'line': number}
+        if item_id is not None:
+            result['id'] = item_id
+        if error:
+            result['error'] = error
+            ERROR_COUNT.inc("invalid_item")
+        else:
+            valid.append((result, text))
+        results.append(result)
+
+    if valid:
+        predictions = predict_hate_speech_batch([text for _, text in valid])
+        for (result, _), prediction in zip(valid, predictions):
+            result.update(prediction)
+
+    return ''.join(json.dumps(result, separators=(',', ':')) + '\n' for result in results).encode('utf-8')
+
+def respond(body, status, fmt=response_format.JSON):
+    """Turn a handler result into a Flask response in the negotiated format"""
+    headers = {'Retry-After': str(body['retry_after'])} if status == 503 and 'retry_after' in body else None
+    if fmt != response_format.JSON:
+        start = metrics.start()
+        payload, content_type = response_format.encode(body, fmt)
+        metrics.stop(STAGE_SECONDS, start, 'serialize')
+        return Response(payload, status=status, headers=headers, content_type=content_type)
+    if status == 200:
+        return timed_jsonify(body)
+    return jsonify(body), status, headers
+
+def current_deadline():
+    """Deadline of the current request from its X-Request-Timeout-Ms and X-Request-Start headers"""
+    return request_deadline(request.headers.get('X-Request-Timeout-Ms'),
+                            request.headers.get('X-Request-Start'), REQUEST_TIMEOUT_MS)
+
+def request_format():
+    """Response format asked for by the current request, None if unsupported"""
+    return response_format.negotiate(request.args.get('format'), request.headers.get('Accept'))
+
+def unsupported_format():
+    return jsonify({"error": f"Unsupported format (available: {', '.join(response_format.available_formats())})"}), 406
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram"""
+    g.request_start = metrics.start()
+
+@app.before_request
+def start_profile():
+    """Profile this request if the profiler selects it"""
+    if profiler.enabled and request.endpoint in PROFILED_ENDPOINTS:
+        g.profile = profiler.begin(request.headers.get('X-Profile-Token'))
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request latency, count and HTTP errors"""
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+        REQUEST_COUNT.inc((endpoint, response.status_code))
+        if response.status_code >= 400:
+            ERROR_COUNT.inc(f"http_{response.status_code}")
+
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.end(profile, endpoint=request.endpoint, status=response.status_code,
+                     content_length=request.content_length)
+    return response
+
+@app.teardown_request
+def stop_profile(error):
+    """Finish a profile left running by a request that failed before after_request"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.end(profile, endpoint=request.endpoint, status=500, content_length=request.content_length)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics endpoint"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    return respond(*handle_health())
+
+@app.route('/livez', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving HTTP"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    """Readiness probe: a model is loaded and this worker has warmed up"""
+    ready = model_data is not None and worker_ready.is_set()
     return jsonify({
-        'status': 'healthy',
-        'model_loaded': model_data is not None
-    })
+        'status': 'ready' if ready else 'not ready',
+        'model_loaded': model_data is not None,
+        'warmed_up': worker_ready.is_set(),
+        'model_version': model_data.get('model_version') if model_data else None
+    }), 200 if ready else 503
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -105,51 +1059,37 @@ def predict():
     {
         "text": "Your text here"
     }
+
+    ?format=compact|msgpack (or the Accept header) selects a compact response
     """
+    fmt = request_format()
+    if fmt is None:
+        return unsupported_format()
+
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({"error": "No JSON data provided"}), 400
-        
-        if 'text' not in data:
-            return jsonify({"error": "Missing 'text' field"}), 400
-        
-        text = data['text']
-        
-        if not isinstance(text, str):
-            return jsonify({"error": "Text must be a string"}), 400
-        
-        if len(text.strip()) == 0:
-            return jsonify({"error": "Text cannot be empty"}), 400
-        
-        if len(text) > 1000:  # Reasonable limit
-            return jsonify({"error": "Text too long (max 1000 characters)"}), 400
-        
-        # Make prediction
-        result = predict_hate_speech(text)
-        
-        if 'error' in result:
-            return jsonify(result), 500
+        deadline = current_deadline()
+        start = metrics.start()
+        data, error = parse_json_body(request.get_data())
+        metrics.stop(STAGE_SECONDS, start, 'parse')
+        if error:
+            return respond(*error, fmt)
         
-        return jsonify(result)
+        return respond(*handle_admitted(handle_predict, data, deadline), fmt)
         
     except Exception as e:
         logger.error(f"Error in predict endpoint: {str(e)}")
+        ERROR_COUNT.inc(type(e).__name__)
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 @app.route('/model_info', methods=['GET'])
 def model_info():
     """Get model information and performance metrics"""
-    if model_data is None:
-        return jsonify({"error": "Model not loaded"}), 500
-    
-    return jsonify({
-        'model_type': 'Logistic Regression',
-        'vectorizer_type': 'TF-IDF with bigrams',
-        'threshold': float(model_data['threshold']),
-        'performance': model_data['performance']
-    })
+    return respond(*handle_model_info())
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Get prediction cache hit/miss/eviction counters"""
+    return jsonify(prediction_cache.stats())
 
 @app.route('/batch_predict', methods=['POST'])
 def batch_predict():
@@ -160,50 +1100,272 @@ def batch_predict():
     {
         "texts": ["text1", "text2", ...]
     }
+
+    ?format=compact|msgpack (or the Accept header) selects columnar results
     """
+    fmt = request_format()
+    if fmt is None:
+        return unsupported_format()
+
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({"error": "No JSON data provided"}), 400
-        
-        if 'texts' not in data:
-            return jsonify({"error": "Missing 'texts' field"}), 400
+        deadline = current_deadline()
+        start = metrics.start()
+        data, error = parse_json_body(request.get_data())
+        metrics.stop(STAGE_SECONDS, start, 'parse')
+        if error:
+            return respond(*error, fmt)
         
-        texts = data['texts']
-        
-        if not isinstance(texts, list):
-            return jsonify({"error": "Texts must be a list"}), 400
-        
-        if len(texts) == 0:
-            return jsonify({"error": "Texts list cannot be empty"}), 400
-        
-        if len(texts) > 100:  # Reasonable limit
-            return jsonify({"error": "Too many texts (max 100)"}), 400
-        
-        results = []
-        for text in texts:
-            if not isinstance(text, str):
-                results.append({"error": "Text must be a string"})
-                continue
-            
-            if len(text.strip()) == 0:
-                results.append({"error": "Text cannot be empty"})
-                continue
-            
-            if len(text) > 1000:
-                results.append({"error": "Text too long"})
-                continue
-            
-            result = predict_hate_speech(text)
-            results.append(result)
-        
-        return jsonify({"results": results})
+        return respond(*handle_admitted(handle_batch_predict, data, deadline), fmt)
         
     except Exception as e:
         logger.error(f"Error in batch_predict endpoint: {str(e)}")
+        ERROR_COUNT.inc(type(e).__name__)
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+@app.route('/stream_predict', methods=['POST'])
+def stream_predict():
+    """
+    Score a newline-delimited JSON stream of tweets
+
+    Each input line is a JSON string or {"text": ..., "id": ...}. Lines are
+    scored in micro-batches of STREAM_BATCH_SIZE and the NDJSON results are
+    streamed back as each batch completes. Only one batch is held in memory,
+    and the body is not read further while the client is not reading the
+    results, so memory stays bounded for streams of any length.
+    """
+    if sync_worker:
+        return jsonify({"error": "Streaming is not supported on sync workers, "
+                                 "run gunicorn with the gthread worker or use the ASGI mode"}), 501
+
+    stream = request.stream
+    splitter = LineSplitter(MAX_STREAM_LINE_BYTES)
+
+    def generate():
+        batch = []
+        for chunk in iter(lambda: stream.readline(STREAM_READ_BYTES), b''):
+            batch.extend(splitter.feed(chunk))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield score_stream_batch(batch)
+                batch = []
+
+        batch.extend(splitter.close())
+        if batch:
+            yield score_stream_batch(batch)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def require_admin():
+    """Return an error response unless the request carries the admin token"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled"}), 403
+
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Invalid admin token"}), 401
+
+    return None
+
+@app.route('/admin/coalescer', methods=['GET', 'PUT'])
+def admin_coalescer():
+    """
+    Get or update the /predict micro-batching settings
+
+    Expected JSON payload for PUT:
+    {
+        "window_ms": 2.0,
+        "max_batch_size": 32
+    }
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    if request.method == 'PUT':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        try:
+            coalescer.configure(
+                window_ms=data.get('window_ms'),
+                max_batch_size=data.get('max_batch_size')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        logger.info(f"Coalescer settings updated: {coalescer.stats()}")
+
+    return jsonify(coalescer.stats())
+
+@app.route('/admin/admission', methods=['GET', 'PUT'])
+def admin_admission():
+    """
+    Get or update the admission control settings
+
+    Expected JSON payload for PUT:
+    {
+        "max_inflight": 1000,
+        "latency_budget_ms": 2000
+    }
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    if request.method == 'PUT':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        try:
+            admission.configure(
+                max_inflight=data.get('max_inflight'),
+                latency_budget_ms=data.get('latency_budget_ms')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        logger.info(f"Admission settings updated: {admission.stats()}")
+
+    return jsonify(admission.stats())
+
+@app.route('/admin/profiles', methods=['GET', 'PUT', 'DELETE'])
+def admin_profiles():
+    """
+    List the kept request profiles (slowest first), update the profiler
+    settings with PUT, or drop the kept profiles with DELETE
+
+    Expected JSON payload for PUT:
+    {
+        "sample_rate": 0.01,
+        "keep": 20
+    }
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    if request.method == 'DELETE':
+        profiler.clear()
+    elif request.method == 'PUT':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        try:
+            profiler.configure(sample_rate=data.get('sample_rate'), keep=data.get('keep'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        logger.info(f"Profiler settings updated: {profiler.stats()}")
+
+    return jsonify({**profiler.stats(), 'profiles': profiler.profiles()})
+
+@app.route('/admin/profiles/<int:profile_id>', methods=['GET'])
+def admin_profile(profile_id):
+    """
+    Download one kept profile
+
+    ?format=text (default) is a pstats report by cumulative time, pstats
+    a file for pstats.Stats / snakeviz, collapsed folded stacks for
+    flamegraph.pl or speedscope
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    fmt = request.args.get('format', 'text')
+    if fmt not in PROFILE_FORMATS:
+        return jsonify({"error": f"Unknown format (available: {', '.join(PROFILE_FORMATS)})"}), 400
+
+    stats = profiler.stats_of(profile_id)
+    if stats is None:
+        return jsonify({"error": "Profile not found"}), 404
+
+    payload, content_type = render_profile(stats, fmt)
+    response = Response(payload, content_type=content_type)
+    if fmt == 'pstats':
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{profile_id}.prof'
+    return response
+
+@app.route('/admin/shadow', methods=['GET', 'PUT', 'POST'])
+def admin_shadow():
+    """
+    Get the shadow comparison, update the sampling rate (PUT) or load a
+    shadow model (POST)
+
+    Expected JSON payload for PUT:
+    {
+        "sample_rate": 0.1
+    }
+
+    Expected JSON payload for POST:
+    {
+        "name": "candidate",
+        "path": "/models/candidate.pkl"
+    }
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    if request.method in ('PUT', 'POST'):
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        if request.method == 'PUT':
+            try:
+                shadow.configure(sample_rate=data.get('sample_rate'))
+            except (TypeError, ValueError) as e:
+                return jsonify({"error": str(e)}), 400
+            logger.info(f"Shadow sample rate set to {shadow.sample_rate}")
+        else:
+            if not isinstance(data.get('name'), str) or not isinstance(data.get('path'), str):
+                return jsonify({"error": "'name' and 'path' are required"}), 400
+            try:
+                load_shadow_model(data['name'], data['path'])
+            except FileNotFoundError as e:
+                return jsonify({"error": str(e)}), 404
+            except Exception as e:
+                return jsonify({"error": f"Failed to load shadow model: {str(e)}"}), 422
+            return jsonify(shadow.stats()), 201
+
+    return jsonify(shadow.stats())
+
+@app.route('/admin/shadow/<name>', methods=['DELETE'])
+def admin_shadow_remove(name):
+    """Stop shadow scoring with a model and drop its comparison"""
+    error = require_admin()
+    if error:
+        return error
+
+    if not shadow.remove(name):
+        return jsonify({"error": f"No shadow model named {name}"}), 404
+    logger.info(f"Shadow model {name} removed")
+    return jsonify(shadow.stats())
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """
+    Get the hot reload status, or POST to reload the model in the background
+
+    The new model is loaded, validated and warmed up before it is swapped
+    in; requests keep being served by the current model meanwhile.
+    """
+    error = require_admin()
+    if error:
+        return error
+
+    if request.method == 'POST':
+        if not model_reloader.trigger():
+            return jsonify({"error": "A reload is already in progress", **model_reloader.stats()}), 409
+        return jsonify(model_reloader.stats()), 202
+
+    return jsonify({
+        'model_version': model_data.get('model_version') if model_data else None,
+        **model_reloader.stats()
+    })
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -217,30 +1379,100 @@ def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 # Serve React frontend
+def serve_asset(asset):
+    """Send an indexed static file, or a 304 when the client has it"""
+    if asset is None:
+        return not_found(None)
+    status, headers, body = asset.respond(request.headers.get('If-None-Match'),
+                                          request.headers.get('Accept-Encoding'))
+    return Response(body, status=status, headers=headers)
+
 @app.route('/')
 def serve_frontend():
     """Serve the React frontend"""
-    return send_from_directory('static', 'index.html')
+    return serve_asset(static_assets.index)
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files"""
-    return send_from_directory('static', filename)
+    # The React build keeps its bundles under static/ inside the build root
+    return serve_asset(static_assets.get(f'static/{filename}') or static_assets.get(filename))
 
 @app.route('/manifest.json')
 def serve_manifest():
     """Serve manifest.json"""
-    return send_from_directory('static', 'manifest.json')
+    return serve_asset(static_assets.get('manifest.json'))
 
 # Catch-all route for React Router (client-side routing)
 @app.route('/<path:path>')
 def serve_react_app(path):
     """Serve React app for any other routes (client-side routing)"""
-    return send_from_directory('static', 'index.html')
+    # Top-level build files (favicon.ico, robots.txt, ...) are served as
+    # themselves, every other path gets the prebuilt index.html
+    return serve_asset(static_assets.get(path) or static_assets.index)
+
+def warm_up(rounds=3):
+    """
+    Send a few requests through the full request path in-process
+
+    Runs routing, JSON parsing, scoring and serialization once before real
+    traffic arrives, so the first request is served at steady-state latency.
+    Metrics are paused so warm-up requests are not counted.
+    """
+    client = app.test_client()
+    metrics_enabled = metrics.enabled
+    metrics.enabled = False
+    try:
+        for _ in range(rounds):
+            for text in WARMUP_TEXTS:
+                response = client.post('/predict', json={"text": text})
+                if response.status_code != 200:
+                    raise RuntimeError(f"Warm-up request failed: {response.get_json()}")
+            client.post('/batch_predict', json={"texts": WARMUP_TEXTS})
+    finally:
+        metrics.enabled = metrics_enabled
+
+def create_app(model_path=None):
+    """
+    Application factory for WSGI servers
+
+    Loads the model unless one is already loaded. Under gunicorn with
+    preload_app this runs once in the master, and the forked workers share
+    the model pages.
+
+    Raises:
+        RuntimeError: If no model can be loaded
+    """
+    if model_data is None and not load_model(model_path):
+        raise RuntimeError("Failed to load model")
+    if not static_assets.loaded:
+        static_assets.load()
+    if SHADOW_MODELS and not shadow.models:
+        load_shadow_models()
+    return app
+
+def init_worker():
+    """
+    Per-process startup, run in every worker after the fork
+
+    Starts the inference pool and background threads, which do not survive
+    a fork, and warms up the request path, then marks the worker ready for
+    /readyz.
+    """
+    if inference_pool is not None and not inference_pool.started:
+        inference_pool.start(model_data['model_path'])
+    model_reloader.start()
+    metrics.start_flusher()
+    warm_up()
+    worker_ready.set()
+    logger.info(f"Worker {os.getpid()} ready (model {model_data['model_version']})")
 
 if __name__ == '__main__':
     # Load model on startup
     if load_model():
+        static_assets.load()
+        load_shadow_models()
+        init_worker()
         logger.info("Starting Hate Speech Detection API...")
         port = int(os.environ.get("PORT", 8080))
         app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+ASGI Entry Point
+Serves the /predict, /batch_predict, /stream_predict, /model_info and /health
+contract from an event loop, with inference on a bounded thread pool
+
+Usage (from api/):
+    uvicorn asgi:application --app-dir src --port 8080
+    python src/asgi.py
+
+The event loop only reads request bodies and writes responses, so slow
+clients and idle keep-alive connections cost a socket each rather than a
+worker. JSON parsing, scoring and serialization run on ASGI_THREADS
+executor threads; at most ASGI_MAX_PENDING requests wait for a thread.
+With admission control enabled further ones are shed with a 503 right
+away, otherwise they wait on the event loop before being queued.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import admission
+import app
+import response_format
+from ndjson_stream import LineSplitter
+
+logger = logging.getLogger(__name__)
+
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", os.cpu_count() or 1))
+ASGI_MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", 1024))
+
+# Largest accepted request body: a full batch of maximum length texts
+MAX_BODY_BYTES = int(os.environ.get("ASGI_MAX_BODY_BYTES", 1 << 20))
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+JSON_CONTENT_TYPE = b'application/json'
+
+# path -> (endpoint name used in metrics, method, handler, takes a body)
+ROUTES = {
+    '/predict': ('predict', 'POST', app.handle_predict, True),
+    '/batch_predict': ('batch_predict', 'POST', app.handle_batch_predict, True),
+    '/model_info': ('model_info', 'GET', app.handle_model_info, False),
+    '/health': ('health_check', 'GET', app.handle_health, False),
+    '/livez': ('liveness', 'GET', lambda: ({'status': 'alive'}, 200), False),
+}
+
+executor = None
+pending = None
+
+def encode(body):
+    """Serialize a response body the way Flask's jsonify does"""
+    return (json.dumps(body, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+def retry_after_headers(body, status):
+    if status == 503 and 'retry_after' in body:
+        return [(b'retry-after', str(body['retry_after']).encode())]
+    return []
+
+def run_handler(handler, raw_body, fmt=response_format.JSON, deadline=None, profile_token=None):
+    """
+    Parse, handle and serialize one request on an executor thread
+
+    The handler runs under the admission control of app.handle_admitted,
+    and is profiled when app.profiler selects the request.
+
+    Returns:
+        tuple: (HTTP status, encoded body, content type, extra headers)
+    """
+    profile = app.profiler.begin(profile_token) if app.profiler.enabled else None
+    # 500 unless handle_body returns, so a failure still releases the profiler
+    status = 500
+    try:
+        result = handle_body(handler, raw_body, fmt, deadline)
+        status = result[0]
+        return result
+    finally:
+        if profile is not None:
+            app.profiler.end(profile, endpoint=handler.__name__.replace('handle_', ''),
+                             status=status, content_length=len(raw_body))
+
+def handle_body(handler, raw_body, fmt, deadline):
+    """Parse, handle and serialize a request body, turning exceptions into 500s"""
+    try:
+        start = app.metrics.start()
+        data, error = app.parse_json_body(raw_body)
+        app.metrics.stop(app.STAGE_SECONDS, start, 'parse')
+
+        body, status = error or app.handle_admitted(handler, data, deadline)
+        start = app.metrics.start()
+        if fmt == response_format.JSON:
+            payload, content_type = encode(body), JSON_CONTENT_TYPE
+        else:
+            payload, content_type = response_format.encode(body, fmt)
+            content_type = content_type.encode()
+        app.metrics.stop(app.STAGE_SECONDS, start, 'serialize')
+        return status, payload, content_type, retry_after_headers(body, status)
+    except Exception as e:
+        logger.error(f"Error in ASGI handler: {str(e)}")
+        app.ERROR_COUNT.inc(type(e).__name__)
+        return 500, encode({"error": f"Internal server error: {str(e)}"}), JSON_CONTENT_TYPE, []
+
+async def read_body(receive):
+    """Read the full request body, or None if it exceeds MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+def header(scope, name):
+    """Value of a request header (name in lowercase bytes), None if absent"""
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+def request_format(scope):
+    """Response format asked for by a request, None if unsupported"""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('format', [None])[0]
+    return response_format.negotiate(query, header(scope, b'accept'))
+
+def request_deadline(scope):
+    """Deadline of a request from its X-Request-Timeout-Ms and X-Request-Start headers"""
+    return admission.request_deadline(header(scope, b'x-request-timeout-ms'),
+                                      header(scope, b'x-request-start'), app.REQUEST_TIMEOUT_MS)
+
+async def send_response(send, status, payload, content_type=JSON_CONTENT_TYPE, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(payload)).encode()),
+            *CORS_HEADERS,
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def stream_predict(receive, send):
+    """
+    NDJSON streaming endpoint, see app.stream_predict
+
+    The complete lines of every received chunk are scored right away (in
+    micro-batches of at most STREAM_BATCH_SIZE), so results follow the
+    input closely even when the client sends slowly. The next chunk is only
+    read once the results have been sent, which keeps memory bounded.
+    """
+    loop = asyncio.get_running_loop()
+    splitter = LineSplitter(app.MAX_STREAM_LINE_BYTES)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson'), *CORS_HEADERS]
+    })
+
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+        more_body = message.get('more_body', False)
+        lines = splitter.feed(message.get('body', b''))
+        if not more_body:
+            lines.extend(splitter.close())
+
+        for i in range(0, len(lines), app.STREAM_BATCH_SIZE):
+            async with pending:
+                payload = await loop.run_in_executor(
+                    executor, app.score_stream_batch, lines[i:i + app.STREAM_BATCH_SIZE]
+                )
+            if payload:
+                await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+
+        if not more_body:
+            break
+
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+async def handle_request(scope, receive, send):
+    """Route one HTTP request and record it in the request metrics"""
+    start = app.metrics.start()
+    path = scope['path']
+    method = scope['method']
+    endpoint = 'unknown'
+
+    if path == '/metrics' and method == 'GET':
+        endpoint = 'prometheus_metrics'
+        status = 200
+        await send_response(send, status, app.metrics.render().encode('utf-8'),
+                            content_type=b'text/plain; version=0.0.4; charset=utf-8')
+    elif path == '/readyz' and method == 'GET':
+        endpoint = 'readiness'
+        ready = app.model_data is not None and app.worker_ready.is_set()
+        status = 200 if ready else 503
+        await send_response(send, status, encode({
+            'status': 'ready' if ready else 'not ready',
+            'model_loaded': app.model_data is not None,
+            'warmed_up': app.worker_ready.is_set(),
+            'model_version': app.model_data.get('model_version') if app.model_data else None
+        }))
+    elif path == '/stream_predict' and method == 'POST':
+        endpoint = 'stream_predict'
+        status = 200
+        await stream_predict(receive, send)
+    elif path not in ROUTES:
+        status = 404
+        await send_response(send, status, encode({"error": "Endpoint not found"}))
+    elif method == 'OPTIONS':
+        # CORS preflight
+        status = 204
+        await send_response(send, status, b'', headers=[
+            (b'access-control-allow-methods', ROUTES[path][1].encode() + b', OPTIONS'),
+            (b'access-control-allow-headers', b'Content-Type')
+        ])
+    elif method != ROUTES[path][1]:
+        status = 405
+        await send_response(send, status, encode({"error": "Method not allowed"}))
+    else:
+        endpoint, _, handler, takes_body = ROUTES[path]
+        fmt = request_format(scope) if takes_body else response_format.JSON
+        if fmt is None:
+            status = 406
+            await send_response(send, status, encode({
+                "error": f"Unsupported format (available: {', '.join(response_format.available_formats())})"
+            }))
+        elif takes_body:
+            deadline = request_deadline(scope)
+            raw_body = await read_body(receive)
+            if raw_body is None:
+                status = 413
+                await send_response(send, status, encode({"error": "Request body too large"}))
+            elif pending.locked() and app.admission.enabled:
+                # Every thread is busy and the queue in front of them is full
+                status = 503
+                body = {"error": "Server overloaded, retry later", "retry_after": app.admission.retry_after()}
+                await send_response(send, status, encode(body), headers=retry_after_headers(body, status))
+            else:
+                async with pending:
+                    status, payload, content_type, headers = await asyncio.get_running_loop().run_in_executor(
+                        executor, run_handler, handler, raw_body, fmt, deadline, header(scope, b'x-profile-token')
+                    )
+                await send_response(send, status, payload, content_type, headers)
+        else:
+            body, status = handler()
+            await send_response(send, status, encode(body))
+
+    if start is not None:
+        app.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+        app.REQUEST_COUNT.inc((endpoint, status))
+        if status >= 400:
+            app.ERROR_COUNT.inc(f"http_{status}")
+
+async def startup():
+    """Load the model, start the executor and warm up before serving"""
+    global executor, pending
+    executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='inference')
+    pending = asyncio.Semaphore(ASGI_THREADS + ASGI_MAX_PENDING)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, app.create_app)
+    await loop.run_in_executor(executor, app.init_worker)
+
+async def shutdown():
+    executor.shutdown(wait=True)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await startup()
+            except Exception as e:
+                logger.error(f"ASGI startup failed: {str(e)}")
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http':
+        await handle_request(scope, receive, send)
+
+def main():
+    import uvicorn
+
+    uvicorn.run(
+        application,
+        host='0.0.0.0',
+        port=int(os.environ.get("PORT", 8080)),
+        timeout_keep_alive=int(os.environ.get("ASGI_KEEPALIVE", 75)),
+        backlog=int(os.environ.get("ASGI_BACKLOG", 4096)),
+        log_level='info'
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Offline Bulk Scoring
+Scores large CSV/JSONL tweet archives in chunks across worker processes
+
+Usage:
+    python src/bulk_score.py ../data/dataset.csv scores.csv
+    python src/bulk_score.py archive.jsonl scores.jsonl --workers 8 --resume
+
+Input is read as a stream, so memory stays bounded by
+chunk_size * workers regardless of file size. Results are written in input
+order and flushed after every chunk, so an interrupted run can continue
+with --resume (or from an explicit --start-row).
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import app
+
+OUTPUT_FIELDS = ['row', 'prediction', 'probability', 'label', 'error']
+
+class RowError(str):
+    """Error message read in place of the text of an unparseable input row"""
+
+def skip_rows(rows, count, is_row=bool):
+    """Advance rows past count items for which is_row is true"""
+    skipped = 0
+    while skipped < count:
+        row = next(rows, None)
+        if row is None:
+            return
+        if is_row(row):
+            skipped += 1
+
+def read_texts(path, text_column='tweet', start_row=0):
+    """
+    Stream texts from a CSV or JSONL file
+
+    Args:
+        start_row: Input rows to skip first; they are not parsed
+
+    Yields:
+        The text of every input row (None when the column is missing, a
+        RowError when a JSONL line is not a JSON object)
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            lines = iter(f)
+            skip_rows(lines, start_row, str.strip)
+            for line in lines:
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        yield RowError(f"Invalid JSON: {str(e)}")
+                        continue
+                    if not isinstance(row, dict):
+                        yield RowError("Invalid JSON: expected an object")
+                        continue
+                    yield row.get(text_column, row.get('text'))
+        else:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                return
+            # The underlying reader splits rows without building dicts; blank
+            # rows are not counted, as DictReader skips them too
+            skip_rows(reader.reader, start_row)
+            for row in reader:
+                yield row.get(text_column)
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def init_worker(model_path):
+    """Load the model once in every worker process"""
+    if not app.load_model(model_path):
+        raise RuntimeError("Failed to load model in worker")
+
+def score_chunk(start_row, texts):
+    """
+    Score one chunk of texts in a worker process
+
+    Returns:
+        list: Output records for the chunk, in input order
+    """
+    records = [{'row': start_row + i} for i in range(len(texts))]
+    valid_indices = []
+    for i, text in enumerate(texts):
+        error = text if isinstance(text, RowError) else app.validate_text(text)
+        if error:
+            records[i]['error'] = error
+        else:
+            valid_indices.append(i)
+
+    if valid_indices:
+        data = app.model_data
+        probabilities = app.score_texts(data, [texts[i] for i in valid_indices])
+        for i, probability in zip(valid_indices, probabilities):
+            prediction = 1 if probability >= data['threshold'] else 0
+            records[i].update({
+                'prediction': prediction,
+                'probability': float(probability),
+                'label': 'Foul' if prediction == 1 else 'Proper'
+            })
+    return records
+
+def count_completed_rows(output_path, block_size=1 << 20):
+    """
+    Count the result rows already written to an output file
+
+    A trailing partial line left by a crash is truncated away first. The
+    file is read in blocks, so memory stays flat for outputs of any size.
+    """
+    if not os.path.exists(output_path):
+        return 0
+
+    with open(output_path, 'rb+') as f:
+        # Search backwards from the end for the last complete line
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+
+        f.seek(0)
+        lines = sum(block.count(b'\n') for block in iter(lambda: f.read(block_size), b''))
+
+    if output_path.endswith(('.jsonl', '.ndjson')):
+        return lines
+    return max(lines - 1, 0)  # CSV header
+
+class ResultWriter:
+    """Stream output records as CSV or JSONL"""
+
+    def __init__(self, path, append):
+        self.jsonl = path.endswith(('.jsonl', '.ndjson'))
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, records):
+        if self.jsonl:
+            self.file.writelines(json.dumps(record) + '\n' for record in records)
+        else:
+            self.writer.writerows(records)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def run(input_path, output_path, model_path=None, text_column='tweet', chunk_size=10000,
+        workers=None, start_row=0, resume=False, progress=sys.stderr):
+    """
+    Score an input file and stream the results to output_path
+
+    Returns:
+        int: Number of rows scored in this run
+    """
+    if resume:
+        start_row = count_completed_rows(output_path)
+        print(f"Resuming at row {start_row}", file=progress)
+
+    workers = workers or os.cpu_count() or 1
+    texts = read_texts(input_path, text_column, start_row)
+    writer = ResultWriter(output_path, append=resume or start_row > 0)
+
+    scored = 0
+    started = time.perf_counter()
+    pending = deque()
+    row = start_row
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(model_path,)) as executor:
+            chunks = chunked(texts, chunk_size)
+            while True:
+                # Keep a bounded number of chunks in flight so memory stays flat
+                while len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(executor.submit(score_chunk, row, chunk))
+                    row += len(chunk)
+
+                if not pending:
+                    break
+
+                records = pending.popleft().result()
+                writer.write(records)
+                scored += len(records)
+
+                elapsed = time.perf_counter() - started
+                print(f"Scored {start_row + scored} rows "
+                      f"({scored / elapsed:,.0f} rows/sec)", file=progress)
+    finally:
+        writer.close()
+
+    return scored
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL tweet archive offline")
+    parser.add_argument('input', help="Input .csv or .jsonl file")
+    parser.add_argument('output', help="Output .csv or .jsonl file")
+    parser.add_argument('--model', help="Model path (default: same lookup as the API)")
+    parser.add_argument('--text-column', default='tweet', help="Column/key holding the text (JSONL falls back to 'text')")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--start-row', type=int, default=0, help="Skip this many input rows and append to output")
+    parser.add_argument('--resume', action='store_true', help="Continue after the rows already in the output file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    scored = run(args.input, args.output, model_path=args.model, text_column=args.text_column,
+                 chunk_size=args.chunk_size, workers=args.workers,
+                 start_row=args.start_row, resume=args.resume)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {scored} rows in {elapsed:.1f}s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
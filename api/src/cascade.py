@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Confidence Cascade
+Cheap bounded pre-screen in front of the full TF-IDF n-gram scorer
+
+Usage (report on how the cascade would behave):
+    python src/cascade.py ../data/dataset.csv
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+import numpy as np
+
+# Bounds must clear the threshold by this much to absorb rounding differences
+# between the stage-one sums and the full scorer
+BOUND_MARGIN = 1e-9
+
+class CascadeScorer:
+    """
+    Two-stage scorer wrapping a CompiledLinearModel
+
+    The decision score is z = intercept + coef . x / ||x|| over the TF-IDF
+    vector x. Stage one computes x exactly for the unigrams and for the few
+    longer n-grams with a non-zero coefficient, which are found through an
+    index keyed on their first token instead of joining every token pair.
+    Every other n-gram occurrence has a zero coefficient, so it can only
+    grow ||x||, by at most its idf. That bounds z between the stage-one
+    score with and without that extra norm. When both ends fall on the same
+    side of the logit of the threshold, the decision is proven and stage
+    two (the full scorer) is skipped.
+
+    Early exits return the stage-one probability, clamped so it stays on
+    the proven side of the threshold; predictions and labels always match
+    the full model.
+    """
+
+    def __init__(self, compiled, threshold):
+        min_n, max_n = compiled.ngram_range
+        if min_n != 1:
+            raise ValueError("The cascade needs unigram features")
+
+        self.compiled = compiled
+        self.threshold = float(threshold)
+        if 0 < self.threshold < 1:
+            self.logit_threshold = math.log(self.threshold / (1 - self.threshold))
+        else:
+            # Nothing can be proven against a threshold of 0 or 1
+            self.logit_threshold = None
+
+        # First token -> [(remaining tokens, feature index)] for n-grams
+        # with a non-zero weight; the rest only count towards the norm
+        weights = compiled.feature_weights()
+        idf = compiled.feature_idf()
+        self.ngram_index = {}
+        self.max_silent_idf = 0.0
+        for term, index in compiled.vocabulary.items():
+            tokens = term.split(' ')
+            if len(tokens) == 1:
+                continue
+            if weights[index] != 0:
+                self.ngram_index.setdefault(tokens[0], []).append((tuple(tokens[1:]), index))
+            else:
+                self.max_silent_idf = max(self.max_silent_idf, float(idf[index]))
+
+        self.early = 0
+        self.full = 0
+
+    def stage_one(self, tokens):
+        """
+        Count the features stage one scores exactly
+
+        Returns:
+            tuple: (feature index -> count, number of other n-gram occurrences)
+        """
+        vocabulary = self.compiled.vocabulary
+        ngram_index = self.ngram_index
+        counts = {}
+        for token in tokens:
+            index = vocabulary.get(token)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+
+        max_n = self.compiled.ngram_range[1]
+        silent = sum(max(0, len(tokens) - n + 1) for n in range(2, max_n + 1))
+        for i, token in enumerate(tokens):
+            candidates = ngram_index.get(token)
+            if candidates:
+                for rest, index in candidates:
+                    if tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+                        counts[index] = counts.get(index, 0) + 1
+                        silent -= 1
+        return counts, silent
+
+    def bounds_tokens(self, token_lists):
+        """
+        Bound the decision score of already analyzed texts
+
+        Returns:
+            tuple: (stage-one estimate, lower bound, upper bound) arrays
+        """
+        compiled = self.compiled
+        n_texts = len(token_lists)
+        rows = []
+        indices = []
+        counts = []
+        silent = np.zeros(n_texts)
+        for row, tokens in enumerate(token_lists):
+            features, silent[row] = self.stage_one(tokens)
+            rows.extend([row] * len(features))
+            indices.extend(features.keys())
+            counts.extend(features.values())
+
+        rows = np.asarray(rows, dtype=np.intp)
+        indices = np.asarray(indices, dtype=np.intp)
+        tf = np.asarray(counts, dtype=np.float64)
+        if compiled.binary:
+            tf = np.ones_like(tf)
+        elif compiled.sublinear_tf:
+            tf = np.log(tf) + 1
+
+        dot = np.bincount(rows, weights=tf * compiled.feature_weights(indices), minlength=n_texts)
+        if compiled.norm != 'l2':
+            score = dot + compiled.intercept
+            return score, score, score
+
+        values = tf * compiled.feature_idf(indices)
+        norm = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_texts))
+        # ||x|| of the silent n-grams is at most the sum of their idf weights
+        extra = silent * self.max_silent_idf
+        widest = np.sqrt(norm * norm + extra * extra)
+
+        # With no scored feature the numerator is 0 and z is the intercept
+        near = dot / np.where(norm > 0, norm, 1.0)
+        far = dot / np.where(widest > 0, widest, 1.0)
+        intercept = compiled.intercept
+        return near + intercept, np.minimum(near, far) + intercept, np.maximum(near, far) + intercept
+
+    def predict_proba_tokens(self, token_lists):
+        """Compute positive-class probabilities, running stage two only where needed"""
+        if self.logit_threshold is None:
+            self.full += len(token_lists)
+            return self.compiled.predict_proba_tokens(token_lists)
+
+        estimate, lower, upper = self.bounds_tokens(token_lists)
+        foul = lower >= self.logit_threshold + BOUND_MARGIN
+        proper = upper < self.logit_threshold - BOUND_MARGIN
+
+        probabilities = 1.0 / (1.0 + np.exp(-estimate))
+        probabilities[foul] = np.maximum(probabilities[foul], self.threshold)
+        probabilities[proper] = np.minimum(probabilities[proper], np.nextafter(self.threshold, 0))
+
+        undecided = np.flatnonzero(~(foul | proper))
+        if len(undecided):
+            probabilities[undecided] = self.compiled.predict_proba_tokens([token_lists[i] for i in undecided])
+
+        self.full += len(undecided)
+        self.early += len(token_lists) - len(undecided)
+        return probabilities
+
+    def predict_proba(self, texts):
+        """
+        Compute positive-class probabilities for a list of texts
+
+        Returns:
+            np.ndarray: Probability of the Foul class for every text
+        """
+        return self.predict_proba_tokens([self.compiled.analyze(text) for text in texts])
+
+    def stats(self):
+        scored = self.early + self.full
+        return {
+            'early_exits': self.early,
+            'full_scores': self.full,
+            'early_exit_rate': self.early / scored if scored else 0.0
+        }
+
+def report(compiled, threshold, texts):
+    """
+    Compare the cascade with the full scorer on a list of texts
+
+    Returns:
+        dict: Early-exit rates, decision disagreements and timings
+    """
+    cascade = CascadeScorer(compiled, threshold)
+    token_lists = [compiled.analyze(text) for text in texts]
+
+    start = time.perf_counter()
+    full = compiled.predict_proba_tokens(token_lists)
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cascaded = cascade.predict_proba_tokens(token_lists)
+    cascade_time = time.perf_counter() - start
+
+    _, lower, upper = cascade.bounds_tokens(token_lists)
+    if cascade.logit_threshold is None:
+        foul = proper = np.zeros(len(texts), dtype=bool)
+    else:
+        foul = lower >= cascade.logit_threshold + BOUND_MARGIN
+        proper = upper < cascade.logit_threshold - BOUND_MARGIN
+    early_foul = int(foul.sum())
+    early_proper = int(proper.sum())
+    error = np.abs(cascaded - full)[foul | proper]
+    return {
+        'texts': len(texts),
+        'early_foul': early_foul,
+        'early_proper': early_proper,
+        'early_exit_rate': (early_foul + early_proper) / len(texts),
+        'decision_mismatches': int(np.sum((cascaded >= threshold) != (full >= threshold))),
+        'early_probability_error_mean': float(error.mean()) if len(error) else 0.0,
+        'early_probability_error_max': float(error.max()) if len(error) else 0.0,
+        'full_us_per_text': full_time / len(texts) * 1e6,
+        'cascade_us_per_text': cascade_time / len(texts) * 1e6,
+        'nonzero_ngrams': sum(len(entries) for entries in cascade.ngram_index.values())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Report early exits and disagreements of the confidence cascade")
+    parser.add_argument('dataset', nargs='?', default='../data/dataset.csv', help="CSV file with texts")
+    parser.add_argument('--text-column', default='tweet', help="Column holding the text")
+    parser.add_argument('--model', help="Model path (default: same lookup as the API)")
+    args = parser.parse_args()
+
+    import app
+    if not app.load_model(args.model):
+        print("❌ Failed to load model")
+        sys.exit(1)
+
+    compiled = app.model_data.get('compiled')
+    if compiled is None:
+        print("❌ The cascade needs the compiled scorer (COMPILED_INFERENCE=1)")
+        sys.exit(1)
+
+    with open(args.dataset, newline='', encoding='utf-8') as f:
+        texts = [row[args.text_column] for row in csv.DictReader(f)]
+
+    threshold = app.model_data['threshold']
+    result = report(compiled, threshold, texts)
+
+    print(f"📊 {result['texts']} texts, threshold {threshold}, "
+          f"{result['nonzero_ngrams']} n-grams with non-zero coefficients")
+    print(f"   ⚡ Early exits: {result['early_exit_rate']:.2%} "
+          f"({result['early_foul']} Foul, {result['early_proper']} Proper)")
+    print(f"   🎯 Decisions differing from the full model: {result['decision_mismatches']}")
+    print(f"   📏 Early-exit probability error: mean {result['early_probability_error_mean']:.4f}, "
+          f"max {result['early_probability_error_max']:.4f}")
+    print(f"   ⏱️  Scoring: full {result['full_us_per_text']:.1f} us/text, "
+          f"cascade {result['cascade_us_per_text']:.1f} us/text (after tokenization)")
+
+    if result['decision_mismatches'] == 0:
+        print("✅ The cascade agrees with the full model on every text")
+    else:
+        print("⚠️  The cascade disagrees with the full model, do not enable it")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
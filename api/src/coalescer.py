@@ -0,0 +1,155 @@
+"""
+Request Coalescer
+Gathers concurrent single-text predictions into micro-batches
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+class RequestCoalescer:
+    """
+    Micro-batching front end for a batch scoring function
+
+    Callers block in submit() while a dispatcher thread collects the texts
+    that arrive within window_ms of the first one (or until max_batch_size
+    texts are waiting), scores them with a single score_fn call and hands
+    every result back to the thread that submitted it.
+
+    A caller waits at most the window plus max_wait_ms (less if its
+    deadline is closer) for its batch; after that, or if the dispatcher
+    thread has died, it withdraws its text and scores it inline instead.
+
+    A window of 0 disables coalescing. Both settings can be changed at
+    runtime with configure().
+    """
+
+    def __init__(self, score_fn, window_ms=0.0, max_batch_size=32, max_wait_ms=1000.0):
+        self.score_fn = score_fn
+        self.window_ms = float(window_ms)
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait_ms = float(max_wait_ms)
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.timeouts = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.window_ms > 0
+
+    def configure(self, window_ms=None, max_batch_size=None):
+        """Update the coalescing window and/or maximum batch size"""
+        if window_ms is not None:
+            if window_ms < 0:
+                raise ValueError("window_ms must be >= 0")
+            self.window_ms = float(window_ms)
+
+        if max_batch_size is not None:
+            if max_batch_size < 1:
+                raise ValueError("max_batch_size must be >= 1")
+            self.max_batch_size = int(max_batch_size)
+
+    def wait_timeout(self, deadline=None):
+        """Seconds a caller waits for its batch, given its epoch-seconds deadline"""
+        wait = self.max_wait_ms / 1000.0
+        if deadline is not None:
+            wait = max(0.0, min(wait, deadline - time.time()))
+        return self.window_ms / 1000.0 + wait
+
+    def submit(self, text, timeout=None, deadline=None):
+        """
+        Score a single text as part of the next micro-batch
+
+        Args:
+            text: Text to score
+            timeout: Seconds to wait for the batch (default: wait_timeout(deadline))
+            deadline: Epoch seconds after which the result is useless
+
+        Returns:
+            The score_fn result for this text
+        """
+        self._ensure_dispatcher()
+        future = Future()
+        self._queue.put((text, future))
+        try:
+            return future.result(self.wait_timeout(deadline) if timeout is None else timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            # The dispatcher is stuck or gone. A cancelled text is skipped if
+            # it ever gets to it; one already in a batch may just have finished
+            if not future.cancel() and future.done():
+                return future.result()
+            return self.score_fn([text])[0]
+
+    def stats(self):
+        """Return coalescer settings and batching counters"""
+        return {
+            'enabled': self.enabled,
+            'window_ms': self.window_ms,
+            'max_batch_size': self.max_batch_size,
+            'batches': self.batches,
+            'items': self.items,
+            'largest_batch': self.largest_batch,
+            'timeouts': self.timeouts,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0
+        }
+
+    def _ensure_dispatcher(self):
+        """Start the dispatcher thread, again after a fork if needed"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="request-coalescer", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000.0
+        max_batch_size = self.max_batch_size
+
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop the texts whose callers gave up waiting and scored them inline
+            batch = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+
+            try:
+                results = self.score_fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
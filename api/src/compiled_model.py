@@ -0,0 +1,252 @@
+"""
+Compiled Linear Scoring Engine
+Folds a fitted TF-IDF vectorizer and linear classifier into flat weight arrays
+so that inference skips building scipy sparse matrices
+"""
+
+import re
+import numpy as np
+
+# Storage types of the per-feature weight arrays
+PRECISIONS = {'float64': np.float64, 'float32': np.float32, 'int8': np.int8}
+
+def quantize(values, precision):
+    """
+    Convert float weights to a storage precision
+
+    int8 uses one symmetric scale per array, chosen so the largest
+    magnitude maps to 127; zeros stay exactly zero.
+
+    Returns:
+        tuple: (stored array, scale to multiply stored values by)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if precision == 'int8':
+        peak = float(np.abs(values).max()) if values.size else 0.0
+        scale = peak / 127 if peak > 0 else 1.0
+        return np.round(values / scale).astype(np.int8), scale
+    return values.astype(PRECISIONS[precision]), 1.0
+
+class CompiledLinearModel:
+    """
+    TF-IDF + logistic regression scorer working directly on token counts
+
+    The IDF weights and the classifier coefficients are folded into one
+    per-feature weight array. For every text the token counts are gathered
+    once and used for both the dot product and the L2 norm, which gives the
+    same probabilities as vectorizer.transform + model.predict_proba.
+
+    With a reduced precision ('float32' or 'int8', see astype) the idf,
+    coef and weight arrays are stored in that type; int8 values are
+    multiplied back by idf_scale, coef_scale and weight_scale.
+    """
+
+    def __init__(self, vocabulary, idf, coef, intercept, token_pattern=r"(?u)\b\w\w+\b",
+                 lowercase=True, stop_words=None, ngram_range=(1, 1), norm='l2',
+                 sublinear_tf=False, binary=False, weights=None, precision='float64',
+                 idf_scale=1.0, weight_scale=1.0, coef_scale=1.0):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        if weights is None and precision == 'int8':
+            raise ValueError("int8 models need precomputed weights")
+
+        dtype = PRECISIONS[precision]
+        self.vocabulary = vocabulary
+        self.precision = precision
+        self.idf = np.asarray(idf, dtype=dtype)
+        # coef is not used for scoring; float coefficients of an int8 model
+        # (from astype, or an artifact that stored them as float32) are
+        # quantized like the other arrays
+        if precision == 'int8' and np.asarray(coef).dtype != np.int8:
+            coef, coef_scale = quantize(np.ravel(coef), precision)
+        self.coef = np.asarray(coef, dtype=dtype).ravel()
+        self.coef_scale = float(coef_scale)
+        self.intercept = float(intercept)
+        self.weights = self.idf * self.coef if weights is None else np.asarray(weights, dtype=dtype)
+        self.idf_scale = float(idf_scale)
+        self.weight_scale = float(weight_scale)
+        self._tf_dtype = np.float64 if precision == 'float64' else np.float32
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self.stop_words = frozenset(stop_words) if stop_words else None
+        self.ngram_range = tuple(ngram_range)
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+        if self.norm not in ('l2', None):
+            raise ValueError(f"Unsupported norm: {self.norm}")
+
+        self._token_re = re.compile(token_pattern)
+        if self._token_re.groups > 1:
+            raise ValueError("token_pattern should have at most one capturing group")
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model):
+        """
+        Compile a fitted TfidfVectorizer and binary LogisticRegression
+
+        Raises:
+            ValueError: If the vectorizer or model cannot be compiled
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        if not isinstance(vectorizer, TfidfVectorizer):
+            raise ValueError(f"Unsupported vectorizer: {type(vectorizer).__name__}")
+
+        if not isinstance(model, LogisticRegression) or model.coef_.shape[0] != 1:
+            raise ValueError(f"Unsupported model: {type(model).__name__}")
+
+        if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None \
+                or vectorizer.preprocessor is not None or vectorizer.strip_accents is not None:
+            raise ValueError("Only the default word analyzer can be compiled")
+
+        if vectorizer.use_idf:
+            idf = vectorizer.idf_
+        else:
+            idf = np.ones(len(vectorizer.vocabulary_))
+
+        return cls(
+            vocabulary={term: int(index) for term, index in vectorizer.vocabulary_.items()},
+            idf=idf,
+            coef=model.coef_[0],
+            intercept=model.intercept_[0],
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+            stop_words=vectorizer.get_stop_words(),
+            ngram_range=vectorizer.ngram_range,
+            norm=vectorizer.norm,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary
+        )
+
+    def astype(self, precision):
+        """
+        Copy of this model with its weights stored in another precision
+
+        Returns:
+            CompiledLinearModel: Model sharing the vocabulary and settings
+        """
+        idf, idf_scale = quantize(self.feature_idf(), precision)
+        weights, weight_scale = quantize(self.feature_weights(), precision)
+        return CompiledLinearModel(
+            vocabulary=self.vocabulary,
+            idf=idf,
+            coef=self.feature_coef(),
+            intercept=self.intercept,
+            token_pattern=self.token_pattern,
+            lowercase=self.lowercase,
+            stop_words=self.stop_words,
+            ngram_range=self.ngram_range,
+            norm=self.norm,
+            sublinear_tf=self.sublinear_tf,
+            binary=self.binary,
+            weights=weights,
+            precision=precision,
+            idf_scale=idf_scale,
+            weight_scale=weight_scale
+        )
+
+    def feature_idf(self, indices=slice(None)):
+        """IDF weights of the given features as float64"""
+        return self.idf[indices] * self.idf_scale
+
+    def feature_coef(self, indices=slice(None)):
+        """Classifier coefficients of the given features as float64"""
+        return self.coef[indices] * self.coef_scale
+
+    def feature_weights(self, indices=slice(None)):
+        """Folded idf * coef weights of the given features as float64"""
+        return self.weights[indices] * self.weight_scale
+
+    def analyze(self, text):
+        """
+        Tokenize text with the vectorizer rules
+
+        Returns:
+            list: Unigram tokens after lowercasing and stop word removal
+        """
+        if self.lowercase:
+            text = text.lower()
+
+        tokens = self._token_re.findall(text)
+        if self.stop_words is not None:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        return tokens
+
+    def count_features(self, tokens):
+        """
+        Count in-vocabulary n-grams for a list of unigram tokens
+
+        Returns:
+            dict: Feature index -> term count
+        """
+        vocabulary = self.vocabulary
+        min_n, max_n = self.ngram_range
+        counts = {}
+
+        for n in range(min_n, min(max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                index = vocabulary.get(tokens[i] if n == 1 else " ".join(tokens[i:i + n]))
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def decision_function_tokens(self, token_lists):
+        """
+        Compute raw decision scores for already analyzed texts
+
+        Args:
+            token_lists (list): Unigram token lists, one per text
+
+        Returns:
+            np.ndarray: Decision scores
+        """
+        rows = []
+        indices = []
+        counts = []
+        for row, tokens in enumerate(token_lists):
+            features = self.count_features(tokens)
+            rows.extend([row] * len(features))
+            indices.extend(features.keys())
+            counts.extend(features.values())
+
+        n_texts = len(token_lists)
+        if not indices:
+            return np.full(n_texts, self.intercept)
+
+        rows = np.asarray(rows, dtype=np.intp)
+        indices = np.asarray(indices, dtype=np.intp)
+        tf = np.asarray(counts, dtype=self._tf_dtype)
+        if self.binary:
+            tf = np.ones_like(tf)
+        elif self.sublinear_tf:
+            tf = np.log(tf) + 1
+
+        # One gather feeds both the dot product and the L2 norm; the
+        # products are computed in the storage precision, sums in float64
+        dot = np.bincount(rows, weights=tf * self.weights[indices], minlength=n_texts) * self.weight_scale
+        if self.norm == 'l2':
+            values = tf * self.idf[indices]
+            norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_texts)) * self.idf_scale
+            norms[norms == 0] = 1.0
+            dot /= norms
+        return dot + self.intercept
+
+    def decision_function(self, texts):
+        """Compute raw decision scores for a list of texts"""
+        return self.decision_function_tokens([self.analyze(text) for text in texts])
+
+    def predict_proba_tokens(self, token_lists):
+        """Compute positive-class probabilities for already analyzed texts"""
+        return 1.0 / (1.0 + np.exp(-self.decision_function_tokens(token_lists)))
+
+    def predict_proba(self, texts):
+        """
+        Compute positive-class probabilities for a list of texts
+
+        Returns:
+            np.ndarray: Probability of the Foul class for every text
+        """
+        return self.predict_proba_tokens([self.analyze(text) for text in texts])
@@ -0,0 +1,137 @@
+"""
+Inference Pool
+Process-pool backend that scores texts outside the serving process's GIL
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+def init_worker(model_path):
+    """Load the model once in every pool process"""
+    import app
+    if not app.load_model(model_path):
+        raise RuntimeError(f"Failed to load model from {model_path} in inference worker")
+
+def ping():
+    return os.getpid()
+
+def score_shard(texts):
+    """
+    Score one shard of texts in a pool process
+
+    Tokenization, scoring and the prediction cache all live in the worker.
+
+    Returns:
+        tuple: (probabilities, threshold, model version) of the worker's model
+    """
+    import app
+    generation = app.prediction_cache.generation
+    data = app.model_data
+    probabilities = app.score_texts_cached(data, texts, generation)
+    return [float(p) for p in probabilities], float(data['threshold']), data.get('model_version')
+
+def split_shards(texts, workers, shard_size):
+    """Split texts into at most workers contiguous, even shards of at least shard_size texts"""
+    count = max(1, min(workers, len(texts) // shard_size))
+    base, extra = divmod(len(texts), count)
+    shards = []
+    start = 0
+    for i in range(count):
+        end = start + base + (1 if i < extra else 0)
+        shards.append(texts[start:end])
+        start = end
+    return shards
+
+class InferencePool:
+    """
+    Pool of worker processes that each hold a copy of the model
+
+    Batches are split into shards of at least shard_size texts, one per
+    worker, so a large batch uses every core while a single text costs one
+    round trip. Processes are spawned rather than forked, which is safe
+    from a threaded server; loading from the memory-mappable artifact keeps
+    their start-up fast and shares the weight pages between them.
+
+    start() builds and warms a complete new pool before replacing the
+    current one, so hot reloads never serve from a half-started pool.
+    """
+
+    def __init__(self, workers=None, shard_size=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(1, int(shard_size))
+        self.model_path = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        """Whether this process has a running pool (pools do not survive a fork)"""
+        return self._executor is not None and self._pid == os.getpid()
+
+    def start(self, model_path):
+        """
+        Start a pool serving model_path and swap it in for the current one
+
+        Raises:
+            Exception: If the workers fail to load the model; the current
+            pool, if any, keeps serving
+        """
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(model_path,)
+        )
+        try:
+            # Concurrent pings make the executor spawn every worker now
+            for future in [executor.submit(ping) for _ in range(self.workers)]:
+                future.result()
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        with self._lock:
+            old = self._executor if self._pid == os.getpid() else None
+            self._executor = executor
+            self._pid = os.getpid()
+            self.model_path = model_path
+
+        if old is not None:
+            # Queued and running shards finish on the old workers
+            old.shutdown(wait=False)
+
+    def score(self, texts):
+        """
+        Score texts across the pool
+
+        Returns:
+            list: (probabilities, threshold, model version) per shard, in order
+        """
+        executor = self._executor
+        try:
+            futures = [executor.submit(score_shard, shard)
+                       for shard in split_shards(texts, self.workers, self.shard_size)]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died; replace the pool so later requests recover
+            if self._executor is executor:
+                self.start(self.model_path)
+            raise
+
+    def stop(self):
+        with self._lock:
+            if self.started:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            'started': self.started,
+            'workers': self.workers,
+            'shard_size': self.shard_size,
+            'model_path': self.model_path
+        }
@@ -0,0 +1,277 @@
+"""
+Metrics
+Low-overhead counters, gauges and histograms rendered in the Prometheus
+text exposition format
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+# Default latency buckets in seconds, from 10us to 2.5s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+def _format_labels(labelname, value, extra=None):
+    labels = []
+    if isinstance(labelname, tuple):
+        labels.extend(f'{name}="{item}"' for name, item in zip(labelname, value))
+    elif labelname is not None:
+        labels.append(f'{labelname}="{value}"')
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """
+    Monotonic counter with an optional label
+
+    labelname may be a tuple, in which case label values are tuples too.
+    A callback returning {label: value} can expose counters kept elsewhere.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelname=None, callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.labelname = labelname
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label=None, amount=1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def value(self, label=None):
+        return self._values.get(label, 0)
+
+    def samples(self):
+        if self.callback:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for label, value in sorted(values.items(), key=lambda item: str(item[0])):
+            yield f"{self.name}{_format_labels(self.labelname, label)} {_format_value(value)}"
+
+class Gauge:
+    """Gauge whose value is set directly or read from a callback at render time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def samples(self):
+        value = self.callback() if self.callback else self._value
+        yield f"{self.name} {_format_value(value)}"
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with an optional label
+
+    observe() finds the bucket with a binary search and bumps one counter
+    under a lock, so every observation costs the same; the counts are only
+    made cumulative when rendering.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelname=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelname = labelname
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label=None):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                # Per-bucket counts plus the +Inf bucket, then sum
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, label=None):
+        series = self._series.get(label)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            snapshot = {label: (list(counts), total) for label, (counts, total) in self._series.items()}
+
+        for label, (counts, total) in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                labels = _format_labels(self.labelname, label, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelname, label)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+def _parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def _with_worker(key, pid):
+    """Add a worker="pid" label to a sample name"""
+    if key.endswith('}'):
+        return f'{key[:-1]},worker="{pid}"}}'
+    return f'{key}{{worker="{pid}"}}'
+
+def mark_process_dead(directory, pid):
+    """
+    Flag the snapshot of an exited worker, so its gauges stop being reported
+
+    Its counters and histograms keep counting towards the totals, which
+    therefore never go backwards when a worker is replaced.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    snapshot['alive'] = False
+    _write_json(path, snapshot)
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+class MetricsRegistry:
+    """
+    Collection of metrics with a global on/off switch
+
+    Stages are timed with start()/stop() pairs rather than context managers,
+    which keeps each timed stage to about a microsecond; while the registry
+    is disabled start() returns None and stop() does nothing.
+
+    With a shared_dir (one per gunicorn master), every worker process
+    writes a snapshot of its metrics there every flush_interval seconds and
+    on every scrape, and render() sums counters and histograms over all the
+    snapshots; gauges are reported per live worker with a worker label.
+    Other workers' numbers are at most flush_interval seconds old.
+    """
+
+    def __init__(self, enabled=True, shared_dir=None, flush_interval=5.0):
+        self.enabled = enabled
+        self.shared_dir = shared_dir
+        self.flush_interval = flush_interval
+        self._metrics = []
+        self._flusher = None
+        self._pid = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelname=None, callback=None):
+        return self.register(Counter(name, help_text, labelname, callback))
+
+    def gauge(self, name, help_text, callback=None):
+        return self.register(Gauge(name, help_text, callback))
+
+    def histogram(self, name, help_text, labelname=None, buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelname, buckets))
+
+    def start(self):
+        """Start timing a stage; returns None while metrics are disabled"""
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, histogram, start, label=None):
+        """Observe the time elapsed since start() in histogram"""
+        if start is not None:
+            histogram.observe(time.perf_counter() - start, label)
+
+    def snapshot(self):
+        """Current samples of every metric as (name, kind, help, [(sample, value)])"""
+        return [
+            (metric.name, metric.kind, metric.help_text,
+             [line.rsplit(' ', 1) for line in metric.samples()])
+            for metric in self._metrics
+        ]
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory"""
+        if self.shared_dir:
+            path = os.path.join(self.shared_dir, f"{os.getpid()}.json")
+            _write_json(path, {'pid': os.getpid(), 'alive': True, 'metrics': self.snapshot()})
+
+    def start_flusher(self):
+        """Flush periodically from a background thread (call in every worker)"""
+        if not self.shared_dir or (self._flusher is not None and self._pid == os.getpid()):
+            return
+        self._pid = os.getpid()
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _merged(self):
+        """Sum the snapshots of every process in the shared directory"""
+        self.flush()
+        metrics = {name: (kind, help_text, {}) for name, kind, help_text, _ in self.snapshot()}
+        for filename in sorted(os.listdir(self.shared_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, filename), encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            for name, kind, help_text, samples in snapshot['metrics']:
+                values = metrics.setdefault(name, (kind, help_text, {}))[2]
+                if kind == 'gauge':
+                    if snapshot['alive']:
+                        for key, value in samples:
+                            values[_with_worker(key, snapshot['pid'])] = _parse_value(value)
+                    continue
+                for key, value in samples:
+                    values[key] = values.get(key, 0) + _parse_value(value)
+
+        return [(name, kind, help_text, [(key, _format_value(value)) for key, value in values.items()])
+                for name, (kind, help_text, values) in metrics.items()]
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        snapshot = self._merged() if self.shared_dir else self.snapshot()
+        lines = []
+        for name, kind, help_text, samples in snapshot:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{key} {value}" for key, value in samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Memory-Mappable Model Artifact
+Converts the pickled model into flat numpy arrays plus a JSON header
+
+Layout of an artifact directory (e.g. models/saved/hate_speech_model/):
+
+    header.json      threshold, model_name, performance, vectorizer settings,
+                     precision and int8 scales
+    vocabulary.txt   one term per line, line number = feature index
+    idf.npy          IDF weight per feature
+    coef.npy         classifier coefficient per feature
+    weights.npy      idf * coef, folded ahead of time
+    intercept.npy    classifier intercept
+
+The .npy files are opened with mmap_mode='r', so every worker process on a
+host shares the same weight pages through the OS page cache. The weight
+arrays are stored in the model precision (float64, float32 or int8).
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import numpy as np
+
+from compiled_model import CompiledLinearModel, PRECISIONS
+
+FORMAT_VERSION = 2
+# Version 1 artifacts are float64 and have no precision fields
+SUPPORTED_FORMATS = (1, 2)
+HEADER_FILE = 'header.json'
+# Exit status of the CLI when the model cannot be compiled into an artifact
+# (e.g. a HashingVectorizer model), as opposed to a failure to read it
+UNSUPPORTED_EXIT = 2
+VOCABULARY_FILE = 'vocabulary.txt'
+
+def artifact_dir_for(pickle_path):
+    """Return the artifact directory that sits next to a pickle file"""
+    return os.path.splitext(pickle_path)[0]
+
+def is_artifact(path):
+    """Check whether path is an artifact directory"""
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+def save_artifact(model_data, compiled, out_dir):
+    """
+    Write a compiled model and its metadata as an artifact directory
+
+    Args:
+        model_data (dict): Loaded pickle contents (threshold, model_name, ...)
+        compiled (CompiledLinearModel): Compiled scorer for the model
+        out_dir (str): Target directory
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    terms = [None] * len(compiled.vocabulary)
+    for term, index in compiled.vocabulary.items():
+        terms[index] = term
+    if any('\n' in term for term in terms):
+        raise ValueError("Vocabulary terms cannot contain newlines")
+
+    with open(os.path.join(out_dir, VOCABULARY_FILE), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(terms))
+
+    np.save(os.path.join(out_dir, 'idf.npy'), compiled.idf)
+    np.save(os.path.join(out_dir, 'coef.npy'), compiled.coef)
+    np.save(os.path.join(out_dir, 'weights.npy'), compiled.weights)
+    np.save(os.path.join(out_dir, 'intercept.npy'), np.array([compiled.intercept]))
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'threshold': float(model_data['threshold']),
+        'model_name': model_data.get('model_name', 'Unknown'),
+        'performance': {key: float(value) for key, value in model_data.get('performance', {}).items()},
+        'training_date': model_data.get('training_date'),
+        'n_features': len(terms),
+        'precision': compiled.precision,
+        'idf_scale': compiled.idf_scale,
+        'weight_scale': compiled.weight_scale,
+        'coef_scale': compiled.coef_scale,
+        'vectorizer': {
+            'token_pattern': compiled.token_pattern,
+            'lowercase': compiled.lowercase,
+            'stop_words': sorted(compiled.stop_words) if compiled.stop_words else None,
+            'ngram_range': list(compiled.ngram_range),
+            'norm': compiled.norm,
+            'sublinear_tf': compiled.sublinear_tf,
+            'binary': compiled.binary
+        }
+    }
+
+    # Header is written last so a partially written artifact is never picked up
+    with open(os.path.join(out_dir, HEADER_FILE), 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2)
+
+def load_artifact(path, mmap_mode='r'):
+    """
+    Load an artifact directory into the model_data layout used by the API
+
+    Returns:
+        dict: threshold, model_name, performance, training_date and compiled
+    """
+    with open(os.path.join(path, HEADER_FILE), encoding='utf-8') as f:
+        header = json.load(f)
+
+    if header.get('format_version') not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported artifact format: {header.get('format_version')}")
+
+    with open(os.path.join(path, VOCABULARY_FILE), encoding='utf-8') as f:
+        terms = f.read().split('\n')
+    if len(terms) != header['n_features']:
+        raise ValueError(f"Vocabulary has {len(terms)} terms, expected {header['n_features']}")
+
+    def array(name):
+        return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+    vectorizer = header['vectorizer']
+    compiled = CompiledLinearModel(
+        vocabulary={term: index for index, term in enumerate(terms)},
+        idf=array('idf.npy'),
+        coef=array('coef.npy'),
+        intercept=array('intercept.npy')[0],
+        weights=array('weights.npy'),
+        token_pattern=vectorizer['token_pattern'],
+        lowercase=vectorizer['lowercase'],
+        stop_words=vectorizer['stop_words'],
+        ngram_range=vectorizer['ngram_range'],
+        norm=vectorizer['norm'],
+        sublinear_tf=vectorizer['sublinear_tf'],
+        binary=vectorizer['binary'],
+        precision=header.get('precision', 'float64'),
+        idf_scale=header.get('idf_scale', 1.0),
+        weight_scale=header.get('weight_scale', 1.0),
+        coef_scale=header.get('coef_scale', 1.0)
+    )
+
+    return {
+        'threshold': header['threshold'],
+        'model_name': header['model_name'],
+        'performance': header['performance'],
+        'training_date': header.get('training_date'),
+        'compiled': compiled
+    }
+
+def convert_pickle(pickle_path, out_dir=None, precision='float64'):
+    """
+    Convert a pickled model into an artifact directory
+
+    Args:
+        precision (str): Storage precision of the weights, see compiled_model.PRECISIONS
+
+    Returns:
+        str: Path of the written artifact directory
+    """
+    out_dir = out_dir or artifact_dir_for(pickle_path)
+
+    with open(pickle_path, 'rb') as f:
+        model_data = pickle.load(f)
+
+    compiled = CompiledLinearModel.from_sklearn(model_data['vectorizer'], model_data['model'])
+    if precision != compiled.precision:
+        compiled = compiled.astype(precision)
+    save_artifact(model_data, compiled, out_dir)
+    return out_dir
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert hate_speech_model.pkl to the memory-mappable artifact format")
+    parser.add_argument('pickle_path', help="Path to the pickled model")
+    parser.add_argument('--output', help="Artifact directory (default: pickle path without .pkl)")
+    parser.add_argument('--precision', choices=sorted(PRECISIONS), default='float64',
+                        help="Storage precision of the weights (default: float64)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pickle_path):
+        print(f"❌ Model not found at {args.pickle_path}")
+        sys.exit(1)
+
+    try:
+        out_dir = convert_pickle(args.pickle_path, args.output, args.precision)
+    except ValueError as e:
+        print(f"❌ Model cannot be converted: {str(e)}")
+        sys.exit(UNSUPPORTED_EXIT)
+    print(f"✅ {args.precision} artifact written to {out_dir}")
+
+if __name__ == '__main__':
+    main()
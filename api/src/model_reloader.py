@@ -0,0 +1,166 @@
+"""
+Model Reloader
+Hot-swaps the served model when its files change or on request
+"""
+
+import logging
+import os
+import threading
+import time
+
+from model_artifact import artifact_dir_for, HEADER_FILE
+
+logger = logging.getLogger(__name__)
+
+def fingerprint(path):
+    """
+    Summarize the files a model path is loaded from
+
+    Covers the pickle and the header of its artifact directory, which
+    save_artifact writes last.
+
+    Returns:
+        tuple: (mtime_ns, size) per file, None for missing files
+    """
+    artifact_dir = path if os.path.isdir(path) else artifact_dir_for(path)
+    stamps = []
+    for candidate in (path, os.path.join(artifact_dir, HEADER_FILE)):
+        try:
+            stat = os.stat(candidate)
+            stamps.append((stat.st_mtime_ns, stat.st_size) if os.path.isfile(candidate) else None)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+class ModelReloader:
+    """
+    Background reloads of the served model
+
+    reload_fn() loads, validates and swaps in the model from path_fn(),
+    raising if the new model is unusable so the current one stays active.
+    Reloads run one at a time, either from trigger() or from a watcher
+    thread that polls the model files every interval seconds. A change is
+    only picked up once the files have stopped changing for one interval,
+    so half-copied files are not loaded. An interval of 0 disables the
+    watcher.
+    """
+
+    def __init__(self, reload_fn, path_fn, interval=0.0):
+        self.reload_fn = reload_fn
+        self.path_fn = path_fn
+        self.interval = float(interval)
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload_at = None
+        self.last_duration_s = None
+        self._reloading = threading.Lock()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    @property
+    def in_progress(self):
+        return self._reloading.locked()
+
+    def reload(self):
+        """
+        Reload the model in the calling thread
+
+        Returns:
+            bool: True if a new model was swapped in, False if the reload
+            failed or another reload was already running
+        """
+        if not self._reloading.acquire(blocking=False):
+            return False
+
+        current = None
+        try:
+            path = self.path_fn()
+            current = fingerprint(path) if path else None
+            start = time.perf_counter()
+            self.reload_fn()
+            self.last_duration_s = time.perf_counter() - start
+            self.last_reload_at = time.time()
+            self.last_error = None
+            self.reloads += 1
+            self._fingerprint = current
+            return True
+        except Exception as e:
+            logger.error(f"Model reload failed, keeping the current model: {str(e)}")
+            self.last_error = str(e)
+            self.failures += 1
+            # Do not retry a broken model until its files change again
+            self._fingerprint = current
+            return False
+        finally:
+            self._reloading.release()
+
+    def trigger(self):
+        """
+        Start a reload in a background thread
+
+        Returns:
+            bool: False if a reload is already running
+        """
+        if self.in_progress:
+            return False
+
+        threading.Thread(target=self.reload, name="model-reload", daemon=True).start()
+        return True
+
+    def start(self):
+        """Start the file watcher (again after a fork if needed)"""
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            path = self.path_fn()
+            self._fingerprint = fingerprint(path) if path else None
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._watch, args=(self._stop,), name="model-watcher",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the file watcher and wait for its thread to exit"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+
+    def stats(self):
+        """Return reload counters and the state of the last reload"""
+        return {
+            'in_progress': self.in_progress,
+            'watch_interval_s': self.interval,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_reload_at': self.last_reload_at,
+            'last_duration_s': self.last_duration_s
+        }
+
+    def _watch(self, stop):
+        pending = None
+        while not stop.wait(self.interval):
+            path = self.path_fn()
+            if not path:
+                continue
+
+            current = fingerprint(path)
+            if current == self._fingerprint or all(stamp is None for stamp in current):
+                pending = None
+            elif current != pending:
+                # Changed since the last poll, wait for the copy to settle
+                pending = current
+            else:
+                logger.info(f"Model files changed at {path}, reloading")
+                pending = None
+                self.reload()
@@ -0,0 +1,50 @@
+"""
+NDJSON Stream
+Incremental line splitting for newline-delimited JSON request bodies
+"""
+
+class LineSplitter:
+    """
+    Split a byte stream into numbered lines as chunks arrive
+
+    Only the current partial line is buffered, and never more than
+    max_line_bytes of it: longer lines are dropped and reported as None so
+    the caller can answer them with an error, keeping memory bounded no
+    matter what the client sends.
+    """
+
+    def __init__(self, max_line_bytes):
+        self.max_line_bytes = max_line_bytes
+        self.line_number = 0
+        self._buffer = b''
+        self._too_long = False
+
+    def feed(self, data):
+        """
+        Add a chunk of the stream
+
+        Returns:
+            list: (line number, line bytes or None if too long) for every
+            line completed by this chunk
+        """
+        parts = (self._buffer + data).split(b'\n')
+        self._buffer = parts.pop()
+        lines = [self._take(part) for part in parts]
+
+        if len(self._buffer) > self.max_line_bytes:
+            self._too_long = True
+            self._buffer = b''
+        return lines
+
+    def close(self):
+        """Return the final line if the stream did not end with a newline"""
+        if self._buffer or self._too_long:
+            return [self._take(self._buffer)]
+        return []
+
+    def _take(self, line):
+        number = self.line_number
+        self.line_number += 1
+        too_long = self._too_long or len(line) > self.max_line_bytes
+        self._too_long = False
+        return number, None if too_long else line
@@ -0,0 +1,223 @@
+"""
+Request Profiler
+Opt-in cProfile sampling of production requests, keeping the slowest ones
+
+A request is profiled when it is picked by the sample rate or carries the
+profiling token. One request is profiled at a time per process (cProfile
+cannot profile concurrent requests separately); requests arriving while
+one is profiled run unprofiled. When neither a sample rate nor a token
+is configured, begin() returns before doing anything.
+"""
+
+import cProfile
+import heapq
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+
+FORMATS = ('text', 'pstats', 'collapsed')
+
+# Deepest call stack written to collapsed output
+MAX_STACK_DEPTH = 64
+
+class _Snapshot:
+    """Stand-in for a finished Profile that pstats.Stats can load"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class RequestProfiler:
+    """
+    Samples requests through cProfile and keeps the keep slowest profiles
+
+    Callers wrap the request with begin() and end(); end() must be called
+    for every non-None value begin() returns.
+    """
+
+    def __init__(self, sample_rate=0.0, token=None, keep=20, rand=random.random, clock=time.perf_counter):
+        self.sample_rate = float(sample_rate)
+        self.token = token
+        self.keep = int(keep)
+        self.rand = rand
+        self.clock = clock
+        self.profiled = 0
+        self.skipped_busy = 0
+        self._ring = []
+        self._ids = itertools.count(1)
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or bool(self.token)
+
+    def begin(self, token=None):
+        """
+        Start profiling the current request if it is selected
+
+        Args:
+            token: Value of the request's profiling header, if any
+
+        Returns:
+            tuple: Handle to pass to end(), or None if not profiled
+        """
+        if not self.enabled:
+            return None
+        forced = bool(self.token and token and hmac.compare_digest(token, self.token))
+        if not forced and not (self.sample_rate > 0 and self.rand() < self.sample_rate):
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+
+        profile = cProfile.Profile()
+        start = self.clock()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) is active in this process
+            self._busy.release()
+            return None
+        return profile, start
+
+    def end(self, handle, **info):
+        """Stop a profile started by begin() and keep it if it is among the slowest"""
+        profile, start = handle
+        profile.disable()
+        duration = self.clock() - start
+        self._busy.release()
+
+        profile.create_stats()
+        entry = {
+            'id': next(self._ids),
+            'duration_ms': duration * 1000,
+            'timestamp': time.time(),
+            **info
+        }
+        with self._lock:
+            self.profiled += 1
+            item = (duration, entry['id'], entry, profile.stats)
+            if len(self._ring) < self.keep:
+                heapq.heappush(self._ring, item)
+            elif self._ring and duration > self._ring[0][0]:
+                heapq.heapreplace(self._ring, item)
+
+    def profiles(self):
+        """Summaries of the kept profiles, slowest first"""
+        with self._lock:
+            return [entry for _, _, entry, _ in sorted(self._ring, key=lambda item: item[0], reverse=True)]
+
+    def stats_of(self, profile_id):
+        """Raw cProfile stats of a kept profile, None if it is not kept"""
+        with self._lock:
+            for _, entry_id, _, stats in self._ring:
+                if entry_id == profile_id:
+                    return stats
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._ring = []
+
+    def configure(self, sample_rate=None, keep=None):
+        """Update the sampling rate and/or the number of kept profiles"""
+        if sample_rate is not None:
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = float(sample_rate)
+
+        if keep is not None:
+            if keep < 1:
+                raise ValueError("keep must be >= 1")
+            with self._lock:
+                self.keep = int(keep)
+                while len(self._ring) > self.keep:
+                    heapq.heappop(self._ring)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'token_configured': bool(self.token),
+                'keep': self.keep,
+                'kept': len(self._ring),
+                'profiled': self.profiled,
+                'skipped_busy': self.skipped_busy
+            }
+
+def render(stats, fmt, limit=40):
+    """
+    Render raw cProfile stats
+
+    Args:
+        stats: Stats dict from stats_of()
+        fmt: "text" (pstats report sorted by cumulative time), "pstats"
+            (binary file for pstats.Stats, snakeviz, gprof2dot) or
+            "collapsed" (folded stacks for flamegraph.pl / speedscope)
+        limit: Functions listed in the text report
+
+    Returns:
+        tuple: (payload, content type)
+    """
+    if fmt == 'pstats':
+        return marshal.dumps(stats), 'application/octet-stream'
+    if fmt == 'collapsed':
+        return collapse(stats), 'text/plain; charset=utf-8'
+
+    stream = io.StringIO()
+    report = pstats.Stats(_Snapshot(stats), stream=stream)
+    report.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue(), 'text/plain; charset=utf-8'
+
+def frame_name(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins are reported as ('~', 0, "<built-in method ...>")
+        return name
+    return f"{filename.rsplit('/', 1)[-1]}:{name}:{line}"
+
+def collapse(stats):
+    """
+    Folded stacks ("a;b;c <microseconds>" lines) rebuilt from the call graph
+
+    cProfile records caller -> callee edges, not full stacks, so the time
+    of a function reached through several paths is split between them in
+    proportion to the time spent under each caller.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, (_, _, _, _, callers) in stats.items()
+             if not any(caller in stats for caller in callers)]
+    totals = {}
+
+    def walk(func, stack, share):
+        tottime = stats[func][2]
+        stack = stack + [frame_name(func)]
+        key = ';'.join(stack)
+        totals[key] = totals.get(key, 0.0) + tottime * share
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_cumtime in callees.get(func, ()):
+            callee_cumtime = stats[callee][3]
+            # Paths under a microsecond are dropped, which also keeps the
+            # walk from enumerating every path of a dense call graph
+            if callee_cumtime <= 0 or share * edge_cumtime < 1e-6 or frame_name(callee) in stack:
+                continue
+            walk(callee, stack, share * min(1.0, edge_cumtime / callee_cumtime))
+
+    for root in roots:
+        walk(root, [], 1.0)
+
+    return ''.join(f"{key} {round(seconds * 1e6)}\n" for key, seconds in totals.items() if seconds * 1e6 >= 1)
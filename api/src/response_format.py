@@ -0,0 +1,131 @@
+"""
+Response Formats
+Opt-in compact encodings of /predict and /batch_predict responses
+
+    json     the default contract, serialized by jsonify
+    compact  no echoed text or derived fields, columnar batch results,
+             encoded with orjson when installed
+    msgpack  the compact body as MessagePack (needs the msgpack package)
+
+Clients pick a format with ?format=compact|msgpack or an Accept header of
+application/vnd.tweetguard.compact+json or application/msgpack.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'json'
+COMPACT = 'compact'
+MSGPACK = 'msgpack'
+
+COMPACT_MIMETYPE = 'application/vnd.tweetguard.compact+json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+def available_formats():
+    """Formats this process can produce"""
+    return [JSON, COMPACT] + ([MSGPACK] if msgpack is not None else [])
+
+def negotiate(query=None, accept=None):
+    """
+    Pick the response format of a request
+
+    The format query parameter wins over the Accept header; the first
+    supported compact media type in Accept is used, anything else means the
+    default JSON contract.
+
+    Returns:
+        str: Format name, or None if the query asks for an unavailable format
+    """
+    if query:
+        query = query.lower()
+        return query if query in available_formats() else None
+
+    if accept:
+        for part in accept.split(','):
+            mimetype = part.split(';')[0].strip().lower()
+            if mimetype == COMPACT_MIMETYPE:
+                return COMPACT
+            if mimetype in MSGPACK_MIMETYPES and msgpack is not None:
+                return MSGPACK
+    return JSON
+
+def compact_prediction(result):
+    """Single prediction without the echoed text and the derived label/confidence"""
+    if 'error' in result:
+        return {'error': result['error']}
+    return {
+        'prediction': result['prediction'],
+        'probability': result['probability'],
+        'threshold': result['threshold'],
+        'model_version': result['model_version']
+    }
+
+def compact_batch(body):
+    """
+    Columnar form of a /batch_predict body
+
+    predictions and probabilities are parallel arrays in input order, with
+    null at invalid items whose messages are in errors, keyed by position.
+    Every text of a batch is scored by the same model, so threshold and
+    model_version are given once.
+    """
+    predictions = []
+    probabilities = []
+    errors = {}
+    threshold = None
+    version = None
+    for i, result in enumerate(body['results']):
+        if 'error' in result:
+            predictions.append(None)
+            probabilities.append(None)
+            errors[str(i)] = result['error']
+        else:
+            predictions.append(result['prediction'])
+            probabilities.append(result['probability'])
+            threshold = result['threshold']
+            version = result['model_version']
+
+    compact = {
+        'predictions': predictions,
+        'probabilities': probabilities,
+        'threshold': threshold,
+        'model_version': version,
+        'stats': body.get('stats')
+    }
+    if errors:
+        compact['errors'] = errors
+    return compact
+
+def compact_body(body):
+    """Convert a successful /predict or /batch_predict body to the compact layout"""
+    if 'results' in body:
+        return compact_batch(body)
+    if 'prediction' in body:
+        return compact_prediction(body)
+    return body
+
+def encode(body, fmt):
+    """
+    Serialize a response body in a non-default format
+
+    Bodies of successful predictions are converted with compact_body first;
+    error bodies keep their layout.
+
+    Returns:
+        tuple: (payload bytes, content type)
+    """
+    body = compact_body(body)
+    if fmt == MSGPACK:
+        return msgpack.packb(body), MSGPACK_MIMETYPES[0]
+    if orjson is not None:
+        return orjson.dumps(body), 'application/json'
+    return json.dumps(body, separators=(',', ':')).encode('utf-8'), 'application/json'
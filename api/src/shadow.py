@@ -0,0 +1,216 @@
+"""
+Shadow Scoring
+Side-by-side scoring of live traffic with candidate models, off the request path
+
+The primary model answers every request. A sampled share of the scored
+batches is handed to a background thread through a bounded queue; when the
+queue is full the batch is dropped instead of waiting, which is the only
+back-pressure. The thread scores the texts with every shadow model in
+small chunks whatever the request load, so the comparison covers busy
+periods as well as quiet ones, and gives up the interpreter between
+chunks. Agreement with the primary decisions and probability deltas are
+aggregated per shadow model.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of drain()
+DRAIN_POLL_SECONDS = 0.001
+
+class ShadowStats:
+    """Running comparison of one shadow model with the primary model"""
+
+    def __init__(self):
+        self.compared = 0
+        self.agreements = 0
+        self.proper_to_foul = 0
+        self.foul_to_proper = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.errors = 0
+        self.score_seconds = 0.0
+
+    def add(self, primary, primary_threshold, shadow, shadow_threshold, seconds):
+        primary_foul = primary >= primary_threshold
+        shadow_foul = shadow >= shadow_threshold
+        delta = shadow - primary
+        self.compared += len(primary)
+        self.agreements += int(np.sum(primary_foul == shadow_foul))
+        self.proper_to_foul += int(np.sum(~primary_foul & shadow_foul))
+        self.foul_to_proper += int(np.sum(primary_foul & ~shadow_foul))
+        self.delta_sum += float(delta.sum())
+        self.abs_delta_sum += float(np.abs(delta).sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(np.abs(delta).max(initial=0.0)))
+        self.score_seconds += seconds
+
+    def to_dict(self):
+        compared = self.compared
+        return {
+            'compared': compared,
+            'agreements': self.agreements,
+            'agreement_rate': self.agreements / compared if compared else None,
+            'proper_to_foul': self.proper_to_foul,
+            'foul_to_proper': self.foul_to_proper,
+            'mean_delta': self.delta_sum / compared if compared else None,
+            'mean_abs_delta': self.abs_delta_sum / compared if compared else None,
+            'max_abs_delta': self.max_abs_delta,
+            'errors': self.errors,
+            'score_us_per_text': self.score_seconds / compared * 1e6 if compared else None
+        }
+
+class ShadowScorer:
+    """
+    Registry of named shadow models and the background thread scoring them
+
+    Args:
+        score_fn: Function (model data, texts) -> Foul probabilities
+        sample_rate: Share of the scored batches sent to the shadows
+        max_queue: Batches waiting for the shadow thread before new ones are dropped
+        chunk_size: Texts scored per step of the shadow thread
+    """
+
+    def __init__(self, score_fn, sample_rate=0.0, max_queue=64, chunk_size=16, rand=random.random):
+        self.score_fn = score_fn
+        self.sample_rate = float(sample_rate)
+        self.max_queue = int(max_queue)
+        self.chunk_size = int(chunk_size)
+        self.rand = rand
+        self.models = {}
+        self.sampled = 0
+        self.submitted = 0
+        self.dropped = 0
+        self._stats = {}
+        self._queue = queue.Queue(self.max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 and bool(self.models)
+
+    def add(self, name, data):
+        """Register (or replace) a loaded shadow model; its comparison starts over"""
+        with self._lock:
+            self.models = {**self.models, name: data}
+            self._stats[name] = ShadowStats()
+
+    def remove(self, name):
+        """Unregister a shadow model, returning False if it was not registered"""
+        with self._lock:
+            if name not in self.models:
+                return False
+            self.models = {key: value for key, value in self.models.items() if key != name}
+            self._stats.pop(name, None)
+            return True
+
+    def submit(self, texts, probabilities, threshold):
+        """
+        Offer a batch scored by the primary model to the shadows
+
+        Never blocks: unsampled batches return at once, and sampled batches
+        are dropped when the shadow thread is behind.
+
+        Returns:
+            bool: True if the batch was queued
+        """
+        if not self.enabled or self.rand() >= self.sample_rate:
+            return False
+
+        self.sampled += 1
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((texts, np.asarray(probabilities, dtype=np.float64), float(threshold)))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def configure(self, sample_rate=None):
+        """Update the share of batches sent to the shadows"""
+        if sample_rate is not None:
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = float(sample_rate)
+
+    def stats(self):
+        with self._lock:
+            models = {
+                name: {
+                    'model_version': data.get('model_version'),
+                    'model_source': data.get('model_source'),
+                    'threshold': float(data['threshold']),
+                    **self._stats[name].to_dict()
+                }
+                for name, data in self.models.items()
+            }
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'sampled': self.sampled,
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'drop_ratio': self.dropped / self.sampled if self.sampled else None,
+            'queued': self._queue.qsize(),
+            'models': models
+        }
+
+    def drain(self, timeout=10.0):
+        """Wait until every queued batch has been scored (for tests and benchmarks)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(DRAIN_POLL_SECONDS)
+        return not self._queue.unfinished_tasks
+
+    def _ensure_worker(self):
+        """Start the shadow thread, again after a fork if needed"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(self.max_queue)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._thread.start()
+
+    def _score(self, texts, probabilities, threshold):
+        for start in range(0, len(texts), self.chunk_size):
+            chunk = texts[start:start + self.chunk_size]
+            primary = probabilities[start:start + self.chunk_size]
+            for name, data in self.models.items():
+                # Give up the GIL between chunks, so a request thread waiting
+                # for it gets it now instead of at the end of the switch interval
+                time.sleep(0)
+                started = time.perf_counter()
+                try:
+                    shadow = np.asarray(self.score_fn(data, chunk), dtype=np.float64)
+                except Exception as e:
+                    logger.warning(f"Shadow model {name} failed: {str(e)}")
+                    with self._lock:
+                        if name in self._stats:
+                            self._stats[name].errors += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    stats = self._stats.get(name)
+                    if stats is not None:
+                        stats.add(primary, threshold, shadow, float(data['threshold']), elapsed)
+
+    def _run(self):
+        while True:
+            texts, probabilities, threshold = self._queue.get()
+            try:
+                self._score(texts, probabilities, threshold)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,242 @@
+"""
+Static Assets
+In-memory index of the built React frontend with precompressed variants
+
+The build directory is read once at startup. Every file is kept in memory
+together with gzip and brotli variants (brotli needs the brotli package),
+so asset requests are a dict lookup instead of a filesystem read. Variants
+named <file>.gz / <file>.br shipped by the build are used as they are.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Content-hashed build outputs such as main.3f2a1b9c.js never change
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Everything else (index.html, manifest.json) is revalidated with its ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+
+# Variants are kept only when they save at least this fraction of the size
+MIN_COMPRESSION_GAIN = 0.1
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/manifest+json',
+                      'application/xml', 'image/svg+xml')
+
+# Preferred first when a client accepts several encodings
+ENCODINGS = ('br', 'gzip')
+VARIANT_SUFFIXES = {'.br': 'br', '.gz': 'gzip'}
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+def compress(body, encoding):
+    """Compress body at the highest level of an encoding"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return brotli.compress(body, quality=11)
+
+def accepted_encodings(accept_encoding):
+    """
+    Parse an Accept-Encoding header
+
+    Returns:
+        set: Encodings with a non-zero quality ("*" accepts every encoding)
+    """
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    if '*' in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+def etag_matches(if_none_match, etags):
+    """Whether an If-None-Match header names one of the representations"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        # A weak comparison is what If-None-Match asks for
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+class Asset:
+    """One file of the build with its precompressed variants"""
+
+    def __init__(self, path, body, content_type, cache_control, variants=None):
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # encoding -> (compressed body, ETag of that representation)
+        self.variants = {
+            encoding: (data, f'"{digest}-{encoding}"')
+            for encoding, data in (variants or {}).items()
+        }
+        self.etags = {self.etag} | {etag for _, etag in self.variants.values()}
+
+    def select(self, accept_encoding):
+        """
+        Pick the representation for an Accept-Encoding header
+
+        Returns:
+            tuple: (body, content encoding or None, ETag)
+        """
+        if self.variants:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding in ENCODINGS:
+                if encoding in self.variants and encoding in accepted:
+                    data, etag = self.variants[encoding]
+                    return data, encoding, etag
+        return self.body, None, self.etag
+
+    def respond(self, if_none_match=None, accept_encoding=None):
+        """
+        Build the response to a GET of this asset
+
+        Returns:
+            tuple: (status, headers dict, body bytes), a bodiless 304 when
+            If-None-Match names the current content
+        """
+        body, encoding, etag = self.select(accept_encoding)
+        headers = {'ETag': etag, 'Cache-Control': self.cache_control}
+        if self.variants:
+            headers['Vary'] = 'Accept-Encoding'
+        if etag_matches(if_none_match, self.etags):
+            return 304, headers, b''
+
+        headers['Content-Type'] = self.content_type
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
+
+class StaticAssets:
+    """
+    Index of a build directory keyed on the path relative to its root
+
+    The directory is read by load() (or by the first get()); a missing
+    directory gives an empty index, as when the API runs without a
+    frontend build.
+    """
+
+    def __init__(self, root, index_file='index.html', encodings=None):
+        self.root = root
+        self.index_file = index_file
+        if encodings is None:
+            encodings = [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+        self.encodings = tuple(encodings)
+        self.files = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.files is not None
+
+    def build_asset(self, relative_path, full_path, shipped_variants):
+        with open(full_path, 'rb') as f:
+            body = f.read()
+
+        content_type = mimetypes.guess_type(relative_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+
+        variants = {}
+        if is_compressible(content_type) and len(body) >= MIN_COMPRESS_SIZE:
+            for encoding in self.encodings:
+                shipped = shipped_variants.get(encoding)
+                if shipped is not None:
+                    with open(shipped, 'rb') as f:
+                        data = f.read()
+                else:
+                    data = compress(body, encoding)
+                if len(data) <= len(body) * (1 - MIN_COMPRESSION_GAIN):
+                    variants[encoding] = data
+
+        name = os.path.basename(relative_path)
+        cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(name) else REVALIDATE_CACHE_CONTROL
+        return Asset(relative_path, body, content_type, cache_control, variants)
+
+    def load(self):
+        """
+        Read and compress every file of the build directory
+
+        Returns:
+            int: Number of indexed files
+        """
+        files = {}
+        if os.path.isdir(self.root):
+            for directory, _, names in os.walk(self.root):
+                names = set(names)
+                for name in sorted(names):
+                    stem, suffix = os.path.splitext(name)
+                    if suffix in VARIANT_SUFFIXES and stem in names:
+                        continue
+                    shipped = {
+                        encoding: os.path.join(directory, name + suffix)
+                        for suffix, encoding in VARIANT_SUFFIXES.items()
+                        if name + suffix in names
+                    }
+                    full_path = os.path.join(directory, name)
+                    relative_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                    files[relative_path] = self.build_asset(relative_path, full_path, shipped)
+
+        self.files = files
+        original = sum(len(asset.body) for asset in files.values())
+        logger.info(f"Indexed {len(files)} static files from {self.root} ({original / 1024:.1f} KB)")
+        return len(files)
+
+    def get(self, path):
+        """Return the Asset at a relative path, or None"""
+        if self.files is None:
+            with self._lock:
+                if self.files is None:
+                    self.load()
+        return self.files.get(path)
+
+    @property
+    def index(self):
+        """The SPA entry point served for client-side routes"""
+        return self.get(self.index_file)
+
+    def stats(self):
+        files = self.files or {}
+        return {
+            'files': len(files),
+            'bytes': sum(len(asset.body) for asset in files.values()),
+            'compressed_bytes': {
+                encoding: sum(len(asset.variants.get(encoding, (asset.body,))[0]) for asset in files.values())
+                for encoding in self.encodings
+            }
+        }
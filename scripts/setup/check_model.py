@@ -8,6 +8,8 @@ import os
 import sys
 import pickle
 
+from slim_model import dead_attributes
+
 def check_model_path():
     """Check if model exists in the correct location"""
     
@@ -47,6 +49,17 @@ def check_model_path():
             return False
         
         print("✅ All required model components present")
+        
+        # Check for attributes that inference never uses
+        dead = dead_attributes(model_data)
+        if dead:
+            print("⚠️  Model carries attributes that inference never uses:")
+            for description, size in dead:
+                print(f"   - {description}: ~{size / 1024:.1f} KB")
+            print("   Run: python scripts/setup/slim_model.py")
+        else:
+            print("✅ Model is slim")
+        
         return True
         
     except Exception as e:
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Reduced Precision Drift Report
+Scores the held-out split with float64, float32 and int8 weights and compares
+F1, ROC-AUC and decisions against the performance stored with the model
+"""
+
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts', 'training'))
+
+from compiled_model import CompiledLinearModel, PRECISIONS  # noqa: E402
+# The same split and metrics as the training and evaluation reports
+from train_model import evaluate, load_labeled, split_holdout  # noqa: E402
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'pr_auc')
+
+def weight_bytes(compiled):
+    """Bytes held by the per-feature weight arrays"""
+    return compiled.idf.nbytes + compiled.coef.nbytes + compiled.weights.nbytes
+
+def drift_report(model_data, texts, labels, precisions):
+    """
+    Score texts at every precision and compare with the float64 model
+
+    Returns:
+        list: One dict per precision with metrics, decision flips,
+        probability drift and weight memory
+    """
+    threshold = model_data['threshold']
+    reference = CompiledLinearModel.from_sklearn(model_data['vectorizer'], model_data['model'])
+    token_lists = [reference.analyze(text) for text in texts]
+    reference_probabilities = reference.predict_proba_tokens(token_lists)
+    reference_decisions = reference_probabilities >= threshold
+
+    results = []
+    for precision in precisions:
+        compiled = reference if precision == 'float64' else reference.astype(precision)
+        probabilities = compiled.predict_proba_tokens(token_lists)
+        drift = np.abs(probabilities - reference_probabilities)
+        results.append({
+            'precision': precision,
+            'metrics': evaluate(probabilities, labels, threshold),
+            'flips': int(np.sum((probabilities >= threshold) != reference_decisions)),
+            'max_drift': float(drift.max()),
+            'mean_drift': float(drift.mean()),
+            'weight_bytes': weight_bytes(compiled)
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reduced precision weights with the stored model performance")
+    parser.add_argument('--model', default='models/saved/hate_speech_model.pkl', help="Pickled model")
+    parser.add_argument('--dataset', default='data/dataset.csv', help="Training dataset")
+    parser.add_argument('--precision', action='append', choices=sorted(PRECISIONS),
+                        help="Precision to evaluate (repeatable, default: all)")
+    parser.add_argument('--max-f1-drop', type=float, default=0.001,
+                        help="Fail if F1 drops more than this below the stored value (default: 0.001)")
+    args = parser.parse_args()
+
+    for path in (args.model, args.dataset):
+        if not os.path.exists(path):
+            print(f"❌ Not found: {path}")
+            sys.exit(1)
+
+    with open(args.model, 'rb') as f:
+        model_data = pickle.load(f)
+
+    _, texts, _, labels = split_holdout(*load_labeled(args.dataset))
+    texts, labels = texts.tolist(), labels.to_numpy()
+    precisions = args.precision or list(PRECISIONS)
+    stored = model_data.get('performance', {})
+
+    print(f"📊 Held-out split: {len(texts)} tweets, threshold {model_data['threshold']}")
+    print(f"{'metric':<10}{'stored':>10}" + ''.join(f"{precision:>18}" for precision in precisions))
+
+    results = drift_report(model_data, texts, labels, precisions)
+    for metric in METRICS:
+        reference = stored.get(metric)
+        row = f"{metric:<10}" + (f"{reference:>10.4f}" if reference is not None else f"{'-':>10}")
+        for result in results:
+            value = result['metrics'][metric]
+            delta = f"({value - reference:+.4f})" if reference is not None else ''
+            row += f"{value:>9.4f} {delta:>8}"
+        print(row)
+
+    print()
+    failed = False
+    for result in results:
+        print(f"{result['precision']:>8}: {result['flips']} decision flips vs float64, "
+              f"probability drift mean {result['mean_drift']:.2e} max {result['max_drift']:.2e}, "
+              f"weights {result['weight_bytes'] / 1024:.1f} KB")
+        if 'f1' in stored and stored['f1'] - result['metrics']['f1'] > args.max_f1_drop:
+            failed = True
+
+    if failed:
+        print(f"\n⚠️  F1 dropped more than {args.max_f1_drop} below the stored value")
+        sys.exit(1)
+    print("\n✅ All precisions are within the F1 budget")
+
+if __name__ == '__main__':
+    main()
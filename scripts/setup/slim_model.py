@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Model Slimming Tool
+Strips attributes that inference never uses from the pickled model and
+reports artifact size, resident memory and load time before and after
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+
+# Measures a pickle in a fresh interpreter so RSS and timings are not skewed
+MEASURE_SCRIPT = """
+import gc, json, pickle, resource, sys, time
+import sklearn.feature_extraction.text, sklearn.linear_model
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+gc.collect()
+rss_before = rss_kb()
+start = time.perf_counter()
+with open(sys.argv[1], 'rb') as f:
+    model_data = pickle.load(f)
+load_time = time.perf_counter() - start
+gc.collect()
+print(json.dumps({'load_time': load_time, 'rss_kb': rss_kb() - rss_before}))
+"""
+
+def dead_attributes(model_data):
+    """
+    List attributes of the pickled model that inference does not need
+
+    Returns:
+        list: (description, approximate pickled size in bytes) tuples
+    """
+    found = []
+    vectorizer = model_data.get('vectorizer')
+
+    stop_words = getattr(vectorizer, 'stop_words_', None)
+    if stop_words:
+        found.append((f"vectorizer.stop_words_ ({len(stop_words)} pruned n-grams)", len(pickle.dumps(stop_words))))
+
+    vocabulary = getattr(vectorizer, 'vocabulary_', None)
+    if vocabulary and not all(type(index) is int for index in vocabulary.values()):
+        found.append(("vectorizer.vocabulary_ numpy integer indices", len(pickle.dumps(vocabulary))))
+
+    return found
+
+def slim_model_data(model_data):
+    """
+    Remove dead attributes from a loaded model in place
+
+    - vectorizer.stop_words_ only records the n-grams pruned by max_features
+      and sklearn documents that it can be removed before pickling
+    - vectorizer.vocabulary_ values are stored as plain ints instead of numpy
+      int64 scalars, which pickle several times smaller
+    """
+    vectorizer = model_data.get('vectorizer')
+    if vectorizer is None:
+        return model_data
+
+    if getattr(vectorizer, 'stop_words_', None) is not None:
+        vectorizer.stop_words_ = None
+
+    vocabulary = getattr(vectorizer, 'vocabulary_', None)
+    if vocabulary:
+        vectorizer.vocabulary_ = {term: int(index) for term, index in sorted(vocabulary.items(), key=lambda item: item[1])}
+
+    return model_data
+
+def measure(model_path):
+    """Return size, resident memory and load time for a pickled model"""
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_SCRIPT, model_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    stats = json.loads(output)
+    stats['size_bytes'] = os.path.getsize(model_path)
+    return stats
+
+def print_stats(title, stats):
+    print(f"{title}:")
+    print(f"   📦 Size: {stats['size_bytes'] / 1024:.1f} KB")
+    print(f"   🧠 Resident memory after load: {stats['rss_kb'] / 1024:.1f} MB")
+    print(f"   ⏱️  Load time: {stats['load_time'] * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Strip dead attributes from the pickled model")
+    parser.add_argument('--input', default='models/saved/hate_speech_model.pkl', help="Pickled model to slim")
+    parser.add_argument('--output', help="Where to write the slim model (default: overwrite input, keeping a .bak copy)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Model not found at {args.input}")
+        sys.exit(1)
+
+    with open(args.input, 'rb') as f:
+        model_data = pickle.load(f)
+
+    found = dead_attributes(model_data)
+    if not found:
+        print("✅ Model is already slim")
+        return
+
+    print("🧹 Removing:")
+    for description, size in found:
+        print(f"   - {description}: ~{size / 1024:.1f} KB")
+
+    before = measure(args.input)
+
+    output = args.output or args.input
+    if output == args.input:
+        shutil.copy2(args.input, args.input + '.bak')
+        print(f"💾 Backup written to {args.input}.bak")
+
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(slim_model_data(model_data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output)
+
+    after = measure(output)
+
+    print()
+    print_stats("Before", before)
+    print_stats("After", after)
+    print(f"\n✅ Slim model written to {output} "
+          f"({(1 - after['size_bytes'] / before['size_bytes']) * 100:.0f}% smaller)")
+
+if __name__ == '__main__':
+    main()
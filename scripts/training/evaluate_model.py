@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Model Evaluation and Threshold Sweep
+Scores a labeled CSV with a saved model, checks the stored threshold and
+performance, and finds the threshold that maximizes F-beta
+
+Usage (from the project root):
+    python scripts/training/evaluate_model.py --holdout
+    python scripts/training/evaluate_model.py --dataset labeled_week.csv --curve curve.csv
+    python scripts/training/evaluate_model.py --dataset labeled_week.csv --segment-column source
+    python scripts/training/evaluate_model.py --dataset labeled_week.csv --write
+
+The feature matrix of a (dataset, model) pair is built once and cached in
+models/cache/eval/, so re-tuning the same data only costs one sparse
+matrix-vector product and one sort.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from model_artifact import HEADER_FILE, artifact_dir_for, is_artifact  # noqa: E402
+from train_model import LABEL_MAP, evaluate, file_digest, split_holdout  # noqa: E402
+
+def load_dataset(dataset_path, text_column, label_column, segment_column=None, binary_labels=False):
+    """
+    Read texts, binary labels and optional segments from a labeled CSV
+
+    Labels are mapped with the training LABEL_MAP unless binary_labels is
+    set, in which case the column already holds 1 for Foul and 0 for Proper.
+
+    Returns:
+        pd.DataFrame: text, label and (optionally) segment columns
+    """
+    columns = [text_column, label_column] + ([segment_column] if segment_column else [])
+    df = pd.read_csv(dataset_path, usecols=columns)
+    labels = df[label_column] if binary_labels else df[label_column].map(LABEL_MAP)
+    keep = labels.notna()
+
+    result = pd.DataFrame({
+        'text': df.loc[keep, text_column].astype(str),
+        'label': labels[keep].astype(int)
+    })
+    if segment_column:
+        result['segment'] = df.loc[keep, segment_column].astype(str)
+    return result
+
+def build_features(data, texts):
+    """
+    Vectorize texts into the matrix the model scores
+
+    Compiled models get their raw term frequencies (after the binary and
+    sublinear transforms); idf weighting and normalization happen in
+    score_features. Other models get vectorizer.transform.
+
+    Returns:
+        scipy.sparse.csr_matrix: One row per text
+    """
+    compiled = data.get('compiled')
+    if compiled is None:
+        return data['vectorizer'].transform(texts).tocsr()
+
+    indptr = [0]
+    indices = []
+    counts = []
+    for text in texts:
+        features = compiled.count_features(compiled.analyze(text))
+        indices.extend(features.keys())
+        counts.extend(features.values())
+        indptr.append(len(indices))
+
+    tf = np.asarray(counts, dtype=np.float64)
+    if compiled.binary:
+        tf = np.ones_like(tf)
+    elif compiled.sublinear_tf:
+        tf = np.log(tf) + 1
+    return scipy.sparse.csr_matrix((tf, indices, indptr), shape=(len(texts), len(compiled.vocabulary)))
+
+def score_features(data, X):
+    """
+    Compute Foul probabilities for a feature matrix from build_features
+
+    Returns:
+        np.ndarray: Probability of the Foul class for every row
+    """
+    compiled = data.get('compiled')
+    if compiled is None:
+        return data['model'].predict_proba(X)[:, 1]
+
+    dot = X @ compiled.feature_weights()
+    if compiled.norm == 'l2':
+        weighted = X @ scipy.sparse.diags(compiled.feature_idf())
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        dot = dot / norms
+    return 1.0 / (1.0 + np.exp(-(dot + compiled.intercept)))
+
+def cached_features(data, texts, dataset_path, cache_dir, selection):
+    """
+    Load the feature matrix from cache_dir or build and store it
+
+    The key covers the dataset contents, the model version and the rows
+    selected from the dataset.
+    """
+    engine = 'compiled' if data.get('compiled') is not None else 'sklearn'
+    key = hashlib.sha256(
+        f"{file_digest(dataset_path)}:{data['model_version']}:{engine}:{selection}".encode()
+    ).hexdigest()[:16]
+    path = os.path.join(cache_dir, f'{key}.npz')
+
+    if os.path.exists(path):
+        X = scipy.sparse.load_npz(path).tocsr()
+        if X.shape[0] == len(texts):
+            print(f"♻️  Using cached features from {path}")
+            return X
+
+    start = time.perf_counter()
+    X = build_features(data, texts)
+    print(f"🔤 Vectorized {len(texts)} texts in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + f'.tmp{os.getpid()}.npz'
+    scipy.sparse.save_npz(tmp_path, X, compressed=False)
+    os.replace(tmp_path, path)
+    print(f"💾 Cached features in {path}")
+    return X
+
+def sweep_thresholds(probabilities, labels, thresholds):
+    """
+    Confusion counts and metrics at every threshold in one pass
+
+    The probabilities are sorted once; the texts predicted Foul at a
+    threshold t (probability >= t) are a suffix of that order, so true and
+    false positives for all thresholds come from cumulative label counts at
+    the searchsorted positions.
+
+    Returns:
+        dict: threshold, tp, fp, fn, tn, precision, recall, f1 and accuracy arrays
+    """
+    order = np.argsort(probabilities, kind='stable')
+    sorted_probabilities = probabilities[order]
+    positives_before = np.concatenate(([0], np.cumsum(labels[order])))
+
+    total = len(labels)
+    total_positive = int(positives_before[-1])
+    start = np.searchsorted(sorted_probabilities, thresholds, side='left')
+    tp = total_positive - positives_before[start]
+    fp = (total - start) - tp
+    fn = total_positive - tp
+    tn = total - tp - fp - fn
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(total_positive > 0, tp / max(total_positive, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+
+    return {
+        'threshold': thresholds,
+        'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'accuracy': (tp + tn) / total
+    }
+
+def best_threshold(curve, beta=1.0, min_precision=None):
+    """
+    Pick the threshold maximizing F-beta, optionally above a precision floor
+
+    Returns:
+        int: Index into the curve arrays, None if no threshold qualifies
+    """
+    precision, recall = curve['precision'], curve['recall']
+    beta2 = beta * beta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(beta2 * precision + recall > 0,
+                         (1 + beta2) * precision * recall / (beta2 * precision + recall), 0.0)
+    if min_precision is not None:
+        score = np.where(precision >= min_precision, score, -1.0)
+    index = int(np.argmax(score))
+    return None if score[index] < 0 else index
+
+def write_curve(curve, path):
+    columns = ['threshold', 'precision', 'recall', 'f1', 'accuracy', 'tp', 'fp', 'fn', 'tn']
+    pd.DataFrame({column: curve[column] for column in columns}).to_csv(path, index=False, float_format='%.6f')
+    print(f"📈 Curve written to {path}")
+
+def write_threshold(model_path, threshold, performance):
+    """
+    Store a new threshold and performance in the model files
+
+    The pickle is rewritten before the artifact header, so the artifact
+    keeps being preferred by load_model; both writes are atomic, which lets
+    the hot reload watcher pick the change up safely.
+
+    Returns:
+        list: Paths that were updated
+    """
+    updated = []
+    if os.path.isfile(model_path):
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
+        model_data['threshold'] = threshold
+        model_data['performance'] = performance
+        tmp_path = model_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, model_path)
+        updated.append(model_path)
+
+    artifact_dir = model_path if is_artifact(model_path) else artifact_dir_for(model_path)
+    if is_artifact(artifact_dir):
+        header_path = os.path.join(artifact_dir, HEADER_FILE)
+        with open(header_path, encoding='utf-8') as f:
+            header = json.load(f)
+        header['threshold'] = threshold
+        header['performance'] = performance
+        tmp_path = header_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_path, header_path)
+        updated.append(header_path)
+    return updated
+
+def summarize(name, probabilities, labels, current_threshold, args):
+    """Print metrics at the current and the optimal threshold, return the optimum"""
+    thresholds = np.linspace(0.0, 1.0, args.steps)
+    curve = sweep_thresholds(probabilities, labels, thresholds)
+    index = best_threshold(curve, args.beta, args.min_precision)
+    current = evaluate(probabilities, labels, current_threshold)
+
+    print(f"\n📊 {name}: {len(labels)} texts, {int(labels.sum())} Foul")
+    print(f"   Current threshold {current_threshold:.4f}: "
+          f"precision {current['precision']:.4f}, recall {current['recall']:.4f}, F1 {current['f1']:.4f}")
+    if index is None:
+        print(f"   ⚠️  No threshold reaches precision {args.min_precision}")
+        return None, curve
+
+    optimum = float(curve['threshold'][index])
+    print(f"   Best threshold    {optimum:.4f}: "
+          f"precision {curve['precision'][index]:.4f}, recall {curve['recall'][index]:.4f}, "
+          f"F1 {curve['f1'][index]:.4f}")
+    return optimum, curve
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a saved model and sweep its decision threshold")
+    parser.add_argument('--model', default='models/saved/hate_speech_model.pkl', help="Pickle or artifact directory")
+    parser.add_argument('--dataset', default='data/dataset.csv', help="Labeled CSV")
+    parser.add_argument('--text-column', default='tweet')
+    parser.add_argument('--label-column', default='class')
+    parser.add_argument('--binary-labels', action='store_true', help="Labels are already 1 = Foul, 0 = Proper")
+    parser.add_argument('--segment-column', help="Also tune a threshold per value of this column")
+    parser.add_argument('--holdout', action='store_true',
+                        help="Only use the training notebook's held-out split of the dataset")
+    parser.add_argument('--steps', type=int, default=10001, help="Thresholds between 0 and 1 (default: 10001)")
+    parser.add_argument('--beta', type=float, default=1.0, help="Optimize F-beta (default: F1)")
+    parser.add_argument('--min-precision', type=float, help="Only consider thresholds with at least this precision")
+    parser.add_argument('--curve', help="Write the precision/recall/F1 curve to this CSV")
+    parser.add_argument('--cache-dir', default='models/cache/eval', help="Feature matrix cache directory")
+    parser.add_argument('--write', action='store_true', help="Store the best threshold and its performance in the model")
+    args = parser.parse_args()
+
+    for path in (args.model, args.dataset):
+        if not os.path.exists(path) and not is_artifact(artifact_dir_for(path)):
+            print(f"❌ Not found: {path}")
+            sys.exit(1)
+
+    start = time.perf_counter()
+    data = app.prepare_model(args.model)
+    df = load_dataset(args.dataset, args.text_column, args.label_column, args.segment_column, args.binary_labels)
+
+    selection = 'all'
+    if args.holdout:
+        _, test_texts, _, _ = split_holdout(df['text'], df['label'])
+        df = df.loc[test_texts.index]
+        selection = 'holdout'
+
+    X = cached_features(data, df['text'].tolist(), args.dataset, args.cache_dir, selection)
+    probabilities = score_features(data, X)
+    labels = df['label'].to_numpy()
+
+    threshold = float(data['threshold'])
+    stored = data.get('performance', {})
+    current = evaluate(probabilities, labels, threshold)
+    print(f"🤖 Model {data['model_version']} ({data['model_source']}), stored threshold {threshold}")
+    print(f"{'metric':<10}{'stored':>10}{'measured':>10}")
+    for metric, value in current.items():
+        reference = stored.get(metric)
+        print(f"{metric:<10}" + (f"{reference:>10.4f}" if reference is not None else f"{'-':>10}") + f"{value:>10.4f}")
+
+    optimum, curve = summarize('All texts', probabilities, labels, threshold, args)
+    if args.curve:
+        write_curve(curve, args.curve)
+
+    if args.segment_column:
+        segments = df['segment'].to_numpy()
+        for segment in sorted(set(segments)):
+            mask = segments == segment
+            if len(set(labels[mask])) < 2:
+                print(f"\n⚠️  Segment {segment!r} has a single class, skipped")
+                continue
+            summarize(f"Segment {segment!r}", probabilities[mask], labels[mask], threshold, args)
+
+    print(f"\n   ROC-AUC {roc_auc_score(labels, probabilities):.4f}, "
+          f"PR-AUC {average_precision_score(labels, probabilities):.4f}")
+    print(f"⏱️  Evaluated in {time.perf_counter() - start:.1f}s")
+
+    if args.write:
+        if optimum is None:
+            print("❌ No threshold to write")
+            sys.exit(1)
+        performance = evaluate(probabilities, labels, optimum)
+        for path in write_threshold(args.model, optimum, performance):
+            print(f"✅ Threshold {optimum:.4f} written to {path}")
+
+if __name__ == '__main__':
+    main()
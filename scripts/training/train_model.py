@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Model Training Pipeline
+Scripted replacement for notebooks/hate_speech_model_training.ipynb that
+writes models/saved/hate_speech_model.pkl with the keys the API expects
+
+Usage (from the project root):
+    python scripts/training/train_model.py
+    python scripts/training/train_model.py --streaming --chunk-size 100000
+
+The default mode follows the notebook: TF-IDF bigrams fitted on the training
+split, a parallel grid search over LogisticRegression and the threshold
+applied to the held-out split. The vectorized feature matrices are cached on
+disk, keyed on the dataset contents and the vectorizer settings, so every
+fold, candidate and later run reuses them.
+
+--streaming never holds the dataset in memory: chunks of the CSV are hashed
+with a HashingVectorizer and fed to SGDClassifier.partial_fit.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import (accuracy_score, average_precision_score, f1_score,
+                             precision_score, recall_score, roc_auc_score)
+from sklearn.model_selection import GridSearchCV, train_test_split
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts', 'setup'))
+
+from compiled_model import CompiledLinearModel  # noqa: E402
+from model_artifact import artifact_dir_for, save_artifact  # noqa: E402
+from slim_model import slim_model_data  # noqa: E402
+
+# Same settings as the notebook's selected 'tfidf_bigrams' vectorizer
+VECTORIZER_PARAMS = {
+    'lowercase': True,
+    'stop_words': 'english',
+    'ngram_range': (1, 2),
+    'max_features': 10000
+}
+
+# liblinear and saga minimize the same objective; saga only changes how long
+# it takes (it hits max_iter on this data), so it is opt-in
+PARAM_GRID = {
+    'C': [0.1, 1, 10, 100],
+    'penalty': ['l1', 'l2'],
+    'solver': ['liblinear']
+}
+NOTEBOOK_PARAM_GRID = dict(PARAM_GRID, solver=['liblinear', 'saga'])
+
+# Classes 0 (hate speech) and 1 (offensive language) are Foul, 2 (neither) is Proper
+LABEL_MAP = {0: 1, 1: 1, 2: 0}
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+def load_labeled(dataset_path, text_column='tweet', label_column='class'):
+    """
+    Read a labeled CSV and map its classes to the binary Foul/Proper label
+
+    Returns:
+        tuple: (texts, binary labels) as pandas Series
+    """
+    df = pd.read_csv(dataset_path, usecols=[text_column, label_column])
+    labels = df[label_column].map(LABEL_MAP)
+    keep = labels.notna()
+    return df.loc[keep, text_column].astype(str), labels[keep].astype(int)
+
+def split_holdout(texts, labels):
+    """Stratified train/test split used by the notebook"""
+    return train_test_split(texts, labels, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=labels)
+
+def evaluate(probabilities, labels, threshold):
+    """
+    Compute the metrics stored in the model's performance dict
+
+    Returns:
+        dict: accuracy, precision, recall, f1, roc_auc and pr_auc
+    """
+    predictions = (probabilities >= threshold).astype(int)
+    return {
+        'accuracy': float(accuracy_score(labels, predictions)),
+        'precision': float(precision_score(labels, predictions, zero_division=0)),
+        'recall': float(recall_score(labels, predictions, zero_division=0)),
+        'f1': float(f1_score(labels, predictions, zero_division=0)),
+        'roc_auc': float(roc_auc_score(labels, probabilities)),
+        'pr_auc': float(average_precision_score(labels, probabilities))
+    }
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_key(dataset_path, vectorizer_params):
+    """Cache key covering the dataset contents, the vectorizer and the split"""
+    settings = json.dumps({
+        'vectorizer': vectorizer_params,
+        'test_size': TEST_SIZE,
+        'random_state': RANDOM_STATE
+    }, sort_keys=True, default=str)
+    return hashlib.sha256((file_digest(dataset_path) + settings).encode()).hexdigest()[:16]
+
+def vectorize_cached(dataset_path, cache_dir, vectorizer_params=VECTORIZER_PARAMS):
+    """
+    Fit the vectorizer on the training split and transform both splits once
+
+    The result is cached in cache_dir/<key>/ so the grid search folds and
+    later runs on the same data skip tokenization entirely.
+
+    Returns:
+        dict: vectorizer, X_train, X_test, y_train, y_test and test_texts
+    """
+    key_dir = os.path.join(cache_dir, cache_key(dataset_path, vectorizer_params))
+    paths = {name: os.path.join(key_dir, name) for name in
+             ('X_train.npz', 'X_test.npz', 'labels.npz', 'vectorizer.pkl', 'test_texts.pkl')}
+
+    if all(os.path.exists(path) for path in paths.values()):
+        print(f"♻️  Using cached features from {key_dir}")
+        labels = np.load(paths['labels.npz'])
+        with open(paths['vectorizer.pkl'], 'rb') as f:
+            vectorizer = pickle.load(f)
+        with open(paths['test_texts.pkl'], 'rb') as f:
+            test_texts = pickle.load(f)
+        return {
+            'vectorizer': vectorizer,
+            'X_train': scipy.sparse.load_npz(paths['X_train.npz']),
+            'X_test': scipy.sparse.load_npz(paths['X_test.npz']),
+            'y_train': labels['y_train'],
+            'y_test': labels['y_test'],
+            'test_texts': test_texts
+        }
+
+    texts, labels = load_labeled(dataset_path)
+    X_train_text, X_test_text, y_train, y_test = split_holdout(texts, labels)
+
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    X_train = vectorizer.fit_transform(X_train_text)
+    X_test = vectorizer.transform(X_test_text)
+    print(f"🔤 Vectorized {len(texts)} texts into {X_train.shape[1]} features "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    features = {
+        'vectorizer': vectorizer,
+        'X_train': X_train.tocsr(),
+        'X_test': X_test.tocsr(),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+        'test_texts': X_test_text.tolist()
+    }
+
+    # Written to a temporary directory and renamed so a crash never leaves a partial cache
+    tmp_dir = key_dir + f'.tmp{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    scipy.sparse.save_npz(os.path.join(tmp_dir, 'X_train.npz'), features['X_train'], compressed=False)
+    scipy.sparse.save_npz(os.path.join(tmp_dir, 'X_test.npz'), features['X_test'], compressed=False)
+    np.savez(os.path.join(tmp_dir, 'labels.npz'), y_train=features['y_train'], y_test=features['y_test'])
+    with open(os.path.join(tmp_dir, 'vectorizer.pkl'), 'wb') as f:
+        pickle.dump(slim_model_data({'vectorizer': vectorizer})['vectorizer'], f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(tmp_dir, 'test_texts.pkl'), 'wb') as f:
+        pickle.dump(features['test_texts'], f, protocol=pickle.HIGHEST_PROTOCOL)
+    shutil.rmtree(key_dir, ignore_errors=True)
+    os.rename(tmp_dir, key_dir)
+    print(f"💾 Cached features in {key_dir}")
+    return features
+
+def grid_search(X_train, y_train, param_grid=PARAM_GRID, n_jobs=-1, cv=5):
+    """
+    Tune LogisticRegression on the cached training matrix
+
+    Candidates and folds run in parallel across n_jobs processes; every
+    fold slices the same precomputed matrix.
+
+    Returns:
+        GridSearchCV: Fitted search, best_estimator_ is refit on all of X_train
+    """
+    search = GridSearchCV(
+        LogisticRegression(random_state=RANDOM_STATE, max_iter=1000),
+        param_grid,
+        cv=cv,
+        scoring='f1',
+        n_jobs=n_jobs,
+        verbose=1
+    )
+    search.fit(X_train, y_train)
+    return search
+
+def holdout_row(row_number, test_size=TEST_SIZE):
+    """Deterministically assign a row to the held-out split by hashing its position"""
+    return zlib.crc32(str(row_number).encode()) % 1000 < test_size * 1000
+
+def train_streaming(dataset_path, chunk_size, epochs=1, n_features=2 ** 20, alpha=1e-5,
+                    text_column='tweet', label_column='class'):
+    """
+    Train out of core with a HashingVectorizer and SGDClassifier.partial_fit
+
+    The CSV is read in chunks of chunk_size rows; roughly TEST_SIZE of the
+    rows, chosen by row number, are held out and only scored in the final
+    pass. Memory stays bounded by one chunk plus one probability per
+    held-out row.
+
+    Returns:
+        tuple: (vectorizer, model, held-out probabilities, held-out labels)
+    """
+    vectorizer = HashingVectorizer(
+        lowercase=True,
+        stop_words='english',
+        ngram_range=VECTORIZER_PARAMS['ngram_range'],
+        n_features=n_features,
+        alternate_sign=False,
+        norm='l2'
+    )
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=RANDOM_STATE)
+
+    def chunks():
+        offset = 0
+        for chunk in pd.read_csv(dataset_path, usecols=[text_column, label_column], chunksize=chunk_size):
+            labels = chunk[label_column].map(LABEL_MAP)
+            holdout = np.array([holdout_row(offset + i) for i in range(len(chunk))])
+            keep = labels.notna().to_numpy()
+            offset += len(chunk)
+            yield chunk[text_column].astype(str).to_numpy()[keep], labels.to_numpy()[keep].astype(int), holdout[keep]
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        rows = 0
+        for texts, labels, holdout in chunks():
+            train = ~holdout
+            if train.any():
+                model.partial_fit(vectorizer.transform(texts[train]), labels[train], classes=[0, 1])
+                rows += int(train.sum())
+        print(f"🔁 Epoch {epoch + 1}/{epochs}: {rows} training rows in {time.perf_counter() - start:.1f}s")
+
+    probabilities = []
+    test_labels = []
+    for texts, labels, holdout in chunks():
+        if holdout.any():
+            probabilities.append(model.predict_proba(vectorizer.transform(texts[holdout]))[:, 1])
+            test_labels.append(labels[holdout])
+    return vectorizer, model, np.concatenate(probabilities), np.concatenate(test_labels)
+
+def build_model_data(model, vectorizer, threshold, model_name, performance, optimization_info):
+    """Assemble the pickle layout read by the API"""
+    return slim_model_data({
+        'model': model,
+        'vectorizer': vectorizer,
+        'threshold': threshold,
+        'model_name': model_name,
+        'performance': performance,
+        'training_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'optimization_info': optimization_info
+    })
+
+def save_model(model_data, output, write_artifact=False):
+    """Write the pickle atomically and optionally its memory-mappable artifact"""
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output)
+    print(f"✅ Model saved to {output}")
+
+    if write_artifact:
+        compiled = CompiledLinearModel.from_sklearn(model_data['vectorizer'], model_data['model'])
+        out_dir = artifact_dir_for(output)
+        save_artifact(model_data, compiled, out_dir)
+        print(f"✅ Artifact written to {out_dir}")
+
+def print_performance(performance):
+    for metric, value in performance.items():
+        print(f"   {metric:<10} {value:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hate speech model without the notebook")
+    parser.add_argument('--dataset', default='data/dataset.csv', help="Labeled CSV (tweet, class columns)")
+    parser.add_argument('--output', default='models/saved/hate_speech_model.pkl', help="Where to write the model")
+    parser.add_argument('--threshold', type=float, default=0.4, help="Decision threshold (default: 0.4)")
+    parser.add_argument('--cache-dir', default='models/cache', help="Feature matrix cache directory")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel grid search processes (default: all cores)")
+    parser.add_argument('--notebook-grid', action='store_true',
+                        help="Also search the saga solver, like the notebook (much slower)")
+    parser.add_argument('--cv', type=int, default=5, help="Cross-validation folds (default: 5)")
+    parser.add_argument('--artifact', action='store_true', help="Also write the memory-mappable artifact")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Out-of-core training with HashingVectorizer + SGDClassifier")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="Rows per chunk in streaming mode")
+    parser.add_argument('--epochs', type=int, default=3, help="Passes over the data in streaming mode")
+    parser.add_argument('--alpha', type=float, default=1e-5, help="SGDClassifier regularization in streaming mode")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.dataset):
+        print(f"❌ Dataset not found at {args.dataset}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.streaming:
+        print(f"🌊 Streaming {args.dataset} in chunks of {args.chunk_size} rows")
+        vectorizer, model, probabilities, labels = train_streaming(
+            args.dataset, args.chunk_size, epochs=args.epochs, alpha=args.alpha
+        )
+        performance = evaluate(probabilities, labels, args.threshold)
+        model_data = build_model_data(model, vectorizer, args.threshold, 'SGD Logistic Regression (hashed)',
+                                      performance, {
+                                          'grid_search_performed': False,
+                                          'streaming': True,
+                                          'epochs': args.epochs,
+                                          'alpha': args.alpha,
+                                          'n_features': vectorizer.n_features
+                                      })
+        if args.artifact:
+            print("⚠️  Hashed models cannot be compiled, skipping the artifact")
+            args.artifact = False
+    else:
+        features = vectorize_cached(args.dataset, args.cache_dir)
+        param_grid = NOTEBOOK_PARAM_GRID if args.notebook_grid else PARAM_GRID
+        print(f"🔧 Grid search over {param_grid} ({args.cv} folds, n_jobs={args.n_jobs})")
+        search = grid_search(features['X_train'], features['y_train'], param_grid, n_jobs=args.n_jobs, cv=args.cv)
+        print(f"🏆 Best parameters: {search.best_params_} (CV F1 {search.best_score_:.4f})")
+
+        model = search.best_estimator_
+        probabilities = model.predict_proba(features['X_test'])[:, 1]
+        performance = evaluate(probabilities, features['y_test'], args.threshold)
+        model_data = build_model_data(model, features['vectorizer'], args.threshold, 'Logistic Regression',
+                                      performance, {
+                                          'grid_search_performed': True,
+                                          'best_params': search.best_params_,
+                                          'cv_score': float(search.best_score_)
+                                      })
+
+    print(f"📊 Held-out performance at threshold {args.threshold}:")
+    print_performance(performance)
+    save_model(model_data, args.output, args.artifact)
+    print(f"⏱️  Total time: {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the API hot paths
+Runs in-process through Flask's test client, no live server needed
+
+Usage:
+    python tests/benchmark_api.py --output bench.json
+    python tests/benchmark_api.py --baseline bench.json --tolerance 0.15
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+API_DIR = os.path.join(ROOT_DIR, 'api', 'src')
+sys.path.insert(0, API_DIR)
+
+import app  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from inference_pool import InferencePool  # noqa: E402
+import response_format  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+# Largest allowed /predict p99 while reloading, relative to the steady state.
+# On a single CPU the child process converting the model shares the core
+# with the request thread
+RELOAD_P99_BOUND = 2.0 if (os.cpu_count() or 1) > 1 else 5.0
+
+COLD_START_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app
+app.load_model(sys.argv[2])
+elapsed = time.perf_counter() - start
+app.predict_hate_speech("warm up")
+first = time.perf_counter() - start
+print(json.dumps({'load_s': elapsed, 'first_prediction_s': first,
+                  'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_texts(n, seed=42):
+    """Sample n tweets from data/dataset.csv"""
+    with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+        texts = [row['tweet'][:app.MAX_TEXT_LENGTH] for row in csv.DictReader(f)]
+    return random.Random(seed).sample(texts, n)
+
+def summarize(latencies, items_per_call=1):
+    """Turn per-call latencies in seconds into a result dict"""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        'calls': len(latencies),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': total / len(latencies) * 1000,
+        'throughput_per_s': len(latencies) / total,
+        'items_per_s': len(latencies) * items_per_call / total,
+        'rss_mb': rss_mb()
+    }
+
+def timed_calls(fn, args_list, warmup=20):
+    """Call fn for every argument tuple and return per-call latencies"""
+    for args in args_list[:warmup]:
+        fn(*args)
+
+    gc.collect()
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def bench_predict_hate_speech(texts):
+    return summarize(timed_calls(app.predict_hate_speech, [(text,) for text in texts]))
+
+def bench_predict_endpoint(client, texts):
+    def call(text):
+        response = client.post('/predict', json={"text": text})
+        assert response.status_code == 200, response.get_json()
+
+    return summarize(timed_calls(call, [(text,) for text in texts]))
+
+def bench_batch_endpoint(client, texts, batch_size, calls):
+    batches = [
+        [texts[(i * batch_size + j) % len(texts)] for j in range(batch_size)]
+        for i in range(calls)
+    ]
+
+    def call(batch):
+        response = client.post('/batch_predict', json={"texts": batch})
+        assert response.status_code == 200, response.get_json()
+
+    return summarize(timed_calls(call, [(batch,) for batch in batches], warmup=3), batch_size)
+
+def bench_batch_dedup(client, texts, batch_size=100, calls=50, duplicate_rate=0.5):
+    """
+    /batch_predict throughput on crawler-like batches per BATCH_DEDUP mode
+
+    A duplicate_rate share of every batch repeats earlier texts of the same
+    batch, half of them verbatim and half behind an "RT @user:" prefix.
+    """
+    unique_per_batch = int(batch_size * (1 - duplicate_rate))
+    batches = []
+    for i in range(calls):
+        originals = [texts[(i * unique_per_batch + j) % len(texts)] for j in range(unique_per_batch)]
+        repeats = [
+            originals[j % unique_per_batch] if j % 2 else f"RT @user{j}: {originals[j % unique_per_batch]}"
+            for j in range(batch_size - unique_per_batch)
+        ]
+        batches.append((originals + repeats,))
+
+    results = {}
+    mode = app.BATCH_DEDUP
+    for app.BATCH_DEDUP in ('off', 'exact', 'retweet'):
+        deduplicated = []
+
+        def call(batch):
+            response = client.post('/batch_predict', json={"texts": batch})
+            assert response.status_code == 200, response.get_json()
+            deduplicated.append(response.get_json()['stats']['deduplicated'])
+
+        result = summarize(timed_calls(call, batches, warmup=3), batch_size)
+        result['deduplicated'] = sum(deduplicated) / len(deduplicated) / batch_size
+        results[app.BATCH_DEDUP] = result
+    app.BATCH_DEDUP = mode
+    return results
+
+def bench_response_formats(client, texts, batch_size=100, calls=50):
+    """
+    Payload size and serialization cost of every response format
+
+    serialize_us times only the encoding of a ready /batch_predict body;
+    the latency and throughput numbers are for the whole request.
+    """
+    batches = [
+        ([texts[(i * batch_size + j) % len(texts)] for j in range(batch_size)],)
+        for i in range(calls)
+    ]
+    body, _ = app.handle_batch_predict({"texts": batches[0][0]})
+
+    results = {}
+    for fmt in response_format.available_formats():
+        if fmt == response_format.JSON:
+            def serialize():
+                with app.app.app_context():
+                    return app.jsonify(body).get_data()
+        else:
+            def serialize():
+                return response_format.encode(body, fmt)[0]
+
+        iterations = 200
+        began = time.perf_counter()
+        for _ in range(iterations):
+            payload = serialize()
+        serialize_us = (time.perf_counter() - began) / iterations * 1e6
+
+        def call(batch):
+            response = client.post(f'/batch_predict?format={fmt}', json={"texts": batch})
+            assert response.status_code == 200, response.get_data()
+
+        result = summarize(timed_calls(call, batches, warmup=3), batch_size)
+        result['serialize_us'] = serialize_us
+        result['payload_bytes'] = len(payload)
+        results[fmt] = result
+    return results
+
+def bench_cold_start(runs=3):
+    """Time import + load_model + first prediction in fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START_SCRIPT, API_DIR, MODEL_PATH],
+            check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    samples.sort(key=lambda sample: sample['load_s'])
+    median = samples[len(samples) // 2]
+    return {
+        'load_ms': median['load_s'] * 1000,
+        'first_prediction_ms': median['first_prediction_s'] * 1000,
+        'rss_mb': median['rss_kb'] / 1024
+    }
+
+def bench_metrics_overhead(client, texts, rounds=5):
+    """
+    Measure the cost of per-stage instrumentation
+
+    instrumentation_us replays the instrumentation a /predict request does
+    (request timer, parse/tokenize/score/serialize stage timers, batch size,
+    request count) against a scratch registry. endpoint_delta_us is the
+    measured /predict mean with metrics enabled minus disabled.
+    """
+    registry = MetricsRegistry()
+    stages = registry.histogram('stage_seconds', 'stage', 'stage')
+    requests = registry.histogram('request_seconds', 'request', 'endpoint')
+    batch_sizes = registry.histogram('batch_size', 'batch size')
+    count = registry.counter('requests_total', 'requests', ('endpoint', 'status'))
+
+    iterations = 20000
+    began = time.perf_counter()
+    for _ in range(iterations):
+        request_start = registry.start()
+        for stage in ('parse', 'tokenize', 'score', 'serialize'):
+            start = registry.start()
+            registry.stop(stages, start, stage)
+        batch_sizes.observe(1)
+        registry.stop(requests, request_start, 'predict')
+        count.inc(('predict', 200))
+    instrumentation_us = (time.perf_counter() - began) / iterations * 1e6
+
+    def call(text):
+        client.post('/predict', json={"text": text})
+
+    means = {True: [], False: []}
+    for _ in range(rounds):
+        for enabled in (True, False):
+            app.metrics.enabled = enabled
+            latencies = timed_calls(call, [(text,) for text in texts[:500]])
+            means[enabled].append(sum(latencies) / len(latencies))
+    app.metrics.enabled = True
+
+    return {
+        'instrumentation_us': instrumentation_us,
+        'endpoint_delta_us': (min(means[True]) - min(means[False])) * 1e6
+    }
+
+def bench_hot_reload(client, texts, interval=0.1):
+    """
+    /predict latency while the model is hot reloaded every interval seconds
+
+    Compare p99_ms with predict_endpoint to see the cost of a reload; main()
+    fails when it is more than RELOAD_P99_BOUND times higher.
+    """
+    stop = threading.Event()
+    reloads = []
+
+    def reload_loop():
+        while not stop.wait(interval):
+            reloads.append(app.model_reloader.reload())
+
+    def call(text):
+        response = client.post('/predict', json={"text": text})
+        assert response.status_code == 200, response.get_json()
+
+    thread = threading.Thread(target=reload_loop)
+    thread.start()
+    try:
+        result = summarize(timed_calls(call, [(text,) for text in texts]))
+    finally:
+        stop.set()
+        thread.join()
+
+    result['reloads'] = sum(reloads)
+    return result
+
+def bench_inference_scaling(texts, batch_size=1000, calls=10):
+    """
+    Batch throughput of the process backend per worker count
+
+    speedup is items_per_s relative to the inline backend, so on an
+    otherwise idle host it should approach the worker count.
+    """
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, cpus} | {2 ** i for i in range(1, 8) if 2 ** i < cpus})
+    batches = [
+        ([texts[(i * batch_size + j) % len(texts)] for j in range(batch_size)],)
+        for i in range(calls)
+    ]
+
+    inline = summarize(timed_calls(app.predict_hate_speech_batch, batches, warmup=2), batch_size)
+    results = {'inline': inline}
+
+    inline_pool = app.inference_pool
+    for workers in counts:
+        pool = InferencePool(workers=workers, shard_size=batch_size // workers)
+        pool.start(MODEL_PATH)
+        app.inference_pool = pool
+        try:
+            result = summarize(timed_calls(app.predict_hate_speech_batch, batches, warmup=2), batch_size)
+        finally:
+            app.inference_pool = inline_pool
+            pool.stop()
+
+        result['speedup'] = result['items_per_s'] / inline['items_per_s']
+        results[f'process_{workers}'] = result
+    return results
+
+def run_benchmarks(calls=2000, batch_sizes=(1, 10, 100, 1000), use_cache=False, scaling=False):
+    """
+    Run every benchmark
+
+    Returns:
+        dict: Benchmark name -> result dict
+    """
+    if not app.load_model(MODEL_PATH):
+        raise RuntimeError(f"Model not found at {MODEL_PATH}")
+
+    if not use_cache:
+        app.prediction_cache.maxsize = 0
+        # Inference pool workers read their cache size from the environment
+        os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    app.MAX_BATCH_SIZE = max(app.MAX_BATCH_SIZE, max(batch_sizes))
+
+    texts = load_texts(min(calls, 20000))
+    client = app.app.test_client()
+
+    results = {
+        'predict_hate_speech': bench_predict_hate_speech(texts),
+        'predict_endpoint': bench_predict_endpoint(client, texts)
+    }
+    for batch_size in batch_sizes:
+        results[f'batch_predict_{batch_size}'] = bench_batch_endpoint(
+            client, texts, batch_size, max(10, calls // batch_size)
+        )
+    for name, result in bench_batch_dedup(client, texts).items():
+        results[f'batch_dedup_{name}'] = result
+    for name, result in bench_response_formats(client, texts).items():
+        results[f'format_{name}'] = result
+    results['metrics_overhead'] = bench_metrics_overhead(client, texts)
+    results['predict_during_reload'] = bench_hot_reload(client, texts)
+    results['predict_during_reload']['p99_vs_steady'] = (
+        results['predict_during_reload']['p99_ms'] / results['predict_endpoint']['p99_ms']
+    )
+    if scaling:
+        for name, result in bench_inference_scaling(texts).items():
+            results[f'scaling_{name}'] = result
+    results['load_model_cold_start'] = bench_cold_start()
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a saved baseline
+
+    Returns:
+        list: Human readable regression descriptions
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old or metric in ('calls', 'reloads', 'deduplicated', 'p99_vs_steady'):
+                continue
+
+            change = (value - old) / old
+            # Latency and memory regress upwards, throughput regresses downwards
+            if metric.endswith(('_ms', '_us', '_bytes')) or metric == 'rss_mb':
+                regressed = change > tolerance
+            else:
+                regressed = change < -tolerance
+
+            if regressed:
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+def print_results(results):
+    print(f"{'benchmark':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>12}{'RSS MB':>10}")
+    for name, metrics in results.items():
+        if 'p50_ms' in metrics:
+            print(f"{name:<26}{metrics['p50_ms']:>10.3f}{metrics['p95_ms']:>10.3f}{metrics['p99_ms']:>10.3f}"
+                  f"{metrics['items_per_s']:>12,.0f}{metrics['rss_mb']:>10.1f}")
+        elif 'instrumentation_us' in metrics:
+            print(f"{name:<26}{metrics['instrumentation_us']:.2f} us/request instrumentation, "
+                  f"{metrics['endpoint_delta_us']:+.1f} us measured on /predict")
+        else:
+            print(f"{name:<26}load {metrics['load_ms']:.1f} ms, first prediction "
+                  f"{metrics['first_prediction_ms']:.1f} ms, RSS {metrics['rss_mb']:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths in-process")
+    parser.add_argument('--calls', type=int, default=2000, help="Single-text calls per benchmark")
+    parser.add_argument('--batch-sizes', default='1,10,100,1000', help="Comma separated /batch_predict sizes")
+    parser.add_argument('--cache', action='store_true', help="Keep the prediction cache enabled")
+    parser.add_argument('--scaling', action='store_true', help="Measure the process backend at 1..N workers")
+    parser.add_argument('--output', help="Write JSON results to this file")
+    parser.add_argument('--baseline', help="Compare against a previous JSON results file")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        calls=args.calls,
+        batch_sizes=[int(size) for size in args.batch_sizes.split(',')],
+        use_cache=args.cache,
+        scaling=args.scaling
+    )
+    print_results(results)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Results written to {args.output}")
+
+    reload_ratio = results['predict_during_reload']['p99_vs_steady']
+    if reload_ratio > RELOAD_P99_BOUND:
+        print(f"\n❌ /predict p99 is {reload_ratio:.1f}x the steady state while reloading "
+              f"(bound {RELOAD_P99_BOUND:.1f}x)")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+if __name__ == '__main__':
+    main()
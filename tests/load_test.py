@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test against a running API
+Replays tweets from data/dataset.csv as a mix of /predict and /batch_predict
+calls at fixed arrival rates and searches for the knee of the saturation curve
+
+Usage:
+    python tests/load_test.py                           # starts gunicorn locally
+    python tests/load_test.py --url http://host:8080    # existing deployment
+    python tests/load_test.py --rates 50,100,200 --duration 20 --output load.json
+
+Requests are sent on a schedule (Poisson arrivals at the offered rate)
+regardless of how fast responses come back. Latency is measured from the
+scheduled send time, so time a request spent waiting for a free client
+connection behind slow responses counts against it (coordinated omission
+correction); the service time from the actual send is reported too.
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+API_DIR = os.path.join(ROOT_DIR, 'api')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+MAX_TEXT_LENGTH = 1000
+PERCENTILES = (50, 90, 99, 99.9)
+
+# A step is saturated when it completes less than this share of the scheduled rate
+MIN_THROUGHPUT_RATIO = 0.9
+
+def load_texts(path=DATASET_PATH, seed=42):
+    """Tweets of the dataset in a shuffled replay order"""
+    with open(path, newline='', encoding='utf-8') as f:
+        texts = [row['tweet'][:MAX_TEXT_LENGTH] for row in csv.DictReader(f)]
+    random.Random(seed).shuffle(texts)
+    return texts
+
+class RequestMix:
+    """
+    Endless sequence of (path, body, texts) requests replaying the texts in order
+
+    A batch_fraction share of the calls go to /batch_predict with a size
+    drawn from batch_sizes, the rest to /predict.
+    """
+
+    def __init__(self, texts, batch_fraction=0.2, batch_sizes=(10, 50, 100), seed=0):
+        self.texts = texts
+        self.batch_fraction = batch_fraction
+        self.batch_sizes = batch_sizes
+        self.random = random.Random(seed)
+        self.position = 0
+
+    def take(self, n):
+        taken = [self.texts[(self.position + i) % len(self.texts)] for i in range(n)]
+        self.position = (self.position + n) % len(self.texts)
+        return taken
+
+    def next(self):
+        if self.random.random() < self.batch_fraction:
+            texts = self.take(self.random.choice(self.batch_sizes))
+            return '/batch_predict', json.dumps({"texts": texts}).encode('utf-8'), len(texts)
+        return '/predict', json.dumps({"text": self.take(1)[0]}).encode('utf-8'), 1
+
+def arrival_times(rate, duration, seed=0):
+    """Scheduled send offsets of a Poisson arrival process at rate requests/s"""
+    generator = random.Random(seed)
+    times = []
+    t = generator.expovariate(rate)
+    while t < duration:
+        times.append(t)
+        t += generator.expovariate(rate)
+    return times
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(math.ceil(p / 100 * len(sorted_values))) - 1)]
+
+class Client:
+    """Keep-alive HTTP connection of one sender thread, reopened after errors"""
+
+    def __init__(self, url, timeout):
+        parsed = urllib.parse.urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parsed.netloc
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def post(self, path, body):
+        """Send one POST, returning the status code"""
+        if self.connection is None:
+            self.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        try:
+            self.connection.request('POST', self.prefix + path, body, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            response.read()
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                self.close()
+            return response.status
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+def run_step(url, mix, rate, duration, connections=64, timeout=30.0, seed=0):
+    """
+    Offer rate requests/s for duration seconds
+
+    The calling thread releases every request at its arrival time to a
+    queue served by connections sender threads.
+
+    Returns:
+        dict: Offered and achieved rates, corrected and service latency
+        percentiles in ms, status counts and error rate
+    """
+    schedule = arrival_times(rate, duration, seed)
+    work = queue.Queue()
+    records = []
+    lock = threading.Lock()
+
+    def sender():
+        client = Client(url, timeout)
+        while True:
+            item = work.get()
+            if item is None:
+                client.close()
+                return
+            scheduled, path, body, n_texts = item
+            sent = time.perf_counter()
+            try:
+                status = client.post(path, body)
+            except Exception as e:
+                status = type(e).__name__
+            done = time.perf_counter()
+            with lock:
+                records.append((scheduled, sent, done, status, n_texts))
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+
+    requests = [mix.next() for _ in schedule]
+    start = time.perf_counter() + 0.05
+    for offset, (path, body, n_texts) in zip(schedule, requests):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((scheduled, path, body, n_texts))
+    for _ in threads:
+        work.put(None)
+
+    # Give the tail of the step at most one request timeout to finish
+    drain_until = time.perf_counter() + timeout
+    for thread in threads:
+        thread.join(max(0.0, drain_until - time.perf_counter()))
+
+    with lock:
+        records = list(records)
+    return summarize_step(records, len(schedule), rate, duration, start)
+
+def summarize_step(records, scheduled_count, rate, duration, start):
+    """
+    Turn (scheduled, sent, done, status, texts) records into step results
+
+    Requests that never completed count as errors.
+    """
+    ok = [record for record in records if record[3] == 200]
+    statuses = {}
+    for record in records:
+        statuses[str(record[3])] = statuses.get(str(record[3]), 0) + 1
+    missing = scheduled_count - len(records)
+    if missing:
+        statuses['incomplete'] = missing
+
+    end = max([record[2] for record in records], default=start + duration)
+    elapsed = max(duration, end - start)
+    corrected = sorted((done - scheduled) * 1000 for scheduled, _, done, _, _ in ok)
+    service = sorted((done - sent) * 1000 for _, sent, done, _, _ in ok)
+
+    result = {
+        'offered_rps': rate,
+        'scheduled': scheduled_count,
+        # Poisson arrivals put a little more or less than rate * duration in a step
+        'scheduled_rps': scheduled_count / duration,
+        'achieved_rps': len(ok) / elapsed,
+        'texts_per_s': sum(record[4] for record in ok) / elapsed,
+        'error_rate': 1 - len(ok) / scheduled_count if scheduled_count else 0.0,
+        'statuses': statuses,
+        'max_ms': corrected[-1] if corrected else None
+    }
+    for p in PERCENTILES:
+        label = f"p{p:g}".replace('.', '')
+        result[f'{label}_ms'] = percentile(corrected, p)
+        result[f'service_{label}_ms'] = percentile(service, p)
+    return result
+
+def is_saturated(step, slo_ms, max_error_rate):
+    """Whether a step fell behind its arrivals, missed the p99 latency objective or the error budget"""
+    return (
+        step['achieved_rps'] < MIN_THROUGHPUT_RATIO * step['scheduled_rps']
+        or step['p99_ms'] is None or step['p99_ms'] > slo_ms
+        or step['error_rate'] > max_error_rate
+    )
+
+def find_knee(measure, start_rate, max_rate, growth=2.0, refine=3):
+    """
+    Search for the highest sustainable arrival rate
+
+    Rates grow geometrically from start_rate until a step is saturated
+    (or max_rate is reached), then the interval between the last good and
+    the first saturated rate is bisected refine times.
+
+    Args:
+        measure: Function rate -> (step result, saturated)
+
+    Returns:
+        tuple: (knee step result or None, all step results in run order)
+    """
+    steps = []
+    good = None
+    bad_rate = None
+    rate = start_rate
+    while rate <= max_rate:
+        step, saturated = measure(rate)
+        steps.append(step)
+        if saturated:
+            bad_rate = rate
+            break
+        good = step
+        rate *= growth
+
+    if bad_rate is not None:
+        low = good['offered_rps'] if good else 0.0
+        high = bad_rate
+        for _ in range(refine):
+            rate = (low + high) / 2
+            if rate <= 0 or high - low < 1:
+                break
+            step, saturated = measure(rate)
+            steps.append(step)
+            if saturated:
+                high = rate
+            else:
+                good, low = step, rate
+    return good, steps
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_ready(url, timeout=120.0):
+    """Poll /readyz until the server has warmed up"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/readyz', timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+def start_local_server(server, port):
+    """
+    Start the API on localhost the way it is deployed
+
+    Returns:
+        subprocess.Popen: The server process
+    """
+    env = dict(os.environ, PORT=str(port))
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']
+    elif server == 'asgi':
+        command = [sys.executable, os.path.join('src', 'asgi.py')]
+    else:
+        command = [sys.executable, os.path.join('src', 'app.py')]
+    return subprocess.Popen(command, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def print_step(step, saturated):
+    mark = '❌' if saturated else '✅'
+    print(f"   {mark} offered {step['offered_rps']:8.1f} req/s  achieved {step['achieved_rps']:8.1f} req/s "
+          f"({step['texts_per_s']:8.0f} texts/s)  p50 {step['p50_ms'] or 0:7.1f} ms  "
+          f"p99 {step['p99_ms'] or 0:8.1f} ms  (service {step['service_p99_ms'] or 0:7.1f})  "
+          f"errors {step['error_rate']:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test with saturation knee search")
+    parser.add_argument('--url', help="Base URL of a running API (default: start one locally)")
+    parser.add_argument('--server', choices=['gunicorn', 'flask', 'asgi'], default='gunicorn',
+                        help="Local server to start when no --url is given (environment is passed through)")
+    parser.add_argument('--dataset', default=DATASET_PATH, help="CSV file with the tweets to replay")
+    parser.add_argument('--rates', help="Comma separated arrival rates to run instead of the knee search")
+    parser.add_argument('--start-rate', type=float, default=20.0, help="First rate of the knee search (req/s)")
+    parser.add_argument('--max-rate', type=float, default=5000.0, help="Highest rate of the knee search (req/s)")
+    parser.add_argument('--growth', type=float, default=2.0, help="Rate multiplier between search steps")
+    parser.add_argument('--refine', type=int, default=3, help="Bisection steps after the first saturated rate")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per step")
+    parser.add_argument('--cooldown', type=float, default=2.0, help="Idle seconds between steps")
+    parser.add_argument('--batch-fraction', type=float, default=0.2, help="Share of calls going to /batch_predict")
+    parser.add_argument('--batch-sizes', default='10,50,100', help="Comma separated /batch_predict sizes")
+    parser.add_argument('--connections', type=int, default=64, help="Concurrent client connections")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Request timeout in seconds")
+    parser.add_argument('--slo-ms', type=float, default=500.0, help="p99 latency objective of a sustainable rate")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Error budget of a sustainable rate")
+    parser.add_argument('--peak-rps', type=float, help="Expected peak traffic, to size the number of instances")
+    parser.add_argument('--target-utilization', type=float, default=0.6,
+                        help="Share of the knee an instance should run at (app.yaml target_cpu_utilization)")
+    parser.add_argument('--output', help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url.rstrip('/') if args.url else None
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        print(f"🚀 Starting {args.server} on {url}...")
+        process = start_local_server(args.server, port)
+        if not wait_ready(url):
+            process.kill()
+            print("❌ Local server did not become ready")
+            sys.exit(1)
+
+    mix = RequestMix(load_texts(args.dataset), args.batch_fraction,
+                     [int(size) for size in args.batch_sizes.split(',')])
+
+    def measure(rate):
+        if measure.steps:
+            time.sleep(args.cooldown)
+        measure.steps += 1
+        step = run_step(url, mix, rate, args.duration, args.connections, args.timeout)
+        saturated = is_saturated(step, args.slo_ms, args.max_error_rate)
+        step['saturated'] = saturated
+        print_step(step, saturated)
+        return step, saturated
+    measure.steps = 0
+
+    print(f"📊 {args.duration:g}s steps, {args.batch_fraction:.0%} batch calls of {args.batch_sizes} texts, "
+          f"p99 objective {args.slo_ms:g} ms, error budget {args.max_error_rate:.1%}")
+    try:
+        if args.rates:
+            steps = [measure(float(rate))[0] for rate in args.rates.split(',')]
+            sustainable = [step for step in steps if not step['saturated']]
+            knee = max(sustainable, key=lambda step: step['offered_rps']) if sustainable else None
+        else:
+            knee, steps = find_knee(measure, args.start_rate, args.max_rate, args.growth, args.refine)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    results = {'url': url if args.url else f"local {args.server}", 'steps': steps, 'knee': knee}
+    print()
+    if knee is None:
+        print(f"⚠️  Even {steps[0]['offered_rps']:g} req/s is past the knee, lower --start-rate")
+    else:
+        print(f"🎯 Knee: {knee['offered_rps']:.1f} req/s ({knee['texts_per_s']:.0f} texts/s) "
+              f"at p99 {knee['p99_ms']:.1f} ms")
+        if args.peak_rps:
+            per_instance = knee['offered_rps'] * args.target_utilization
+            instances = math.ceil(args.peak_rps / per_instance)
+            results['capacity'] = {'peak_rps': args.peak_rps, 'per_instance_rps': per_instance,
+                                   'instances': instances}
+            print(f"   📦 {args.peak_rps:g} req/s peak at {args.target_utilization:.0%} of the knee "
+                  f"needs {instances} instance(s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Tests for admission control, request deadlines and load shedding
+"""
+
+import unittest
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import asgi  # noqa: E402
+from admission import AdmissionController, parse_request_start, request_deadline, deadline_expired  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestAdmissionController(unittest.TestCase):
+    """Weighted in-flight limit, latency budget and Retry-After"""
+
+    def test_inflight_limit(self):
+        """Batches count by their texts; an idle controller admits anything"""
+        controller = AdmissionController(max_inflight=100)
+        self.assertTrue(controller.try_acquire(150))
+        self.assertFalse(controller.try_acquire(1))
+        controller.release(150)
+
+        self.assertTrue(controller.try_acquire(60))
+        self.assertTrue(controller.try_acquire(40))
+        self.assertFalse(controller.try_acquire(1))
+        controller.release(40)
+        self.assertTrue(controller.try_acquire(30))
+        self.assertEqual(controller.stats()['rejected'], {'inflight': 2, 'latency': 0})
+        self.assertEqual(controller.stats()['inflight_texts'], 90)
+
+    def test_latency_budget(self):
+        """Throughput is measured over busy time only and bounds the queue ahead"""
+        clock = FakeClock()
+        controller = AdmissionController(latency_budget_ms=1000, clock=clock)
+        controller.try_acquire(100)
+        clock.now += 1.0
+        controller.release(100)
+        # Idle time does not lower the measured rate
+        clock.now += 60.0
+        self.assertAlmostEqual(controller.drain_rate, 100.0)
+
+        self.assertTrue(controller.try_acquire(50))
+        self.assertTrue(controller.try_acquire(40))
+        self.assertFalse(controller.try_acquire(20))
+        self.assertEqual(controller.stats()['rejected']['latency'], 1)
+        self.assertEqual(controller.retry_after(), 1)
+
+        controller.configure(latency_budget_ms=0)
+        self.assertTrue(controller.try_acquire(500))
+        self.assertEqual(controller.retry_after(), 6)
+
+    def test_deadlines(self):
+        """Budgets count from X-Request-Start when a proxy sets it"""
+        self.assertIsNone(request_deadline(None, None, 0, now=100.0))
+        self.assertEqual(request_deadline('250', None, 0, now=100.0), 100.25)
+        self.assertEqual(request_deadline(None, None, 500, now=100.0), 100.5)
+        self.assertEqual(request_deadline('250', 't=99.9', 0, now=100.0), 100.15)
+        self.assertEqual(parse_request_start('99900'), 99900.0)
+        self.assertEqual(parse_request_start('1700000000123'), 1700000000.123)
+        self.assertIsNone(parse_request_start('soon'))
+        self.assertTrue(deadline_expired(100.15, now=100.2))
+        self.assertFalse(deadline_expired(None))
+
+class TestLoadShedding(unittest.TestCase):
+    """The scoring endpoints shed load, /health keeps answering"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.client = app.app.test_client()
+
+    def setUp(self):
+        self.original = app.admission
+        app.admission = AdmissionController(max_inflight=10)
+
+    def tearDown(self):
+        app.admission = self.original
+
+    def test_overload_returns_503(self):
+        """A saturated process answers 503 with Retry-After, health stays 200"""
+        app.admission.try_acquire(10)
+        response = self.client.post('/batch_predict', json={"texts": ["hello", "world"]})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(response.get_json()['retry_after'], 1)
+        self.assertEqual(self.client.get('/health').status_code, 200)
+
+        status, payload, _, headers = asgi.run_handler(app.handle_predict, b'{"text": "hello"}')
+        self.assertEqual(status, 503)
+        self.assertIn((b'retry-after', b'1'), headers)
+
+        app.admission.release(10)
+        response = self.client.post('/predict', json={"text": "hello"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(app.admission.stats()['inflight_texts'], 0)
+
+    def test_expired_deadline_is_not_scored(self):
+        """Requests past their deadline get a 504 before scoring"""
+        before = app.DEADLINE_EXCEEDED.value()
+        response = self.client.post('/predict', json={"text": "hello"},
+                                    headers={'X-Request-Timeout-Ms': '100', 'X-Request-Start': 't=1000.0'})
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(app.DEADLINE_EXCEEDED.value(), before + 1)
+
+        response = self.client.post('/predict', json={"text": "hello"}, headers={'X-Request-Timeout-Ms': '5000'})
+        self.assertEqual(response.status_code, 200)
+
+        body, status = app.handle_batch_predict({"texts": ["hello"]}, deadline=0.0)
+        self.assertEqual((status, json.dumps(body)), (504, json.dumps({"error": "Deadline exceeded before scoring"})))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,399 @@
+"""
+Response-compatibility tests for the Flask (WSGI) and ASGI serving modes
+The same cases run against both, and their bodies must match byte for byte
+"""
+
+import unittest
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import asgi  # noqa: E402
+import response_format  # noqa: E402
+from ndjson_stream import LineSplitter  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+try:
+    import gunicorn  # noqa: F401
+    HAS_GUNICORN = True
+except ImportError:
+    HAS_GUNICORN = False
+
+class FlaskTransport:
+    """Sends requests through Flask's test client"""
+
+    def __init__(self):
+        self.client = app.app.test_client()
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self.client.open(path, method=method, json=payload, headers=headers)
+        return response.status_code, response.get_data()
+
+    def raw(self, method, path, body, headers=None):
+        response = self.client.open(path, method=method, data=body, headers=headers)
+        return response.status_code, response.get_data()
+
+    def stream(self, path, chunks):
+        response = self.client.post(path, data=b''.join(chunks), content_type='application/x-ndjson')
+        return response.status_code, response.get_data()
+
+class ASGITransport:
+    """Calls the ASGI application directly on a private event loop"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(asgi.startup())
+
+    def close(self):
+        self.loop.run_until_complete(asgi.shutdown())
+        self.loop.close()
+
+    async def call(self, method, path, chunks=(b'',), headers=None):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+            'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+        }
+        messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                    for i, chunk in enumerate(chunks)]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi.application(scope, receive, send)
+        return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+    def request(self, method, path, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        return self.loop.run_until_complete(self.call(method, path, [body], headers))
+
+    def raw(self, method, path, body, headers=None):
+        return self.loop.run_until_complete(self.call(method, path, [body], headers))
+
+    def stream(self, path, chunks):
+        return self.loop.run_until_complete(self.call('POST', path, chunks))
+
+class GunicornTransport:
+    """Runs gunicorn with the shipped gunicorn.conf.py and talks HTTP to it"""
+
+    def __init__(self, *args, env=None):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{self.port}', *args],
+            cwd=os.path.join(ROOT_DIR, 'api'),
+            env={**os.environ, 'WEB_CONCURRENCY': '1', **(env or {})},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + 60
+        while True:
+            try:
+                if self.request('GET', '/readyz')[0] == 200:
+                    break
+            except ConnectionError:
+                pass
+            if time.time() > deadline or self.server.poll() is not None:
+                self.close()
+                raise RuntimeError("gunicorn did not become ready")
+            time.sleep(0.2)
+
+    def close(self):
+        self.server.terminate()
+        self.server.wait(timeout=30)
+
+    def request(self, method, path, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        return self.raw(method, path, body, {'Content-Type': 'application/json', **(headers or {})})
+
+    def raw(self, method, path, body, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def stream(self, path, chunks, pause=0.0):
+        """POST the chunks with chunked encoding, pause seconds apart"""
+        def body():
+            for chunk in chunks:
+                yield chunk
+                time.sleep(pause)
+
+        # http.client sends an iterable body with chunked encoding
+        return self.raw('POST', path, body(), {'Content-Type': 'application/x-ndjson'})
+
+class ContractTests:
+    """Cases shared by both serving modes; subclasses set self.transport"""
+
+    def call(self, method, path, payload=None):
+        status, body = self.transport.request(method, path, payload)
+        return status, json.loads(body)
+
+    def test_health(self):
+        status, data = self.call('GET', '/health')
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {'status': 'healthy', 'model_loaded': True})
+
+    def test_model_info(self):
+        status, data = self.call('GET', '/model_info')
+        self.assertEqual(status, 200)
+        for field in ('model_type', 'vectorizer_type', 'threshold', 'performance', 'model_version'):
+            self.assertIn(field, data)
+
+    def test_predict(self):
+        status, data = self.call('POST', '/predict', {"text": "have a nice day"})
+        self.assertEqual(status, 200)
+        self.assertEqual(set(data), {'text', 'prediction', 'probability', 'label',
+                                     'confidence', 'threshold', 'model_version'})
+        self.assertEqual(data, app.predict_hate_speech("have a nice day"))
+
+    def test_predict_errors(self):
+        cases = [
+            ({"text": ""}, "Text cannot be empty"),
+            ({"text": 123}, "Text must be a string"),
+            ({"text": "a" * 1001}, "Text too long"),
+            ({"message": "hi"}, "Missing 'text' field"),
+            ({}, "No JSON data provided"),
+        ]
+        for payload, expected_error in cases:
+            with self.subTest(payload=payload):
+                status, data = self.call('POST', '/predict', payload)
+                self.assertEqual(status, 400)
+                self.assertIn(expected_error, data['error'])
+
+    def test_malformed_body(self):
+        for path in ('/predict', '/batch_predict'):
+            for body in (b'{"text": "unterminated', b'not json', b'\xff\xfe'):
+                with self.subTest(path=path, body=body):
+                    status, data = self.transport.raw('POST', path, body, {'Content-Type': 'application/json'})
+                    self.assertEqual(status, 400)
+                    self.assertEqual(json.loads(data), {"error": "Invalid JSON"})
+
+    def test_content_type_is_not_required(self):
+        body = json.dumps({"text": "have a nice day"}).encode()
+        for content_type in ('text/plain', 'application/x-www-form-urlencoded', None):
+            with self.subTest(content_type=content_type):
+                headers = {'Content-Type': content_type} if content_type else None
+                status, data = self.transport.raw('POST', '/predict', body, headers)
+                self.assertEqual(status, 200)
+                self.assertEqual(json.loads(data), app.predict_hate_speech("have a nice day"))
+
+        status, data = self.transport.raw('POST', '/predict', b'', {'Content-Type': 'text/plain'})
+        self.assertEqual(status, 400)
+        self.assertEqual(json.loads(data), {"error": "No JSON data provided"})
+
+    def test_batch_predict(self):
+        status, data = self.call('POST', '/batch_predict', {"texts": ["have a nice day", "", "you pig"]})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['results'][1], {"error": "Text cannot be empty"})
+        self.assertEqual(data['results'][2], app.predict_hate_speech("you pig"))
+        self.assertEqual(data['stats'], {'total': 3, 'invalid': 1, 'unique': 2, 'deduplicated': 0})
+
+    def test_batch_predict_deduplicates(self):
+        texts = ["you pig", "have a nice day", "you pig", "You pig!", "you pig"]
+        status, data = self.call('POST', '/batch_predict', {"texts": texts})
+        self.assertEqual(status, 200)
+        self.assertEqual(data['stats']['deduplicated'], 2)
+        self.assertEqual([result['text'] for result in data['results']], texts)
+        for text, result in zip(texts, data['results']):
+            self.assertEqual(result, app.predict_hate_speech(text))
+
+    def test_compact_formats(self):
+        texts = ["you pig", "", "have a nice day"]
+        _, expected = self.call('POST', '/batch_predict', {"texts": texts})
+        valid = [expected['results'][0], expected['results'][2]]
+
+        status, body = self.transport.request('POST', '/batch_predict?format=compact', {"texts": texts})
+        self.assertEqual(status, 200)
+        compact = json.loads(body)
+        self.assertEqual(compact['predictions'], [valid[0]['prediction'], None, valid[1]['prediction']])
+        self.assertEqual(compact['probabilities'], [valid[0]['probability'], None, valid[1]['probability']])
+        self.assertEqual(compact['errors'], {'1': "Text cannot be empty"})
+        self.assertEqual(compact['model_version'], valid[0]['model_version'])
+        self.assertEqual(compact['stats'], expected['stats'])
+
+        status, body = self.transport.request('POST', '/predict', {"text": "you pig"},
+                                              {'Accept': response_format.COMPACT_MIMETYPE})
+        self.assertEqual(json.loads(body), {key: valid[0][key] for key in
+                                            ('prediction', 'probability', 'threshold', 'model_version')})
+
+        if response_format.msgpack is not None:
+            status, body = self.transport.request('POST', '/batch_predict', {"texts": texts},
+                                                  {'Accept': 'application/msgpack'})
+            self.assertEqual(response_format.msgpack.unpackb(body), compact)
+
+        status, body = self.transport.request('POST', '/predict?format=xml', {"text": "you pig"})
+        self.assertEqual(status, 406)
+
+    def test_batch_predict_errors(self):
+        cases = [
+            ({"texts": "not a list"}, "Texts must be a list"),
+            ({"texts": []}, "Texts list cannot be empty"),
+            ({"texts": ["a"] * (app.MAX_BATCH_SIZE + 1)}, "Too many texts"),
+            ({"text": "hi"}, "Missing 'texts' field"),
+        ]
+        for payload, expected_error in cases:
+            with self.subTest(payload=payload):
+                status, data = self.call('POST', '/batch_predict', payload)
+                self.assertEqual(status, 400)
+                self.assertIn(expected_error, data['error'])
+
+    def test_stream_predict(self):
+        lines = [json.dumps({"text": f"tweet number {i}", "id": i}) for i in range(600)]
+        lines[10] = '{"text": ""}'
+        lines[20] = 'not json'
+        body = ('\n'.join(lines) + '\n').encode()
+
+        # Chunk boundaries fall in the middle of lines
+        status, output = self.transport.stream('/stream_predict', [body[i:i + 1000] for i in range(0, len(body), 1000)])
+        self.assertEqual(status, 200)
+
+        results = [json.loads(line) for line in output.decode().splitlines()]
+        self.assertEqual([result['line'] for result in results], list(range(600)))
+        self.assertEqual(results[10]['error'], "Text cannot be empty")
+        self.assertEqual(results[20]['error'], "Invalid JSON")
+        self.assertEqual(results[5]['id'], 5)
+        self.assertEqual(results[5]['probability'], app.predict_hate_speech("tweet number 5")['probability'])
+
+    def test_method_not_allowed(self):
+        status, data = self.call('PUT', '/predict')
+        self.assertEqual(status, 405)
+        self.assertEqual(data, {"error": "Method not allowed"})
+
+class TestLineSplitter(unittest.TestCase):
+    """Incremental NDJSON line splitting"""
+
+    def test_split_across_chunks(self):
+        splitter = LineSplitter(max_line_bytes=10)
+        self.assertEqual(splitter.feed(b'ab\ncd'), [(0, b'ab')])
+        self.assertEqual(splitter.feed(b'e\n' + b'x' * 25), [(1, b'cde')])
+        self.assertEqual(splitter.feed(b'xx\nlast'), [(2, None)])
+        self.assertEqual(splitter.close(), [(3, b'last')])
+
+class TestDedupeTexts(unittest.TestCase):
+    """Batch texts collapse onto the texts that are actually scored"""
+
+    def test_modes(self):
+        texts = ["RT @a: hello there", "hello there", "RT @b: RT @c: hello there", "hello there"]
+        self.assertEqual(app.dedupe_texts(texts, 'off'), (texts, [0, 1, 2, 3]))
+        self.assertEqual(app.dedupe_texts(texts, 'exact'), (texts[:3], [0, 1, 2, 1]))
+        self.assertEqual(app.dedupe_texts(texts, 'retweet'), (["hello there"], [0, 0, 0, 0]))
+        self.assertEqual(app.dedupe_texts(["RT @a:"], 'retweet'), (["RT @a:"], [0]))
+
+class TestFlaskContract(ContractTests, unittest.TestCase):
+    """API contract served by Flask"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.transport = FlaskTransport()
+
+class TestASGIContract(ContractTests, unittest.TestCase):
+    """API contract served by asgi.py"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.transport = ASGITransport()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.transport.close()
+
+    def test_unknown_endpoint(self):
+        status, data = self.call('GET', '/does_not_exist')
+        self.assertEqual(status, 404)
+        self.assertEqual(data, {"error": "Endpoint not found"})
+
+    def test_event_loop_not_blocked(self):
+        """/health answers while every inference thread is busy"""
+        release = threading.Event()
+        for _ in range(asgi.ASGI_THREADS):
+            asgi.executor.submit(release.wait)
+        try:
+            status, _ = self.call('GET', '/health')
+            self.assertEqual(status, 200)
+        finally:
+            release.set()
+
+@unittest.skipUnless(HAS_GUNICORN, "gunicorn is not installed")
+class TestGunicornStream(unittest.TestCase):
+    """/stream_predict under the worker type gunicorn.conf.py ships"""
+
+    def test_stream_outlives_worker_timeout(self):
+        """A stream of several batches, longer than the worker timeout, is answered in full"""
+        # The gthread worker heartbeats about once a second, so a 1s timeout
+        # could kill it between polls whether or not it is streaming
+        server = GunicornTransport(env={'GUNICORN_TIMEOUT': '2', 'STREAM_BATCH_SIZE': '64'})
+        self.addCleanup(server.close)
+        lines = [json.dumps({"text": f"tweet number {i}", "id": i}).encode() + b'\n' for i in range(200)]
+        chunks = [b''.join(lines[start:start + 20]) for start in range(0, len(lines), 20)]
+
+        status, body = server.stream('/stream_predict', chunks, pause=0.4)
+        self.assertEqual(status, 200)
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([result['id'] for result in results], list(range(200)))
+
+    def test_sync_worker_rejects_stream(self):
+        """A sync worker answers 501 instead of being killed mid-stream"""
+        server = GunicornTransport('--worker-class', 'sync', '--threads', '1')
+        self.addCleanup(server.close)
+        # Sent in one piece: the worker answers without reading the body, and
+        # a chunked upload can be cut off before its last chunk
+        status, body = server.raw('POST', '/stream_predict', b'"hello"\n', {'Content-Type': 'application/x-ndjson'})
+        self.assertEqual(status, 501)
+        self.assertIn('sync workers', json.loads(body)['error'])
+        self.assertEqual(server.request('POST', '/predict', {"text": "hello"})[0], 200)
+
+class TestCrossMode(unittest.TestCase):
+    """Both modes return identical bytes for the same request"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.flask = FlaskTransport()
+        cls.asgi = ASGITransport()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.asgi.close()
+
+    def test_identical_bodies(self):
+        requests = [
+            ('GET', '/health', None),
+            ('POST', '/predict', {"text": "I love my family"}),
+            ('POST', '/predict', {"text": ""}),
+            ('POST', '/batch_predict', {"texts": ["you disgusting pig", 5, "have a nice day"]}),
+            ('POST', '/batch_predict', {"texts": []}),
+            ('POST', '/batch_predict?format=compact', {"texts": ["you disgusting pig", 5, "have a nice day"]}),
+        ]
+        for method, path, payload in requests:
+            with self.subTest(path=path, payload=payload):
+                self.assertEqual(self.flask.request(method, path, payload),
+                                 self.asgi.request(method, path, payload))
+
+        chunks = [b'"I love my family"\n{"text": "you pig", "id": "a"}\n', b'[]\n\n"no newline"']
+        self.assertEqual(self.flask.stream('/stream_predict', chunks),
+                         self.asgi.stream('/stream_predict', chunks))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the app factory, readiness probes and the gunicorn configuration
+"""
+
+import unittest
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+try:
+    import gunicorn  # noqa: F401
+    HAS_GUNICORN = True
+except ImportError:
+    HAS_GUNICORN = False
+
+class TestAppFactory(unittest.TestCase):
+    """create_app, warm-up and the /livez and /readyz probes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = app.create_app(MODEL_PATH)
+        cls.client = cls.app.test_client()
+
+    def test_factory_loads_model(self):
+        """create_app returns the Flask app with a model loaded"""
+        self.assertIs(self.app, app.app)
+        self.assertIsNotNone(app.model_data)
+
+    def test_readiness_waits_for_warm_up(self):
+        """/readyz is 503 until init_worker has warmed up the worker"""
+        app.worker_ready.clear()
+        self.assertEqual(self.client.get('/livez').status_code, 200)
+        self.assertEqual(self.client.get('/readyz').status_code, 503)
+
+        requests_before = app.REQUEST_COUNT.value(('predict', 200))
+        app.init_worker()
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['model_version'], app.model_data['model_version'])
+        # Warm-up requests are not counted in the metrics
+        self.assertEqual(app.REQUEST_COUNT.value(('predict', 200)), requests_before)
+
+@unittest.skipUnless(HAS_GUNICORN, "gunicorn is not installed")
+class TestGunicorn(unittest.TestCase):
+    """The API serves predictions under gunicorn with preload_app"""
+
+    def test_serves_under_gunicorn(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+            cwd=os.path.join(ROOT_DIR, 'api'),
+            env={**os.environ, 'WEB_CONCURRENCY': '2'},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            deadline = time.time() + 60
+            while True:
+                try:
+                    with urllib.request.urlopen(f'{base_url}/readyz') as response:
+                        break
+                except (urllib.error.URLError, ConnectionError):
+                    if time.time() > deadline or server.poll() is not None:
+                        self.fail("gunicorn did not become ready")
+                    time.sleep(0.2)
+
+            request = urllib.request.Request(
+                f'{base_url}/predict', data=json.dumps({"text": "have a nice day"}).encode(),
+                headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(request) as response:
+                result = json.loads(response.read())
+            self.assertIn(result['label'], ['Proper', 'Foul'])
+            self.assertIsNotNone(result['model_version'])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+if __name__ == '__main__':
+    unittest.main()
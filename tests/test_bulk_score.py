@@ -0,0 +1,116 @@
+"""
+Tests for the offline bulk scoring CLI
+"""
+
+import unittest
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import bulk_score  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestBulkScore(unittest.TestCase):
+    """Chunked scoring, output formats and resuming"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        cls.tmp_dir = tempfile.mkdtemp()
+
+        # First 250 rows of the dataset, same column layout
+        cls.input_path = os.path.join(cls.tmp_dir, 'input.csv')
+        with open(DATASET_PATH, newline='', encoding='utf-8') as src, \
+                open(cls.input_path, 'w', newline='', encoding='utf-8') as dst:
+            dst.writelines(line for _, line in zip(range(251), src))
+
+        with open(cls.input_path, newline='', encoding='utf-8') as f:
+            cls.texts = [row['tweet'] for row in csv.DictReader(f)]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def score(self, output_path, **kwargs):
+        return bulk_score.run(self.input_path, output_path, model_path=MODEL_PATH,
+                              chunk_size=40, workers=2, progress=io.StringIO(), **kwargs)
+
+    def read_output(self, output_path):
+        with open(output_path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def test_csv_matches_api(self):
+        """Every row is scored in order with the API probabilities"""
+        output_path = os.path.join(self.tmp_dir, 'scores.csv')
+        self.assertEqual(self.score(output_path), len(self.texts))
+
+        rows = self.read_output(output_path)
+        expected = app.predict_hate_speech_batch(self.texts)
+        self.assertEqual([int(row['row']) for row in rows], list(range(len(self.texts))))
+        for row, result in zip(rows, expected):
+            self.assertEqual(row['label'], result['label'])
+            self.assertAlmostEqual(float(row['probability']), result['probability'])
+
+    def test_resume_after_partial_write(self):
+        """A resumed run skips completed rows and drops a partial last line"""
+        full_path = os.path.join(self.tmp_dir, 'full.csv')
+        partial_path = os.path.join(self.tmp_dir, 'partial.csv')
+        self.score(full_path)
+
+        with open(full_path, encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:101])
+            f.write(lines[101][:5])
+
+        # Blocks smaller than a line make the backward search span several of them
+        self.assertEqual(bulk_score.count_completed_rows(partial_path, block_size=7), 100)
+        self.assertEqual(self.score(partial_path, resume=True), len(self.texts) - 100)
+        self.assertEqual(self.read_output(partial_path), self.read_output(full_path))
+
+    def test_skipped_rows_match_parsed_rows(self):
+        """Skipping raw rows lands on the same row as parsing and dropping them"""
+        jsonl_path = os.path.join(self.tmp_dir, 'skip.jsonl')
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            f.write('{"text": "a"}\n\n{"text": \n[1]\n{"text": "b"}\n{"text": "c"}\n')
+
+        for path in (self.input_path, jsonl_path):
+            everything = list(bulk_score.read_texts(path))
+            for start_row in (0, 1, 3, len(everything), len(everything) + 5):
+                with self.subTest(path=path, start_row=start_row):
+                    self.assertEqual(list(bulk_score.read_texts(path, start_row=start_row)), everything[start_row:])
+
+    def test_jsonl_input(self):
+        """JSONL input falls back to the 'text' key and reports invalid rows"""
+        input_path = os.path.join(self.tmp_dir, 'input.jsonl')
+        output_path = os.path.join(self.tmp_dir, 'scores.jsonl')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'text': 'have a nice day'}) + '\n')
+            f.write(json.dumps({'text': ''}) + '\n')
+            f.write('{"text": "truncated\n')
+            f.write(json.dumps({'text': 'shut up you idiot'}) + '\n')
+
+        bulk_score.run(input_path, output_path, model_path=MODEL_PATH, workers=1, progress=io.StringIO())
+        with open(output_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(records[0]['label'], app.predict_hate_speech('have a nice day')['label'])
+        self.assertEqual(records[1]['error'], 'Text cannot be empty')
+        # A malformed line becomes an error record, keeping rows aligned for --resume
+        self.assertTrue(records[2]['error'].startswith('Invalid JSON'))
+        self.assertEqual(records[3]['row'], 3)
+        self.assertEqual(records[3]['label'], app.predict_hate_speech('shut up you idiot')['label'])
+
+if __name__ == '__main__':
+    unittest.main()
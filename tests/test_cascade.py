@@ -0,0 +1,77 @@
+"""
+Tests for the confidence cascade pre-screen
+"""
+
+import unittest
+import csv
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from cascade import CascadeScorer  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestCascade(unittest.TestCase):
+    """The cascade only skips the full scorer when the decision is proven"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        cls.compiled = app.model_data['compiled']
+        if cls.compiled is None:
+            raise unittest.SkipTest("Compiled inference is disabled")
+
+        cls.threshold = app.model_data['threshold']
+        with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+            texts = [row['tweet'] for _, row in zip(range(2000), csv.DictReader(f))]
+        cls.token_lists = [cls.compiled.analyze(text) for text in texts]
+
+    def test_bounds_contain_exact_score(self):
+        """The exact decision score lies within the stage-one bounds"""
+        cascade = CascadeScorer(self.compiled, self.threshold)
+        _, lower, upper = cascade.bounds_tokens(self.token_lists)
+        exact = self.compiled.decision_function_tokens(self.token_lists)
+
+        self.assertTrue(np.all(lower <= exact + 1e-9))
+        self.assertTrue(np.all(exact <= upper + 1e-9))
+
+    def test_decisions_match_full_model(self):
+        """Early exits never change a label and most texts exit early"""
+        cascade = CascadeScorer(self.compiled, self.threshold)
+        cascaded = cascade.predict_proba_tokens(self.token_lists)
+        full = self.compiled.predict_proba_tokens(self.token_lists)
+
+        np.testing.assert_array_equal(cascaded >= self.threshold, full >= self.threshold)
+        stats = cascade.stats()
+        self.assertEqual(stats['early_exits'] + stats['full_scores'], len(self.token_lists))
+        self.assertGreater(stats['early_exit_rate'], 0.5)
+
+    def test_quantized_model(self):
+        """Decisions match the full scorer of an int8 model too"""
+        compiled = self.compiled.astype('int8')
+        cascade = CascadeScorer(compiled, self.threshold)
+        cascaded = cascade.predict_proba_tokens(self.token_lists)
+        full = compiled.predict_proba_tokens(self.token_lists)
+        np.testing.assert_array_equal(cascaded >= self.threshold, full >= self.threshold)
+
+    def test_undecided_texts_use_full_score(self):
+        """Texts near the threshold get the exact probability"""
+        cascade = CascadeScorer(self.compiled, self.threshold)
+        _, lower, upper = cascade.bounds_tokens(self.token_lists)
+        undecided = ~((lower >= cascade.logit_threshold) | (upper < cascade.logit_threshold))
+        self.assertTrue(undecided.any())
+
+        cascaded = cascade.predict_proba_tokens(self.token_lists)
+        full = self.compiled.predict_proba_tokens(self.token_lists)
+        np.testing.assert_array_equal(cascaded[undecided], full[undecided])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Tests for the /predict micro-batching coalescer
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from coalescer import RequestCoalescer  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+class TestRequestCoalescer(unittest.TestCase):
+    """Unit tests for RequestCoalescer"""
+
+    def test_concurrent_requests_share_batches(self):
+        """Concurrent submits are scored together and routed back correctly"""
+        batch_sizes = []
+
+        def score(texts):
+            batch_sizes.append(len(texts))
+            return [text.upper() for text in texts]
+
+        coalescer = RequestCoalescer(score, window_ms=50, max_batch_size=8)
+        results = {}
+        start = threading.Barrier(20)
+
+        def worker(i):
+            start.wait()
+            results[i] = coalescer.submit(f"text {i}", timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {i: f"TEXT {i}" for i in range(20)})
+        self.assertEqual(sum(batch_sizes), 20)
+        self.assertLessEqual(max(batch_sizes), 8)
+        self.assertLess(len(batch_sizes), 20)
+
+    def test_errors_are_raised_in_callers(self):
+        """A failing batch raises in every waiting thread"""
+        def score(texts):
+            raise RuntimeError("boom")
+
+        coalescer = RequestCoalescer(score, window_ms=1)
+        with self.assertRaises(RuntimeError):
+            coalescer.submit("text", timeout=5)
+
+    def test_stuck_dispatcher_falls_back_inline(self):
+        """A caller stops waiting for a hung batch and scores its text itself"""
+        release = threading.Event()
+        calls = []
+
+        def score(texts):
+            calls.append(threading.current_thread().name)
+            if threading.current_thread().name == 'request-coalescer':
+                release.wait(5)
+            return [text.upper() for text in texts]
+
+        coalescer = RequestCoalescer(score, window_ms=1, max_wait_ms=50)
+        self.assertEqual(coalescer.submit("text"), "TEXT")
+        release.set()
+        self.assertEqual(coalescer.timeouts, 1)
+        self.assertEqual(calls, ['request-coalescer', threading.current_thread().name])
+
+        # A deadline shortens the wait, never below the window
+        self.assertAlmostEqual(coalescer.wait_timeout(), 0.051)
+        self.assertAlmostEqual(coalescer.wait_timeout(deadline=0), 0.001)
+
+    def test_timed_out_text_is_not_scored_twice(self):
+        """A text withdrawn after a timeout is skipped by the dispatcher"""
+        release = threading.Event()
+        scored = []
+
+        def score(texts):
+            scored.append((threading.current_thread().name, list(texts)))
+            if texts == ['stuck']:
+                release.wait(5)
+            return [text.upper() for text in texts]
+
+        coalescer = RequestCoalescer(score, window_ms=1, max_wait_ms=50)
+        stuck = threading.Thread(target=coalescer.submit, args=("stuck",), kwargs={'timeout': 5})
+        stuck.start()
+        while not scored:
+            time.sleep(0.001)
+        self.assertEqual(coalescer.submit("queued"), "QUEUED")
+        release.set()
+        stuck.join()
+        self.assertEqual(coalescer.submit("next"), "NEXT")
+
+        dispatched = [texts for name, texts in scored if name == 'request-coalescer']
+        self.assertEqual(dispatched, [['stuck'], ['next']])
+        self.assertEqual(coalescer.stats()['timeouts'], 1)
+
+    def test_configure(self):
+        """Settings can be changed at runtime and are validated"""
+        coalescer = RequestCoalescer(lambda texts: texts)
+        self.assertFalse(coalescer.enabled)
+
+        coalescer.configure(window_ms=2, max_batch_size=64)
+        self.assertTrue(coalescer.enabled)
+        self.assertEqual(coalescer.stats()['max_batch_size'], 64)
+
+        with self.assertRaises(ValueError):
+            coalescer.configure(max_batch_size=0)
+        with self.assertRaises(ValueError):
+            coalescer.configure(window_ms=-1)
+
+class TestAppCoalescer(unittest.TestCase):
+    """The /predict endpoint and admin endpoint use the app coalescer"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        cls.client = app.app.test_client()
+
+    def setUp(self):
+        self.admin_token = app.ADMIN_TOKEN
+        app.ADMIN_TOKEN = 'secret'
+
+    def tearDown(self):
+        app.ADMIN_TOKEN = self.admin_token
+        app.coalescer.configure(window_ms=0)
+
+    def test_predict_through_coalescer(self):
+        """Coalesced /predict returns the same result as the direct path"""
+        expected = app.predict_hate_speech("you are an idiot")
+
+        response = self.client.put('/admin/coalescer', json={"window_ms": 2, "max_batch_size": 16},
+                                   headers={'X-Admin-Token': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['enabled'])
+
+        response = self.client.post('/predict', json={"text": "you are an idiot"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), expected)
+
+    def test_admin_token_required(self):
+        """Admin endpoint rejects requests without the token"""
+        response = self.client.put('/admin/coalescer', json={"window_ms": 2})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(app.coalescer.enabled)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Parity tests for the compiled linear scoring engine
+Checks compiled probabilities against the sklearn path over the full dataset
+"""
+
+import unittest
+import csv
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from compiled_model import CompiledLinearModel  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestCompiledModel(unittest.TestCase):
+    """Compiled engine must match vectorizer.transform + predict_proba"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the model and the dataset tweets"""
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        cls.model_data = app.model_data
+
+        with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+            cls.texts = [row['tweet'] for row in csv.DictReader(f)]
+
+    def tearDown(self):
+        app.model_data = self.model_data
+        app.prediction_cache.clear()
+
+    def test_model_is_compiled(self):
+        """The default model should load with the compiled engine"""
+        self.assertIsInstance(self.model_data['compiled'], CompiledLinearModel)
+
+    def test_probability_parity_with_sklearn(self):
+        """Probabilities match sklearn to within 1e-9 over data/dataset.csv"""
+        compiled = self.model_data['compiled'].predict_proba(self.texts)
+        vectorized = self.model_data['vectorizer'].transform(self.texts)
+        expected = self.model_data['model'].predict_proba(vectorized)[:, 1]
+
+        self.assertEqual(len(compiled), len(expected))
+        self.assertLess(abs(compiled - expected).max(), 1e-9)
+
+    def test_predict_hate_speech_parity(self):
+        """predict_hate_speech gives the same results on both engines"""
+        texts = self.texts[::50] + ["", "a", "the and of", "RT @user: you are an idiot"]
+
+        app.prediction_cache.clear()
+        compiled_results = [app.predict_hate_speech(text) for text in texts]
+        # Drop the compiled results so the second pass really scores with sklearn
+        app.prediction_cache.clear()
+        app.model_data = dict(self.model_data, compiled=None)
+        sklearn_results = [app.predict_hate_speech(text) for text in texts]
+
+        for compiled, expected in zip(compiled_results, sklearn_results):
+            with self.subTest(text=expected['text'][:30]):
+                self.assertEqual(compiled['prediction'], expected['prediction'])
+                self.assertEqual(compiled['label'], expected['label'])
+                self.assertAlmostEqual(compiled['probability'], expected['probability'], delta=1e-9)
+                self.assertAlmostEqual(compiled['confidence'], expected['confidence'], delta=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests for the evaluation and threshold sweep tool
+"""
+
+import unittest
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts', 'training'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import evaluate_model  # noqa: E402
+from model_artifact import convert_pickle  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestEvaluateModel(unittest.TestCase):
+    """Vectorized sweep and write-back of the decision threshold"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = app.prepare_model(MODEL_PATH)
+        with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+            rows = [row for _, row in zip(range(3000), csv.DictReader(f))]
+        cls.texts = [row['tweet'] for row in rows]
+        cls.labels = np.array([1 if row['class'] in ('0', '1') else 0 for row in rows])
+
+    def test_features_reproduce_model_probabilities(self):
+        """Scoring the cached matrix gives the API probabilities"""
+        X = evaluate_model.build_features(self.data, self.texts)
+        probabilities = evaluate_model.score_features(self.data, X)
+        expected = app.score_texts(self.data, self.texts)
+        self.assertLess(np.abs(probabilities - expected).max(), 1e-9)
+
+    def test_sweep_matches_sklearn(self):
+        """Cumulative-count metrics equal sklearn's at every threshold"""
+        X = evaluate_model.build_features(self.data, self.texts)
+        probabilities = evaluate_model.score_features(self.data, X)
+        thresholds = np.array([0.0, 0.1, 0.4, float(probabilities[7]), 0.9, 1.0])
+        curve = evaluate_model.sweep_thresholds(probabilities, self.labels, thresholds)
+
+        for i, threshold in enumerate(thresholds):
+            predictions = (probabilities >= threshold).astype(int)
+            with self.subTest(threshold=threshold):
+                self.assertAlmostEqual(curve['precision'][i], precision_score(self.labels, predictions, zero_division=0))
+                self.assertAlmostEqual(curve['recall'][i], recall_score(self.labels, predictions))
+                self.assertAlmostEqual(curve['f1'][i], f1_score(self.labels, predictions))
+
+    def test_write_threshold_updates_pickle_and_artifact(self):
+        """A written threshold is what load_model serves afterwards"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            pickle_path = os.path.join(tmp_dir, 'hate_speech_model.pkl')
+            shutil.copy(MODEL_PATH, pickle_path)
+            artifact_dir = convert_pickle(pickle_path)
+
+            updated = evaluate_model.write_threshold(pickle_path, 0.45, {'f1': 0.5})
+            self.assertEqual(len(updated), 2)
+            with open(os.path.join(artifact_dir, 'header.json'), encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['threshold'], 0.45)
+
+            data = app.prepare_model(pickle_path)
+            self.assertEqual(data['model_source'], artifact_dir)
+            self.assertEqual(data['threshold'], 0.45)
+            self.assertEqual(data['performance'], {'f1': 0.5})
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests for the process-pool inference backend
+"""
+
+import unittest
+import csv
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from inference_pool import InferencePool, split_shards  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestInferencePool(unittest.TestCase):
+    """Sharded scoring across worker processes matches inline scoring"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+            cls.texts = [row['tweet'][:app.MAX_TEXT_LENGTH] for _, row in zip(range(300), csv.DictReader(f))]
+
+        cls.pool = InferencePool(workers=2, shard_size=50)
+        cls.pool.start(MODEL_PATH)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.stop()
+
+    def test_split_shards(self):
+        """Shards are contiguous, cover every text and respect the minimum size"""
+        texts = list(range(10))
+        self.assertEqual(split_shards(texts, 4, 3), [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        self.assertEqual(split_shards(texts, 4, 100), [texts])
+        self.assertEqual(split_shards(texts, 2, 1), [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]])
+
+    def test_matches_inline(self):
+        """The process backend returns the inline predictions, in order"""
+        expected = app.predict_hate_speech_batch(self.texts)
+
+        inline_pool = app.inference_pool
+        app.inference_pool = self.pool
+        try:
+            results = app.predict_hate_speech_batch(self.texts)
+        finally:
+            app.inference_pool = inline_pool
+
+        self.assertEqual(len(results), len(expected))
+        for result, reference in zip(results, expected):
+            self.assertEqual(result['label'], reference['label'])
+            self.assertEqual(result['model_version'], reference['model_version'])
+            self.assertAlmostEqual(result['probability'], reference['probability'], places=12)
+
+    def test_restart_swaps_workers(self):
+        """start() replaces the workers and keeps serving"""
+        pids = {self.pool._executor.submit(os.getpid).result() for _ in range(4)}
+        self.pool.start(MODEL_PATH)
+        new_pids = {self.pool._executor.submit(os.getpid).result() for _ in range(4)}
+
+        self.assertFalse(pids & new_pids)
+        self.assertEqual(len(self.pool.score(['have a nice day'])), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Tests for the open-loop load generator's statistics and knee search
+"""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import RequestMix, arrival_times, find_knee, is_saturated, summarize_step  # noqa: E402
+
+class TestLoadTest(unittest.TestCase):
+    """Arrival schedule, coordinated omission correction and knee search"""
+
+    def test_arrivals_and_mix(self):
+        """Poisson arrivals average the offered rate, the mix replays texts in order"""
+        times = arrival_times(200, 20)
+        self.assertAlmostEqual(len(times) / 20, 200, delta=10)
+        self.assertEqual(times, sorted(times))
+
+        mix = RequestMix(['a', 'b', 'c'], batch_fraction=0.0)
+        self.assertEqual([mix.next()[1] for _ in range(4)][3], b'{"text": "a"}')
+        path, _, n_texts = RequestMix(['a'], batch_fraction=1.0, batch_sizes=[5]).next()
+        self.assertEqual((path, n_texts), ('/batch_predict', 5))
+
+    def test_latency_counts_from_schedule(self):
+        """Time queued behind a slow response counts against the request"""
+        # The second request was due at 0.1 but only sent at 1.0
+        records = [(0.0, 0.0, 1.0, 200, 1), (0.1, 1.0, 1.01, 200, 1), (0.2, 1.01, 1.02, 503, 1)]
+        step = summarize_step(records, 4, rate=2.0, duration=2.0, start=0.0)
+        self.assertAlmostEqual(step['p99_ms'], 1000.0)
+        self.assertAlmostEqual(step['p50_ms'], 910.0)
+        self.assertAlmostEqual(step['service_p50_ms'], 10.0)
+        self.assertEqual(step['statuses'], {'200': 2, '503': 1, 'incomplete': 1})
+        self.assertAlmostEqual(step['error_rate'], 0.5)
+        self.assertTrue(is_saturated(step, slo_ms=500, max_error_rate=0.01))
+
+    def test_find_knee(self):
+        """Geometric ramp, then bisection between the last good and first saturated rate"""
+        rates = []
+
+        def measure(rate):
+            rates.append(rate)
+            return {'offered_rps': rate}, rate > 300
+
+        knee, steps = find_knee(measure, start_rate=50, max_rate=10000, refine=3)
+        self.assertEqual(rates, [50, 100, 200, 400, 300, 350, 325])
+        self.assertEqual(knee['offered_rps'], 300)
+        self.assertEqual(len(steps), 7)
+
+if __name__ == '__main__':
+    unittest.main()
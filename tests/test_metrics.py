@@ -0,0 +1,109 @@
+"""
+Tests for the Prometheus metrics registry and /metrics endpoint
+"""
+
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from metrics import MetricsRegistry, mark_process_dead  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Unit tests for the metric types"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include every smaller bucket and +Inf equals the count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency', 'stage', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, 'score')
+
+        output = registry.render()
+        self.assertIn('latency_seconds_bucket{stage="score",le="0.1"} 1', output)
+        self.assertIn('latency_seconds_bucket{stage="score",le="1.0"} 3', output)
+        self.assertIn('latency_seconds_bucket{stage="score",le="+Inf"} 4', output)
+        self.assertIn('latency_seconds_count{stage="score"} 4', output)
+        self.assertIn('latency_seconds_sum{stage="score"} 6.05', output)
+
+    def test_disabled_registry_records_nothing(self):
+        """start() returns None and stop() is a no-op while disabled"""
+        registry = MetricsRegistry(enabled=False)
+        histogram = registry.histogram('latency_seconds', 'Latency')
+        registry.stop(histogram, registry.start())
+        self.assertEqual(histogram.count(), 0)
+
+    def test_workers_are_aggregated(self):
+        """Counters and histograms are summed over worker snapshots, gauges get a worker label"""
+        shared_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shared_dir)
+
+        def build():
+            registry = MetricsRegistry(shared_dir=shared_dir)
+            counter = registry.counter('requests_total', 'Requests', 'endpoint')
+            histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+            gauge = registry.gauge('inflight', 'In flight')
+            return registry, counter, histogram, gauge
+
+        other, counter, histogram, gauge = build()
+        counter.inc('predict', 3)
+        histogram.observe(0.5)
+        gauge.set(7)
+        with open(os.path.join(shared_dir, '1.json'), 'w', encoding='utf-8') as f:
+            json.dump({'pid': 1, 'alive': True, 'metrics': other.snapshot()}, f)
+
+        registry, counter, histogram, gauge = build()
+        counter.inc('predict', 2)
+        histogram.observe(0.05)
+        gauge.set(1)
+
+        output = registry.render()
+        self.assertIn('requests_total{endpoint="predict"} 5', output)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('latency_seconds_count 2', output)
+        self.assertIn('inflight{worker="1"} 7', output)
+        self.assertIn(f'inflight{{worker="{os.getpid()}"}} 1', output)
+
+        # An exited worker's counts stay in the totals, its gauges go away
+        mark_process_dead(shared_dir, 1)
+        output = registry.render()
+        self.assertIn('requests_total{endpoint="predict"} 5', output)
+        self.assertNotIn('inflight{worker="1"}', output)
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """The /metrics endpoint exposes request, stage and error metrics"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        cls.client = app.app.test_client()
+
+    def test_predict_is_instrumented(self):
+        """A /predict call shows up in the request count and stage histograms"""
+        before = app.REQUEST_COUNT.value(('predict', 200))
+        self.client.post('/predict', json={"text": "have a nice day"})
+        self.client.post('/predict', json={})
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+
+        output = response.get_data(as_text=True)
+        self.assertEqual(app.REQUEST_COUNT.value(('predict', 200)), before + 1)
+        self.assertIn('tweetguard_requests_total{endpoint="predict",status="400"}', output)
+        self.assertIn('tweetguard_stage_seconds_count{stage="parse"}', output)
+        self.assertIn('tweetguard_stage_seconds_count{stage="serialize"}', output)
+        self.assertIn('tweetguard_errors_total{type="http_400"}', output)
+        self.assertIn('tweetguard_model_load_seconds', output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests for the memory-mappable model artifact format
+"""
+
+import unittest
+import csv
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from model_artifact import convert_pickle, load_artifact  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestModelArtifact(unittest.TestCase):
+    """Round trip from pickle to artifact and back into the API"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.pickle_path = os.path.join(cls.tmp_dir, 'hate_speech_model.pkl')
+        shutil.copy(MODEL_PATH, cls.pickle_path)
+        cls.artifact_dir = convert_pickle(cls.pickle_path)
+
+        with open(DATASET_PATH, newline='', encoding='utf-8') as f:
+            cls.texts = [row['tweet'] for row in csv.DictReader(f)][::10]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_artifact_is_memory_mapped(self):
+        """Weight arrays are backed by the .npy files"""
+        data = load_artifact(self.artifact_dir)
+        self.assertIsInstance(data['compiled'].weights.base, np.memmap)
+        self.assertIn('f1', data['performance'])
+
+    def test_artifact_parity_with_pickle(self):
+        """Artifact probabilities match the sklearn model"""
+        with open(MODEL_PATH, 'rb') as f:
+            model_data = pickle.load(f)
+        vectorized = model_data['vectorizer'].transform(self.texts)
+        expected = model_data['model'].predict_proba(vectorized)[:, 1]
+
+        compiled = load_artifact(self.artifact_dir)['compiled']
+        self.assertLess(abs(compiled.predict_proba(self.texts) - expected).max(), 1e-9)
+
+    def test_reduced_precision_artifact(self):
+        """float32 and int8 artifacts are stored and scored in their precision"""
+        expected = load_artifact(self.artifact_dir)['compiled'].predict_proba(self.texts)
+
+        for precision, dtype, tolerance in (('float32', np.float32, 1e-6), ('int8', np.int8, 0.05)):
+            with self.subTest(precision=precision):
+                out_dir = convert_pickle(self.pickle_path, os.path.join(self.tmp_dir, precision), precision)
+                compiled = load_artifact(out_dir)['compiled']
+                self.assertEqual(compiled.precision, precision)
+                self.assertEqual(compiled.weights.dtype, dtype)
+                self.assertEqual(compiled.coef.dtype, dtype)
+                self.assertIsInstance(compiled.weights.base, np.memmap)
+                self.assertLess(abs(compiled.predict_proba(self.texts) - expected).max(), tolerance)
+
+    def test_load_model_prefers_artifact(self):
+        """load_model uses the artifact unless the pickle is newer"""
+        self.assertTrue(app.load_model(self.pickle_path))
+        self.assertNotIn('vectorizer', app.model_data)
+
+        header_mtime = os.path.getmtime(os.path.join(self.artifact_dir, 'header.json'))
+        os.utime(self.pickle_path, (header_mtime + 10, header_mtime + 10))
+        try:
+            self.assertTrue(app.load_model(self.pickle_path))
+            self.assertIn('vectorizer', app.model_data)
+        finally:
+            os.utime(self.pickle_path, (header_mtime - 10, header_mtime - 10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for hot model reloading
+Covers versioning, atomic swaps under load, failed reloads and the file watcher
+"""
+
+import unittest
+import csv
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts', 'training'))
+
+import app  # noqa: E402
+import train_model  # noqa: E402
+from model_reloader import ModelReloader  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestModelReload(unittest.TestCase):
+    """Reloads swap models without failing in-flight requests"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, 'hate_speech_model.pkl')
+        shutil.copy2(MODEL_PATH, self.model_path)
+        if not app.load_model(self.model_path):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+        self.client = app.app.test_client()
+        # A niced conversion barely gets the CPU next to the hammering
+        # threads on a small test host
+        self.reload_nice, app.RELOAD_NICE = app.RELOAD_NICE, 0
+
+    def tearDown(self):
+        app.RELOAD_NICE = self.reload_nice
+        app.load_model(MODEL_PATH)
+        shutil.rmtree(self.tmp_dir)
+
+    def retrain(self, training_date):
+        """Overwrite the model file with a model that has a different version"""
+        with open(MODEL_PATH, 'rb') as f:
+            data = pickle.load(f)
+        data['training_date'] = training_date
+        tmp_path = self.model_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, self.model_path)
+
+    def test_version_reported(self):
+        """The active version is in /model_info and in every prediction"""
+        version = app.model_data['model_version']
+        self.assertEqual(len(version), 12)
+        self.assertEqual(self.client.get('/model_info').get_json()['model_version'], version)
+        response = self.client.post('/predict', json={"text": "have a nice day"})
+        self.assertEqual(response.get_json()['model_version'], version)
+
+    def test_reload_under_load(self):
+        """Requests issued while reloading all succeed"""
+        old_version = app.model_data['model_version']
+        self.retrain('reloaded')
+
+        statuses = []
+        stop = threading.Event()
+
+        def hammer():
+            client = app.app.test_client()
+            while not stop.is_set():
+                statuses.append(client.post('/predict', json={"text": "you are a pig"}).status_code)
+
+        threads = [threading.Thread(target=hammer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(0.05)
+            self.assertTrue(app.model_reloader.reload())
+            time.sleep(0.05)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertNotEqual(app.model_data['model_version'], old_version)
+        self.assertTrue(statuses)
+        self.assertEqual(set(statuses), {200})
+
+    def test_failed_reload_keeps_model(self):
+        """A corrupt model file is rejected and the old model keeps serving"""
+        version = app.model_data['model_version']
+        with open(self.model_path, 'wb') as f:
+            f.write(b'not a pickle')
+
+        self.assertFalse(app.model_reloader.reload())
+        self.assertEqual(app.model_data['model_version'], version)
+        self.assertIn('invalid load key', str(app.model_reloader.last_error))
+        response = self.client.post('/predict', json={"text": "have a nice day"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_reload_streaming_model(self):
+        """A model the compiled engine cannot handle reloads through sklearn"""
+        dataset_path = os.path.join(self.tmp_dir, 'sample.csv')
+        with open(DATASET_PATH, newline='', encoding='utf-8') as src, \
+                open(dataset_path, 'w', newline='', encoding='utf-8') as dst:
+            csv.writer(dst).writerows(row for _, row in zip(range(2000), csv.reader(src)))
+        vectorizer, model, probabilities, labels = train_model.train_streaming(dataset_path, chunk_size=1000)
+        performance = train_model.evaluate(probabilities, labels, 0.4)
+        train_model.save_model(train_model.build_model_data(model, vectorizer, 0.4, 'SGD', performance, {}),
+                               self.model_path)
+
+        self.assertTrue(app.model_reloader.reload(), app.model_reloader.last_error)
+        self.assertEqual(app.model_data['model_name'], 'SGD')
+        self.assertIsNone(app.model_data['compiled'])
+        response = self.client.post('/predict', json={"text": "have a nice day"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_watcher_picks_up_changes(self):
+        """The file watcher reloads once the model file has settled"""
+        versions = []
+        reloader = ModelReloader(lambda: versions.append(app.model_version(self.model_path)),
+                                 lambda: self.model_path, interval=0.02)
+        reloader.start()
+        self.addCleanup(reloader.stop)
+        self.retrain('watched')
+
+        deadline = time.time() + 5
+        while not versions and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(versions, [app.model_version(self.model_path)])
+
+        reloader.stop(timeout=1)
+        self.retrain('after stop')
+        time.sleep(0.1)
+        self.assertEqual(len(versions), 1)
+
+if __name__ == '__main__':
+    unittest.main()
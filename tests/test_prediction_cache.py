@@ -0,0 +1,116 @@
+"""
+Tests for the bounded prediction cache
+Covers LRU eviction, TTL expiry, model invalidation and normalized keys
+"""
+
+import unittest
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from prediction_cache import PredictionCache  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestPredictionCache(unittest.TestCase):
+    """Unit tests for PredictionCache"""
+
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted first"""
+        cache = PredictionCache(maxsize=2)
+        cache.put('a', 0.1)
+        cache.put('b', 0.2)
+        self.assertEqual(cache.get('a'), 0.1)
+        cache.put('c', 0.3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 0.1)
+        self.assertEqual(cache.get('c'), 0.3)
+
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 2)
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are treated as misses"""
+        clock = FakeClock()
+        cache = PredictionCache(maxsize=10, ttl=5, clock=clock)
+        cache.put('a', 0.5)
+        clock.now = 4.9
+        self.assertEqual(cache.get('a'), 0.5)
+        clock.now = 5.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_clear_rejects_stale_puts(self):
+        """Results computed before clear() are not stored"""
+        cache = PredictionCache(maxsize=10)
+        generation = cache.generation
+        cache.clear()
+        cache.put('a', 0.5, generation)
+        self.assertIsNone(cache.get('a'))
+
+    def test_disabled_cache(self):
+        """A zero-size cache never stores anything"""
+        cache = PredictionCache(maxsize=0)
+        cache.put('a', 0.5)
+        self.assertIsNone(cache.get('a'))
+
+class TestAppPredictionCache(unittest.TestCase):
+    """The API scoring path uses the cache with normalized keys"""
+
+    @classmethod
+    def setUpClass(cls):
+        if not app.load_model(MODEL_PATH):
+            raise Exception(f"Model not found at {MODEL_PATH}")
+
+    def setUp(self):
+        app.prediction_cache.clear()
+        self.initial = app.prediction_cache.stats()
+
+    def counter(self, name):
+        """Counter increase since the test started"""
+        return app.prediction_cache.stats()[name] - self.initial[name]
+
+    def test_normalized_variants_hit_cache(self):
+        """Case and stop word variants share one cache entry"""
+        first = app.predict_hate_speech("You are an IDIOT!!!")
+        second = app.predict_hate_speech("you are an idiot")
+
+        self.assertEqual(self.counter('misses'), 1)
+        self.assertEqual(self.counter('hits'), 1)
+        self.assertEqual(first['probability'], second['probability'])
+        self.assertEqual(second['text'], "you are an idiot")
+
+    def test_batch_uses_cache(self):
+        """Batch predictions are served from and stored in the cache"""
+        app.predict_hate_speech("what a lovely day")
+        results = app.predict_hate_speech_batch(["what a lovely day", "go away loser"])
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.counter('hits'), 1)
+        self.assertEqual(app.predict_hate_speech("go away loser")['probability'],
+                         results[1]['probability'])
+
+    def test_model_load_invalidates_cache(self):
+        """Loading a model drops all cached predictions"""
+        app.predict_hate_speech("what a lovely day")
+        app.load_model(MODEL_PATH)
+        self.assertEqual(app.prediction_cache.stats()['size'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests for the sampling request profiler and the /admin/profiles endpoints
+"""
+
+import unittest
+import marshal
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import asgi  # noqa: E402
+from profiler import RequestProfiler, collapse, render  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class TestRequestProfiler(unittest.TestCase):
+    """Sampling, token forcing and the slowest-N ring"""
+
+    def test_disabled_and_sampling(self):
+        """Nothing is profiled unless sampled or forced by the token"""
+        profiler = RequestProfiler()
+        self.assertFalse(profiler.enabled)
+        self.assertIsNone(profiler.begin('anything'))
+
+        profiler = RequestProfiler(sample_rate=0.5, token='secret', rand=lambda: 0.9)
+        self.assertIsNone(profiler.begin())
+        self.assertIsNone(profiler.begin('wrong'))
+        handle = profiler.begin('secret')
+        self.assertIsNotNone(handle)
+        # Only one request is profiled at a time
+        self.assertIsNone(profiler.begin('secret'))
+        profiler.end(handle, endpoint='predict')
+        self.assertEqual((profiler.profiled, profiler.skipped_busy), (1, 1))
+
+    def test_keeps_slowest(self):
+        """The ring keeps the slowest profiles, listed slowest first"""
+        now = [0.0]
+        profiler = RequestProfiler(sample_rate=1.0, keep=2, clock=lambda: now[0])
+        for seconds in (0.004, 0.001, 0.008, 0.002):
+            handle = profiler.begin()
+            busy(0.001)
+            now[0] += seconds
+            profiler.end(handle, seconds=seconds)
+        self.assertEqual([entry['seconds'] for entry in profiler.profiles()], [0.008, 0.004])
+        self.assertIsNone(profiler.stats_of(2))
+
+        stats = profiler.stats_of(profiler.profiles()[0]['id'])
+        self.assertEqual(marshal.loads(render(stats, 'pstats')[0]), stats)
+        self.assertIn('cumulative', render(stats, 'text')[0])
+
+    def test_collapse(self):
+        """Folded stacks split a shared callee's time between its callers"""
+        root, a, b, leaf = ('app.py', 1, 'root'), ('app.py', 2, 'a'), ('app.py', 3, 'b'), ('~', 0, '<leaf>')
+        stats = {
+            root: (1, 1, 0.001, 0.010, {}),
+            a: (1, 1, 0.001, 0.004, {root: (1, 1, 0.001, 0.004)}),
+            b: (1, 1, 0.001, 0.005, {root: (1, 1, 0.001, 0.005)}),
+            leaf: (2, 2, 0.007, 0.007, {a: (1, 1, 0.003, 0.003), b: (1, 1, 0.004, 0.004)}),
+        }
+        lines = dict(line.rsplit(' ', 1) for line in collapse(stats).splitlines())
+        self.assertEqual(lines['app.py:root:1'], '1000')
+        self.assertEqual(lines['app.py:root:1;app.py:a:2;<leaf>'], '3000')
+        self.assertEqual(lines['app.py:root:1;app.py:b:3;<leaf>'], '4000')
+
+class TestProfileEndpoints(unittest.TestCase):
+    """Profiled requests are listed and downloadable by admins"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.client = app.app.test_client()
+
+    def setUp(self):
+        self.original = (app.profiler, app.ADMIN_TOKEN)
+        app.profiler = RequestProfiler(token='profile-me')
+        app.ADMIN_TOKEN = 'admin'
+        self.headers = {'X-Admin-Token': 'admin'}
+
+    def tearDown(self):
+        app.profiler, app.ADMIN_TOKEN = self.original
+
+    def test_profile_round_trip(self):
+        """A request with the token is profiled, others are not"""
+        self.client.post('/predict', json={"text": "hello"})
+        self.client.post('/predict', json={"text": "\U0001F600" * 500}, headers={'X-Profile-Token': 'profile-me'})
+        body = self.client.get('/admin/profiles', headers=self.headers).get_json()
+        self.assertEqual(body['profiled'], 1)
+        self.assertEqual(body['profiles'][0]['endpoint'], 'predict')
+
+        profile_id = body['profiles'][0]['id']
+        collapsed = self.client.get(f'/admin/profiles/{profile_id}?format=collapsed', headers=self.headers)
+        self.assertIn('app.py:predict:', collapsed.data.decode())
+        self.assertEqual(self.client.get(f'/admin/profiles/{profile_id}?format=svg', headers=self.headers).status_code, 400)
+        self.assertEqual(self.client.get('/admin/profiles/999', headers=self.headers).status_code, 404)
+        self.assertEqual(self.client.get('/admin/profiles').status_code, 401)
+
+        response = self.client.put('/admin/profiles', json={"sample_rate": 2}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.delete('/admin/profiles', headers=self.headers).get_json()['kept'], 0)
+
+    def test_asgi_failure_releases_profiler(self):
+        """A request failing past handle_body still ends its profile"""
+        def broken(handler, raw_body, fmt, deadline):
+            raise RuntimeError("boom")
+
+        original = asgi.handle_body
+        asgi.handle_body = broken
+        try:
+            with self.assertRaises(RuntimeError):
+                asgi.run_handler(app.handle_predict, b'{"text": "hello"}', profile_token='profile-me')
+        finally:
+            asgi.handle_body = original
+        self.assertEqual(app.profiler.profiles()[0]['status'], 500)
+
+        status = asgi.run_handler(app.handle_predict, b'{"text": "hello"}', profile_token='profile-me')[0]
+        self.assertEqual(status, 200)
+        self.assertEqual(app.profiler.profiled, 2)
+
+if __name__ == '__main__':
+    unittest.main()
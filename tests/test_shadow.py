@@ -0,0 +1,110 @@
+"""
+Tests for shadow scoring with candidate models
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+from shadow import ShadowScorer  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'saved', 'hate_speech_model.pkl')
+
+def fixed_scores(data, texts):
+    return np.array([data['scores'][text] for text in texts])
+
+class TestShadowScorer(unittest.TestCase):
+    """Sampling, bounded queue and comparison statistics"""
+
+    def test_compares_with_primary(self):
+        """Agreement, flips and deltas are aggregated per shadow model"""
+        scorer = ShadowScorer(fixed_scores, sample_rate=1.0, chunk_size=2)
+        scorer.add('candidate', {'threshold': 0.5, 'scores': {'a': 0.9, 'b': 0.45, 'c': 0.2}})
+        self.assertTrue(scorer.submit(['a', 'b', 'c'], [0.8, 0.55, 0.1], 0.5))
+        self.assertTrue(scorer.drain())
+
+        stats = scorer.stats()['models']['candidate']
+        self.assertEqual((stats['compared'], stats['agreements']), (3, 2))
+        self.assertEqual((stats['foul_to_proper'], stats['proper_to_foul']), (1, 0))
+        self.assertAlmostEqual(stats['mean_abs_delta'], (0.1 + 0.1 + 0.1) / 3)
+        self.assertAlmostEqual(stats['mean_delta'], (0.1 - 0.1 + 0.1) / 3)
+        self.assertAlmostEqual(stats['max_abs_delta'], 0.1)
+
+    def test_sampling_and_dropping(self):
+        """Unsampled batches are skipped, a full queue drops instead of blocking"""
+        busy = threading.Event()
+
+        def blocked(data, texts):
+            busy.wait()
+            return np.zeros(len(texts))
+
+        scorer = ShadowScorer(blocked, sample_rate=0.5, max_queue=1, rand=lambda: 0.7)
+        scorer.add('candidate', {'threshold': 0.5})
+        self.assertFalse(scorer.submit(['a'], [0.1], 0.5))
+        self.assertEqual(scorer.submitted, 0)
+
+        scorer.configure(sample_rate=1.0)
+        # The first batch is taken by the thread, the second fills the queue
+        submitted = [scorer.submit(['a'], [0.1], 0.5) for _ in range(4)]
+        busy.set()
+        self.assertTrue(scorer.drain())
+        self.assertGreaterEqual(scorer.dropped, 1)
+        self.assertEqual(scorer.sampled, 4)
+        self.assertEqual(scorer.submitted + scorer.dropped, scorer.sampled)
+        self.assertEqual(submitted.count(True), scorer.submitted)
+        self.assertAlmostEqual(scorer.stats()['drop_ratio'], scorer.dropped / 4)
+
+        self.assertTrue(scorer.remove('candidate'))
+        self.assertFalse(scorer.enabled)
+        self.assertFalse(scorer.remove('candidate'))
+
+class TestShadowEndpoints(unittest.TestCase):
+    """Shadow models score live traffic and are managed through /admin/shadow"""
+
+    @classmethod
+    def setUpClass(cls):
+        app.create_app(MODEL_PATH)
+        cls.client = app.app.test_client()
+
+    def setUp(self):
+        self.original = (app.shadow, app.ADMIN_TOKEN)
+        app.shadow = ShadowScorer(app.score_shadow, sample_rate=1.0)
+        app.ADMIN_TOKEN = 'admin'
+        self.headers = {'X-Admin-Token': 'admin'}
+
+    def tearDown(self):
+        app.shadow, app.ADMIN_TOKEN = self.original
+
+    def test_shadow_round_trip(self):
+        """A stricter candidate disagrees exactly on the texts between the thresholds"""
+        response = self.client.post('/admin/shadow', json={"name": "same", "path": MODEL_PATH}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        app.shadow.add('strict', dict(app.model_data, threshold=0.9))
+
+        texts = ["have a nice day", "you are a disgusting pig", "what a lovely morning", "shut up you idiot"]
+        body = self.client.post('/batch_predict', json={"texts": texts}).get_json()
+        self.assertTrue(app.shadow.drain())
+
+        foul = sum(result['prediction'] for result in body['results'])
+        strict_foul = sum(result['probability'] >= 0.9 for result in body['results'])
+        stats = self.client.get('/admin/shadow', headers=self.headers).get_json()['models']
+        self.assertEqual((stats['same']['compared'], stats['same']['agreement_rate']), (4, 1.0))
+        self.assertAlmostEqual(stats['same']['max_abs_delta'], 0.0)
+        self.assertEqual(stats['strict']['foul_to_proper'], foul - strict_foul)
+        self.assertIn('tweetguard_shadow_texts_total{model="same",result="agree"} 4', app.metrics.render())
+        self.assertEqual(self.client.get('/model_info').get_json()['shadow']['same']['compared'], 4)
+
+        missing = self.client.post('/admin/shadow', json={"name": "x", "path": "/nonexistent.pkl"}, headers=self.headers)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(self.client.delete('/admin/shadow/strict', headers=self.headers).status_code, 200)
+        self.assertEqual(self.client.delete('/admin/shadow/strict', headers=self.headers).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tests for the in-memory static asset index and the frontend routes
+"""
+
+import unittest
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import static_assets  # noqa: E402
+from static_assets import StaticAssets, accepted_encodings  # noqa: E402
+
+INDEX_HTML = b'<!doctype html><html><head><script src="/static/js/main.3f2a1b9c.js"></script></head>' + b' ' * 400
+MAIN_JS = b'function render(){return "tweetguard";}\n' * 100
+
+def write(root, path, body):
+    full_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb') as f:
+        f.write(body)
+
+class TestStaticAssets(unittest.TestCase):
+    """Indexing, precompression, ETags and encoding negotiation"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        write(self.root, 'index.html', INDEX_HTML)
+        write(self.root, 'static/js/main.3f2a1b9c.js', MAIN_JS)
+        write(self.root, 'logo192.png', b'\x89PNG' + bytes(range(256)) * 4)
+        self.assets = StaticAssets(self.root, encodings=['gzip'])
+        self.assets.load()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_index_and_variants(self):
+        """Text files get a gzip variant, binary files do not"""
+        self.assertEqual(set(self.assets.files), {'index.html', 'static/js/main.3f2a1b9c.js', 'logo192.png'})
+        main = self.assets.get('static/js/main.3f2a1b9c.js')
+        self.assertEqual(gzip.decompress(main.variants['gzip'][0]), MAIN_JS)
+        self.assertEqual(self.assets.get('logo192.png').variants, {})
+        self.assertIsNone(self.assets.get('missing.js'))
+
+    def test_cache_control(self):
+        """Hashed build outputs are immutable, index.html is revalidated"""
+        self.assertEqual(self.assets.get('static/js/main.3f2a1b9c.js').cache_control,
+                         static_assets.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.assets.index.cache_control, static_assets.REVALIDATE_CACHE_CONTROL)
+
+    def test_respond_negotiates_and_revalidates(self):
+        """Accept-Encoding picks the variant, a matching If-None-Match gives 304"""
+        main = self.assets.get('static/js/main.3f2a1b9c.js')
+        status, headers, body = main.respond(accept_encoding='br;q=1.0, gzip;q=0.5')
+        self.assertEqual((status, headers['Content-Encoding']), (200, 'gzip'))
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body), MAIN_JS)
+
+        status, headers, body = main.respond(accept_encoding='gzip;q=0')
+        self.assertEqual((status, body), (200, MAIN_JS))
+        self.assertNotIn('Content-Encoding', headers)
+
+        status, headers, body = main.respond(if_none_match=f'W/{headers["ETag"]}')
+        self.assertEqual((status, body), (304, b''))
+
+    def test_shipped_variants_and_encodings(self):
+        """Precompressed files of the build are used instead of recompressing"""
+        shipped = gzip.compress(MAIN_JS, mtime=0)
+        write(self.root, 'static/js/main.3f2a1b9c.js.gz', shipped)
+        self.assets.load()
+        self.assertNotIn('static/js/main.3f2a1b9c.js.gz', self.assets.files)
+        self.assertEqual(self.assets.get('static/js/main.3f2a1b9c.js').variants['gzip'][0], shipped)
+        self.assertEqual(accepted_encodings('*'), {'*', 'br', 'gzip'})
+        self.assertEqual(accepted_encodings('identity, gzip;q=0'), {'identity'})
+
+class TestFrontendRoutes(unittest.TestCase):
+    """The Flask routes serve the index, hashed bundles and the SPA fallback"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp()
+        write(cls.root, 'index.html', INDEX_HTML)
+        write(cls.root, 'static/js/main.3f2a1b9c.js', MAIN_JS)
+        write(cls.root, 'manifest.json', b'{"short_name": "TweetGuard"}')
+        cls.original = app.static_assets
+        app.static_assets = StaticAssets(cls.root, encodings=['gzip'])
+        cls.client = app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        app.static_assets = cls.original
+        shutil.rmtree(cls.root)
+
+    def test_routes(self):
+        """Bundles are immutable, client-side routes get index.html, 304 on a known ETag"""
+        response = self.client.get('/static/js/main.3f2a1b9c.js', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(gzip.decompress(response.data), MAIN_JS)
+
+        response = self.client.get('/dashboard/history')
+        self.assertEqual(response.data, INDEX_HTML)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        etag = response.headers['ETag']
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        self.assertEqual(self.client.get('/manifest.json').get_json(), {'short_name': 'TweetGuard'})
+        self.assertEqual(self.client.get('/static/js/missing.js').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
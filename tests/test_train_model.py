@@ -0,0 +1,78 @@
+"""
+Tests for the scripted training pipeline
+"""
+
+import unittest
+import csv
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts', 'training'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'api', 'src'))
+
+import app  # noqa: E402
+import train_model  # noqa: E402
+
+DATASET_PATH = os.path.join(ROOT_DIR, 'data', 'dataset.csv')
+
+class TestTrainModel(unittest.TestCase):
+    """Training on a sample of the dataset produces a model the API can serve"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.dataset_path = os.path.join(cls.tmp_dir, 'sample.csv')
+        with open(DATASET_PATH, newline='', encoding='utf-8') as src, \
+                open(cls.dataset_path, 'w', newline='', encoding='utf-8') as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            writer.writerow(next(reader))
+            for i, row in enumerate(reader):
+                if i % 10 == 0:
+                    writer.writerow(row)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_feature_cache_is_reused(self):
+        """The second run loads the cached matrices instead of re-vectorizing"""
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        first = train_model.vectorize_cached(self.dataset_path, cache_dir)
+        second = train_model.vectorize_cached(self.dataset_path, cache_dir)
+
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual((first['X_train'] != second['X_train']).nnz, 0)
+        self.assertEqual(first['vectorizer'].vocabulary_, second['vectorizer'].vocabulary_)
+        self.assertEqual(list(first['y_test']), list(second['y_test']))
+
+    def test_grid_search_model_loads_in_api(self):
+        """The saved pickle has the API keys and loads with the compiled engine"""
+        features = train_model.vectorize_cached(self.dataset_path, os.path.join(self.tmp_dir, 'cache'))
+        search = train_model.grid_search(features['X_train'], features['y_train'],
+                                         {'C': [1, 10], 'penalty': ['l1'], 'solver': ['liblinear']},
+                                         n_jobs=1, cv=2)
+        probabilities = search.best_estimator_.predict_proba(features['X_test'])[:, 1]
+        performance = train_model.evaluate(probabilities, features['y_test'], 0.4)
+        model_data = train_model.build_model_data(search.best_estimator_, features['vectorizer'], 0.4,
+                                                  'Logistic Regression', performance, {})
+
+        output = os.path.join(self.tmp_dir, 'grid', 'hate_speech_model.pkl')
+        train_model.save_model(model_data, output)
+        self.assertTrue(app.load_model(output))
+        self.assertIsNotNone(app.model_data['compiled'])
+        self.assertGreater(app.model_data['performance']['f1'], 0.9)
+
+    def test_streaming_training(self):
+        """Out-of-core training holds out rows and produces probabilities"""
+        vectorizer, model, probabilities, labels = train_model.train_streaming(self.dataset_path, chunk_size=500)
+
+        self.assertEqual(len(probabilities), len(labels))
+        self.assertGreater(len(labels), 0)
+        self.assertGreater(train_model.evaluate(probabilities, labels, 0.4)['roc_auc'], 0.8)
+
+if __name__ == '__main__':
+    unittest.main()